@@ -4,35 +4,39 @@
 Docs to PDF Converter - Final Edition
 最终完善版：并行处理 + 完善中文支持 + PDF内链接 + 格式修复
 
+转换由仓库根目录 generate_pdf.py 的统一引擎完成（并行 Markdown 渲染、渲染缓存、
+代码高亮、增量/并行排版、构建历史），本脚本只保留自己的命令行参数、
+Recipe 编号和输出文件名，引擎的改进会自动生效。
+
+输出位置：PDF 与调试 HTML 写入仓库根目录的 output/（以前是运行目录下的 output/），
+缓存位于 output/.cache/android_final/。指定 --sections 时输出 {文件名}_partial.pdf，
+--output 中带目录的路径按原样使用（相对当前目录），与以前一致。
+
 特性：
 1. ⚡ 并行处理 - 2-4倍速度提升
 2. 🔤 完善中文字体支持 - 无编码错乱
 3. 🔗 内部链接转换 - MD链接→PDF跳转
 4. 🔧 格式自动修复 - 代码块、列表、标题
 5. 💾 智能缓存 - 10-20倍二次生成提速
-6. 📝 保留原文 - 不进行中英文翻译
+6. 📝 保留原文 - 默认不翻译（--translate 翻译代码注释）
 
-使用方法：
+使用方法:
 python docs_to_pdf_final.py                          # 完整流程（推荐）
 python docs_to_pdf_final.py --sections 0,1 -w 8     # 指定章节和进程数
 python docs_to_pdf_final.py --no-cache               # 禁用缓存
 python docs_to_pdf_final.py --skip-validation        # 跳过格式验证
 python docs_to_pdf_final.py --fix-files              # 修复文件格式
+python docs_to_pdf_final.py --incremental            # 只重新排版有改动的章节
 """
 
 import os
-import re
-import yaml
-import hashlib
-import pickle
+import sys
 import argparse
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import mistune
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
+# 统一转换引擎位于仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_pdf import build_projects, parse_section_filter
+from pdf_translate import CommentTranslator
 
 
 # ============================================================================
@@ -86,1038 +90,17 @@ RECIPE_NUMBERS = {
 }
 
 
-def add_recipe_number_to_content(content: str, path: str) -> str:
-    """给 Recipe 内容的标题添加编号前缀"""
-    if path in RECIPE_NUMBERS:
-        recipe_num = RECIPE_NUMBERS[path]
-        # 匹配第一个一级标题 (# xxx)
-        pattern = r'^(#\s+)(.+)$'
-        def replace_title(match):
-            return f"{match.group(1)}{recipe_num}: {match.group(2)}"
-        # 只替换第一个匹配
-        content = re.sub(pattern, replace_title, content, count=1, flags=re.MULTILINE)
-    return content
-
-
-# ============================================================================
-# 格式验证和修复模块
-# ============================================================================
-
-class QuickFormatFixer:
-    """快速格式修复器"""
-
-    @staticmethod
-    def fix_file_issues(file_path: str) -> int:
-        """修复文件中的常见格式问题"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        except:
-            return 0
-
-        original_lines = lines[:]
-        fixes = 0
-
-        # 1. 修复未闭合的代码块
-        in_code_block = False
-        for line in lines:
-            if re.match(r'^```', line):
-                in_code_block = not in_code_block
-
-        if in_code_block:
-            if lines and not lines[-1].endswith('\n'):
-                lines[-1] += '\n'
-            lines.append('```\n')
-            fixes += 1
-
-        # 2. 修复列表标记后缺少空格
-        for i, line in enumerate(lines):
-            match = re.match(r'^(\s*)([-*+]|\d+\.)([^\s])', line)
-            if match:
-                indent = match.group(1)
-                marker = match.group(2)
-                rest = line[len(indent) + len(marker):]
-                lines[i] = f"{indent}{marker} {rest}"
-                fixes += 1
-
-        # 3. 修复标题后缺少空格
-        for i, line in enumerate(lines):
-            match = re.match(r'^(#{1,6})([^\s])', line)
-            if match:
-                hashes = match.group(1)
-                rest = line[len(hashes):]
-                lines[i] = f"{hashes} {rest}"
-                fixes += 1
-
-        # 如果有修复，写回文件
-        if fixes > 0 and lines != original_lines:
-            try:
-                # 备份原文件
-                backup_path = f"{file_path}.backup"
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.writelines(original_lines)
-
-                # 写入修复后的内容
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(lines)
-            except:
-                return 0
-
-        return fixes
-
-
-# ============================================================================
-# 中文注释翻译模块
-# ============================================================================
-
-class ChineseCommentTranslator:
-    """翻译代码中的中文注释为英文"""
-
-    # 预编译正则表达式
-    RE_CHINESE = re.compile(r'[\u4e00-\u9fa5]')
-    RE_CODE_BLOCK = re.compile(r'```(\w*)\n(.*?)```', re.DOTALL)
-
-    # 翻译词典（类变量，所有实例共享）
-    REPLACEMENTS = {
-        '绕过': 'Bypass', '反调试': 'Anti-Debugging', '检测': 'Detection',
-        '策略': 'Strategy', '修改': 'Modify', '拦截': 'Intercept',
-        '返回': 'Return', '调用': 'Call', '函数': 'Function',
-        '方法': 'Method', '类': 'Class', '对象': 'Object',
-        '参数': 'Parameter', '变量': 'Variable', '注释': 'Comment',
-        '代码': 'Code', '脚本': 'Script', '配置': 'Config',
-        '设置': 'Setting', '初始化': 'Initialize', '处理': 'Process',
-        '解析': 'Parse', '生成': 'Generate', '创建': 'Create',
-        '删除': 'Delete', '更新': 'Update', '获取': 'Get',
-    }
-
-    def __init__(self):
-        self.cache = {}
-
-    @classmethod
-    def has_chinese(cls, text):
-        """检测文本是否包含中文"""
-        return bool(cls.RE_CHINESE.search(text))
-
-    def translate_text(self, text):
-        """翻译单行文本"""
-        if not self.has_chinese(text):
-            return text
-
-        if text in self.cache:
-            return self.cache[text]
-
-        result = text
-        for zh, en in self.REPLACEMENTS.items():
-            result = result.replace(zh, en)
-
-        self.cache[text] = result
-        return result
-
-    def translate_code_block(self, code):
-        """翻译代码块中的中文注释"""
-        lines = code.split('\n')
-        translated = []
-
-        comment_patterns = [
-            re.compile(r'^(\s*//\s*)(.+)$'),  # JavaScript, Java, C++
-            re.compile(r'^(\s*#\s*)(.+)$'),   # Python, Shell
-            re.compile(r'(.+?)(//|#)(\s*)(.+)$'),  # 行内注释
-        ]
-
-        for line in lines:
-            for pattern in comment_patterns:
-                match = pattern.match(line)
-                if match:
-                    groups = match.groups()
-                    if len(groups) == 2 and self.has_chinese(groups[1]):
-                        prefix = groups[0]
-                        comment = groups[1]
-                        line = prefix + self.translate_text(comment)
-                        break
-                    elif len(groups) == 4 and self.has_chinese(groups[3]):
-                        code_part = groups[0]
-                        marker = groups[1]
-                        space = groups[2]
-                        comment = groups[3]
-                        line = code_part + marker + space + self.translate_text(comment)
-                        break
-
-            translated.append(line)
-
-        return '\n'.join(translated)
-
-
 # ============================================================================
-# 并行处理模块
+# 引擎配置
 # ============================================================================
 
-def process_single_markdown_file(args):
-    """处理单个markdown文件（用于并行执行）"""
-    file_path, path, counter, use_cache, cache_dir, path_to_anchor = args
-
-    try:
-        # 检查缓存
-        cache_key = f"{path}_{counter}"
-        cache_file = os.path.join(cache_dir,
-                                  f"{hashlib.md5(cache_key.encode()).hexdigest()}.pkl")
-
-        file_hash = hashlib.md5(open(file_path, 'rb').read()).hexdigest()
-
-        if use_cache and os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    if cached_data['hash'] == file_hash:
-                        return cached_data['html'], counter, path
-            except:
-                pass
-
-        # 读取文件
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # 给 Recipe 添加编号前缀
-        content = add_recipe_number_to_content(content, path)
-
-        # 注释翻译功能 - 不进行中英文翻译
-        # translator = ChineseCommentTranslator()
-        #
-        # def translate_code_block(match):
-        #     language = match.group(1) or ''
-        #     code = match.group(2)
-        #     translated_code = translator.translate_code_block(code)
-        #     return f'```{language}\n{translated_code}\n```'
-        #
-        # content = ChineseCommentTranslator.RE_CODE_BLOCK.sub(
-        #     translate_code_block, content)
-
-        # 转换内部链接为PDF锚点
-        content = convert_internal_links_in_content(content, path_to_anchor)
-
-        # 转换为HTML
-        html_content = mistune.html(content)
-
-        # 缓存结果
-        if use_cache:
-            os.makedirs(cache_dir, exist_ok=True)
-            with open(cache_file, 'wb') as f:
-                pickle.dump({
-                    'hash': file_hash,
-                    'html': html_content
-                }, f)
-
-        return html_content, counter, path
-
-    except Exception as e:
-        print(f"❌ 处理文件失败 {file_path}: {e}")
-        return None, counter, path
-
-
-def convert_internal_links_in_content(content, path_to_anchor):
-    """转换markdown内容中的内部链接为PDF锚点"""
-
-    def replace_link(match):
-        link_text = match.group(1)
-        link_url = match.group(2)
-
-        # 只处理相对路径的 .md 链接
-        if not (link_url.endswith('.md') or '.md#' in link_url):
-            return match.group(0)
-
-        # 提取文件路径和锚点
-        if '#' in link_url:
-            file_path, anchor = link_url.split('#', 1)
-        else:
-            file_path = link_url
-            anchor = None
-
-        # 规范化路径
-        normalized_path = file_path
-        while normalized_path.startswith('./'):
-            normalized_path = normalized_path[2:]
-        while normalized_path.startswith('../'):
-            normalized_path = normalized_path[3:]
-
-        # 查找对应的锚点ID
-        target_anchor = None
-        if normalized_path in path_to_anchor:
-            target_anchor = path_to_anchor[normalized_path]
-        else:
-            # 模糊匹配文件名
-            filename = normalized_path.split('/')[-1]
-            for path, anchor_id in path_to_anchor.items():
-                if path.endswith(filename):
-                    target_anchor = anchor_id
-                    break
-
-        if target_anchor:
-            if anchor:
-                return f'[{link_text}](#{target_anchor}-{anchor})'
-            else:
-                return f'[{link_text}](#{target_anchor})'
-        else:
-            # 找不到映射，返回纯文本
-            return f'{link_text} 📄'
-
-    # 处理所有链接
-    content = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', replace_link, content)
-    return content
-
-
-# ============================================================================
-# 主转换器
-# ============================================================================
-
-class FinalDocsToPDFConverter:
-    """最终完善版PDF转换器"""
-
-    def __init__(self, docs_dir="docs", mkdocs_file="mkdocs.yml",
-                 section_filter=None, validate=True, auto_fix=False,
-                 use_cache=True, workers=None):
-        self.docs_dir = docs_dir
-        self.mkdocs_file = mkdocs_file
-        self.output_dir = "output"
-        self.cache_dir = os.path.join(self.output_dir, ".cache")
-        self.nav_structure = []
-        self.font_config = FontConfiguration()
-        self.path_to_anchor = {}
-        self.section_filter = section_filter
-        self.validate = validate
-        self.auto_fix = auto_fix
-        self.use_cache = use_cache
-        self.workers = workers or os.cpu_count()
-
-        # 作者信息
-        self.author_email = "overkazaf@gmail.com"
-        self.author_wechat = "_0xAF_"
-        self.created_date = "2025-08-01"
-        self.revision_date = "2025-12-20"
-
-        os.makedirs(self.output_dir, exist_ok=True)
-        if use_cache:
-            os.makedirs(self.cache_dir, exist_ok=True)
-
-    def load_navigation_structure(self):
-        """从mkdocs.yml加载导航结构"""
-        try:
-            with open(self.mkdocs_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                self.nav_structure = config.get('nav', [])
-                print(f"✅ 已加载导航结构，共 {len(self.nav_structure)} 个主要部分")
-                return self.nav_structure
-        except Exception as e:
-            print(f"❌ 加载mkdocs.yml失败: {e}")
-            return []
-
-    def should_include_section(self, section_idx, section_name):
-        """判断是否应该包含该章节"""
-        if self.section_filter is None:
-            return True
-
-        if section_idx in self.section_filter:
-            return True
-
-        for filter_name in self.section_filter:
-            if isinstance(filter_name, str) and filter_name.lower() in section_name.lower():
-                return True
-
-        return False
-
-    def build_path_anchor_mapping(self):
-        """预先构建文件路径到锚点ID的映射"""
-        counter = 0
-
-        def scan_nav_items(nav_items):
-            nonlocal counter
-            for item in nav_items:
-                if isinstance(item, dict):
-                    for title, path in item.items():
-                        if isinstance(path, str):
-                            counter += 1
-                            anchor_id = f"section-{counter}"
-                            self.path_to_anchor[path] = anchor_id
-                        elif isinstance(path, list):
-                            scan_nav_items(path)
-
-        for section in self.nav_structure:
-            if isinstance(section, dict):
-                for section_name, items in section.items():
-                    if section_name != "Home" and isinstance(items, list):
-                        scan_nav_items(items)
-
-        print(f"📋 已建立 {len(self.path_to_anchor)} 个文件路径映射")
-
-    def validate_and_fix_files(self):
-        """验证并修复文件格式"""
-        if not self.validate:
-            return
-
-        print("\n🔍 验证文件格式...")
-
-        total_issues = 0
-        total_fixes = 0
-
-        for path, anchor_id in self.path_to_anchor.items():
-            file_path = os.path.join(self.docs_dir, path)
-            if not os.path.exists(file_path):
-                continue
-
-            # 检查是否有问题
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                has_issues = False
-
-                # 检查未闭合的代码块
-                in_code_block = False
-                for line in content.split('\n'):
-                    if re.match(r'^```', line):
-                        in_code_block = not in_code_block
-                if in_code_block:
-                    has_issues = True
-                    total_issues += 1
-
-                if has_issues and self.auto_fix:
-                    fixes = QuickFormatFixer.fix_file_issues(file_path)
-                    total_fixes += fixes
-
-            except:
-                continue
-
-        if total_issues > 0:
-            print(f"⚠️  发现 {total_issues} 个格式问题")
-            if self.auto_fix:
-                print(f"✅ 已自动修复 {total_fixes} 个问题")
-        else:
-            print("✅ 所有文件格式正确")
-
-    def collect_files_to_process(self):
-        """收集所有需要处理的文件"""
-        files_to_process = []
-        article_counter = 0
-
-        def collect_nav_items(nav_items):
-            nonlocal article_counter
-            for item in nav_items:
-                if isinstance(item, dict):
-                    for title, path in item.items():
-                        if isinstance(path, str):
-                            article_counter += 1
-                            file_path = os.path.join(self.docs_dir, path)
-                            if os.path.exists(file_path):
-                                files_to_process.append((
-                                    file_path, path, article_counter,
-                                    self.use_cache, self.cache_dir,
-                                    self.path_to_anchor
-                                ))
-                        elif isinstance(path, list):
-                            collect_nav_items(path)
-
-        section_idx = 0
-        for section in self.nav_structure:
-            if isinstance(section, dict):
-                for section_name, items in section.items():
-                    if section_name == "Home":
-                        section_idx += 1
-                        continue
-
-                    if not self.should_include_section(section_idx, section_name):
-                        section_idx += 1
-                        continue
-
-                    section_idx += 1
-                    if isinstance(items, list):
-                        collect_nav_items(items)
-
-        return files_to_process
-
-    def merge_docs_files_parallel(self):
-        """并行合并所有docs文件"""
-        if not self.nav_structure:
-            self.load_navigation_structure()
-
-        self.build_path_anchor_mapping()
-
-        # 验证和修复（如果需要）
-        if self.validate:
-            self.validate_and_fix_files()
-
-        # 创建基础HTML
-        full_html = """
-        <!DOCTYPE html>
-        <html lang="zh-CN">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Android Reverse Engineering Cookbook</title>
-        </head>
-        <body>
-        """
-
-        # 添加封面和目录
-        full_html += self.create_cover_page()
-        full_html += self.create_table_of_contents()
-
-        # 收集所有要处理的文件
-        files_to_process = self.collect_files_to_process()
-        print(f"\n🚀 开始并行处理 {len(files_to_process)} 个文件，使用 {self.workers} 个工作进程...")
-
-        # 并行处理文件
-        results = {}
-        with ProcessPoolExecutor(max_workers=self.workers) as executor:
-            futures = {executor.submit(process_single_markdown_file, args): args
-                      for args in files_to_process}
-
-            completed = 0
-            for future in as_completed(futures):
-                html_content, counter, path = future.result()
-                if html_content:
-                    results[counter] = (html_content, path)
-                    completed += 1
-                    if completed % 10 == 0 or completed == len(files_to_process):
-                        print(f"  进度: {completed}/{len(files_to_process)}")
-
-        print(f"✅ 并行处理完成，共处理 {len(results)} 个文件")
-
-        # 按顺序添加到HTML
-        section_icons = {
-            "Home": "🏠",
-            "Quick-Start": "🚀",
-            "Recipes": "📖",
-            "Tools": "🛠️",
-            "Case-Studies": "💼",
-            "Reference": "📚",
-            "Appendix": "📎",
-            "Foundations": "📱",
-            "Tooling": "🔧",
-            "Techniques": "⚙️",
-            "Advanced-Topics": "🎓",
-            "Engineering": "👷",
-            "Data-Analysis": "📊",
-            "Scripts": "📝",
-            "Others": "📦"
-        }
-
-        section_idx = 0
-        for section in self.nav_structure:
-            if isinstance(section, dict):
-                for section_name, items in section.items():
-                    if section_name == "Home":
-                        section_idx += 1
-                        continue
-
-                    if not self.should_include_section(section_idx, section_name):
-                        section_idx += 1
-                        continue
-
-                    icon = section_icons.get(section_name, "📄")
-                    section_idx += 1
-
-                    full_html += f"""
-                    <div class="chapter">
-                        <h1 class="no-page-break">{icon} {section_name}</h1>
-                    """
-
-                    # 收集该section下的所有结果
-                    def add_results(nav_items, html_output):
-                        for item in nav_items:
-                            if isinstance(item, dict):
-                                for title, path in item.items():
-                                    if isinstance(path, str) and path in self.path_to_anchor:
-                                        counter = int(self.path_to_anchor[path].split('-')[1])
-                                        if counter in results:
-                                            html_content, _ = results[counter]
-                                            anchor_id = self.path_to_anchor[path]
-                                            html_output.append(f"""
-                                            <div class="section" id="{anchor_id}">
-                                                <h2>{counter}. {title}</h2>
-                                                {html_content}
-                                            </div>
-                                            """)
-                                    elif isinstance(path, list):
-                                        add_results(path, html_output)
-
-                    section_html = []
-                    if isinstance(items, list):
-                        add_results(items, section_html)
-                    full_html += ''.join(section_html)
-                    full_html += "</div>"
-
-        full_html += """
-        </body>
-        </html>
-        """
-
-        return full_html
-
-    def create_cover_page(self):
-        """创建封面页面"""
-        return f"""
-        <div class="cover-page">
-            <div style="margin-top: 150pt;">
-                <h1 style="font-size: 36pt; color: #1a1a1a; margin-bottom: 30pt; border: none; page-break-before: auto;" class="no-page-break">
-                    Android Reverse Engineering Cookbook
-                </h1>
-                <h2 style="font-size: 20pt; color: #666; font-weight: 400; border: none; padding: 0;">
-                    Complete Guide to Android Security Analysis
-                </h2>
-                <div style="margin-top: 80pt; font-size: 14pt; color: #888;">
-                    <p>Foundations, Tools, Techniques, and Advanced Topics</p>
-                    <p>Covers Frida, Unidbg, Xposed, IDA Pro and More</p>
-                    <p>Including Data Analysis, Engineering and Case Studies</p>
-                </div>
-            </div>
-        </div>
-        <div style="page-break-before: always; text-align: center; margin-top: 80pt;">
-            <div style="font-size: 12pt; color: #aaa;">
-                <p style="font-size: 48pt; margin-bottom: 15pt;">🧑‍💻</p>
-                <p style="font-size: 16pt; color: #666; margin-bottom: 20pt;"><strong>Authors: +5, Gemini Pro 3.0, Claude Code Opus 4.5</strong></p>
-                <p>📧 Email: {self.author_email}</p>
-                <p>💬 WeChat: {self.author_wechat}</p>
-                <p style="margin-top: 30pt;">📅 Created: {self.created_date}</p>
-                <p>🔄 Last Revised: {self.revision_date}</p>
-                <p>📌 Version: v2.0</p>
-            </div>
-            <div style="margin-top: 40pt; padding: 25pt 40pt; background-color: #fff8e1; border-radius: 8pt; border-left: 4px solid #ffa726;">
-                <p style="font-size: 13pt; color: #e65100; font-weight: 600; margin-bottom: 15pt; text-align: center;">
-                    📖 关于这本食谱的诞生 | About This Cookbook
-                </p>
-                <p style="font-size: 10.5pt; color: #444; line-height: 1.9; text-align: justify; margin-bottom: 12pt;">
-                    这本食谱的诞生，是一次有趣的<strong>人机协作</strong>实验。除了笔者（<strong>+5</strong>）在Android逆向工程领域的日常记录和实战经验积累，
-                    本书还得到了两位AI助手的鼎力支持——<strong>Gemini Pro 3.0</strong>和<strong>Claude Code Opus 4.5</strong>。
-                    这个协作过程就像一个真实的技术团队：
-                </p>
-                <div style="margin-left: 20pt; margin-bottom: 12pt;">
-                    <p style="font-size: 10pt; color: #444; line-height: 1.7; margin-bottom: 8pt;">
-                        📚 <strong>Gemini Pro 3.0</strong> 化身"科研老师傅"：负责海量技术知识点的调研、梳理与发散，
-                        从 arXiv 前沿论文到工业界实践资料的深度阅读与分析，以及提供技术思路和解决方案建议，
-                        就像团队中博学多才的技术顾问和知识管家。
-                    </p>
-                    <p style="font-size: 10pt; color: #444; line-height: 1.7; margin-bottom: 8pt;">
-                        💻 <strong>Claude Code Opus 4.5</strong> 化身"牛马程序员"：负责所有代码示例的编写与调试、
-                        大型代码库的深度理解与重构、架构流程图的创建、批量处理 Markdown 格式问题、自动化文档生成流程，
-                        以及代码质量把关，就像团队中 7x24 在线的全栈开发和 DevOps 工程师。
-                    </p>
-                    <p style="font-size: 10pt; color: #444; line-height: 1.7; margin-bottom: 8pt;">
-                        🎯 <strong>+5</strong>（技术负责人 & 总编辑）：负责整体架构设计、技术方向把控、内容审核修订、
-                        以及最终质量保障，就像团队中的Tech Lead和Editor-in-Chief。
-                    </p>
-                </div>
-                <p style="font-size: 10pt; color: #666; line-height: 1.8; text-align: justify; font-style: italic; margin-bottom: 12pt;">
-                    This cookbook is born from an intriguing <strong>human-AI collaboration</strong>, like a real tech team:
-                    <strong>Gemini Pro 3.0</strong> (Research Guru) dives into arXiv papers, technical documentation, and industry practices;
-                    <strong>Claude Code Opus 4.5</strong> (Workhorse Coder) handles all code examples, codebase comprehension,
-                    architecture diagrams, Markdown formatting, and documentation automation around the clock;
-                    <strong>+5</strong> (Tech Lead & Editor-in-Chief) steers the architecture, technical direction,
-                    content revision, and final quality assurance.
-                </p>
-                <p style="font-size: 10pt; color: #555; line-height: 1.8; text-align: justify; margin-bottom: 12pt;">
-                    🤝 我相信，人类的实践智慧与AI的知识整合能力相结合，能够创造出更优质的学习资源。
-                    希望这种跨越人机边界的协作方式，能为大家带来<strong>不一样的阅读体验</strong>，
-                    也为技术文档的创作开辟新的可能性。
-                </p>
-                <p style="font-size: 10pt; color: #444; line-height: 1.8; text-align: justify; border-top: 1px dashed #ffa726; padding-top: 12pt;">
-                    ✈️ <strong>创作初衷</strong>：这本食谱最初是为了记录笔者日常的逆向工作和技术积累。
-                    在漫长的飞机旅途中，或是在咖啡馆小憩时，翻阅这些精心整理的技术笔记，
-                    回顾那些有意思的逆向知识点和解题思路，既是一种放松，也是一种学习。
-                    希望这本书也能成为你旅途中的良伴，让技术学习变得更加轻松愉快。
-                </p>
-            </div>
-            <div style="margin-top: 30pt; padding: 25pt 40pt; border-top: 1px solid #ddd; border-bottom: 1px solid #ddd;">
-                <p style="font-size: 11pt; color: #555; font-style: italic; line-height: 1.8; text-align: center;">
-                    "If the highest aim of a captain were to preserve his ship,<br/>
-                    he would keep it in port forever."
-                </p>
-                <p style="font-size: 9pt; color: #888; text-align: right; margin-top: 10pt;">
-                    — St. Thomas Aquinas, <em>Summa Theologica</em> (1265-1274)
-                </p>
-            </div>
-            <div style="margin-top: 30pt; padding: 25pt 40pt; background-color: #f9f9f9; border-radius: 8pt;">
-                <p style="font-size: 10.5pt; color: #444; line-height: 1.9; text-align: justify; margin-bottom: 15pt;">
-                    The journey begins with the thrill of solving puzzles—that exhilarating rush when code
-                    finally yields its secrets. Yet seasoned reverse engineers walk a different path. They
-                    remain humble, ever-curious, and deeply reflective. In time, they all return to first
-                    principles: understanding how systems are <em>built</em> is the only true way to understand
-                    how they can be <em>unraveled</em>.
-                </p>
-                <p style="font-size: 10pt; color: #666; line-height: 1.8; text-align: justify; font-style: italic;">
-                    初涉此道，多为破解之时的快意。而行至深处者，早已超越这份欣喜。他们怀谦卑之心，
-                    持求知之念，善于思考，最终都会回归技术的本质——唯有洞悉系统<strong>构建</strong>之道，
-                    方能参透其<strong>拆解</strong>之法。知己知彼，百战不殆。
-                </p>
-            </div>
-        </div>
-        """
-
-    def create_table_of_contents(self):
-        """创建简化目录页面"""
-        return """
-        <div class="toc-page">
-            <h1 class="toc-title no-page-break">📚 目录</h1>
-            <p style="text-align: center; color: #666; font-size: 12pt; margin-top: 20pt;">
-                本书涵盖Android逆向工程的完整知识体系<br/>
-                包括基础理论、工具使用、实战技巧和高级主题
-            </p>
-        </div>
-        """
-
-    def create_css_styles(self):
-        """创建PDF样式 - 完善的中文字体支持"""
-        css_content = """
-        /* 使用系统字体确保中文正确显示 */
-        @font-face {
-            font-family: 'Chinese Sans';
-            src: url('file:///System/Library/Fonts/Hiragino Sans GB.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/STHeiti Light.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/Supplemental/Songti.ttc') format('truetype'),
-                 url('file:///Library/Fonts/Arial Unicode.ttf') format('truetype');
-            font-weight: normal;
-        }
-
-        @font-face {
-            font-family: 'Chinese Sans';
-            src: url('file:///System/Library/Fonts/Hiragino Sans GB.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/STHeiti Medium.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/Supplemental/Songti.ttc') format('truetype');
-            font-weight: bold;
-        }
-
-        @font-face {
-            font-family: 'Code Font';
-            src: url('file:///System/Library/Fonts/Menlo.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/Monaco.dfont') format('truetype'),
-                 url('file:///Library/Fonts/Arial Unicode.ttf') format('truetype');
-        }
-
-        /* 页面设置 */
-        @page {
-            size: A4;
-            margin: 2.5cm 2cm 3cm 2cm;
-
-            @top-left {
-                content: "Android Reverse Engineering Cookbook";
-                font-family: 'Chinese Sans', sans-serif;
-                font-size: 10pt;
-                color: #666;
-                border-bottom: 1px solid #e0e0e0;
-                padding-bottom: 5pt;
-            }
-
-            @top-right {
-                content: "Page " counter(page);
-                font-family: 'Chinese Sans', sans-serif;
-                font-size: 10pt;
-                color: #666;
-                border-bottom: 1px solid #e0e0e0;
-                padding-bottom: 5pt;
-            }
-
-            @bottom-center {
-                content: "© 2025 Android Reverse Engineering Cookbook";
-                font-family: 'Chinese Sans', sans-serif;
-                font-size: 9pt;
-                color: #999;
-                border-top: 1px solid #e0e0e0;
-                padding-top: 5pt;
-            }
-        }
-
-        /* 基础样式 */
-        body {
-            font-family: 'Chinese Sans', 'Noto Sans SC', 'Microsoft YaHei', sans-serif;
-            font-size: 11pt;
-            line-height: 1.8;
-            color: #333;
-            background: white;
-        }
-
-        /* 标题样式 */
-        h1 {
-            font-family: 'Chinese Sans', sans-serif;
-            font-size: 24pt;
-            font-weight: 700;
-            color: #1a1a1a;
-            margin-top: 30pt;
-            margin-bottom: 20pt;
-            page-break-before: always;
-            border-bottom: 3px solid #4a90e2;
-            padding-bottom: 10pt;
-        }
-
-        h1.no-page-break {
-            page-break-before: auto;
-        }
-
-        h2 {
-            font-family: 'Chinese Sans', sans-serif;
-            font-size: 18pt;
-            font-weight: 600;
-            color: #2c3e50;
-            margin-top: 25pt;
-            margin-bottom: 15pt;
-            border-left: 4px solid #4a90e2;
-            padding-left: 15pt;
-            page-break-after: avoid;
-        }
-
-        h3 {
-            font-family: 'Chinese Sans', sans-serif;
-            font-size: 14pt;
-            font-weight: 500;
-            color: #34495e;
-            margin-top: 20pt;
-            margin-bottom: 12pt;
-            page-break-after: avoid;
-        }
-
-        h4 {
-            font-family: 'Chinese Sans', sans-serif;
-            font-size: 12pt;
-            font-weight: 500;
-            color: #555;
-            margin-top: 15pt;
-            margin-bottom: 10pt;
-            page-break-after: avoid;
-        }
-
-        /* 段落样式 */
-        p {
-            margin-bottom: 12pt;
-            text-align: justify;
-            orphans: 3;
-            widows: 3;
-        }
-
-        /* 列表样式 */
-        ul, ol {
-            margin-bottom: 12pt;
-            padding-left: 25pt;
-        }
-
-        li {
-            margin-bottom: 6pt;
-            orphans: 2;
-            widows: 2;
-        }
-
-        /* 代码样式 */
-        code {
-            font-family: 'Code Font', 'Menlo', 'Monaco', 'Consolas', monospace;
-            font-size: 9pt;
-            background-color: #f8f9fa;
-            padding: 2pt 4pt;
-            border-radius: 3pt;
-            border: 1px solid #e9ecef;
-            word-wrap: break-word;
-        }
-
-        pre {
-            font-family: 'Code Font', 'Menlo', 'Monaco', 'Consolas', monospace;
-            font-size: 8.5pt;
-            background-color: #f8f9fa;
-            border: 1px solid #e9ecef;
-            border-radius: 6pt;
-            padding: 12pt;
-            margin: 12pt 0;
-            overflow-x: auto;
-            line-height: 1.5;
-            white-space: pre-wrap;
-            word-wrap: break-word;
-            page-break-inside: avoid;
-        }
-
-        pre code {
-            background: none;
-            border: none;
-            padding: 0;
-            font-size: 8.5pt;
-        }
-
-        /* 表格样式 */
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 15pt 0;
-            font-size: 10pt;
-            page-break-inside: avoid;
-        }
-
-        th, td {
-            border: 1px solid #ddd;
-            padding: 8pt 12pt;
-            text-align: left;
-            word-wrap: break-word;
-        }
-
-        th {
-            background-color: #f8f9fa;
-            font-weight: 600;
-            color: #495057;
-        }
-
-        tr:nth-child(even) {
-            background-color: #f8f9fa;
-        }
-
-        /* 引用样式 */
-        blockquote {
-            border-left: 4px solid #6c757d;
-            padding-left: 15pt;
-            margin: 15pt 0;
-            color: #6c757d;
-            font-style: italic;
-        }
-
-        /* 链接样式 */
-        a {
-            color: #4a90e2;
-            text-decoration: none;
-            word-wrap: break-word;
-        }
-
-        /* 强调样式 */
-        strong, b {
-            font-weight: 600;
-            color: #2c3e50;
-        }
-
-        em, i {
-            font-style: italic;
-            color: #555;
-        }
-
-        /* 分隔线 */
-        hr {
-            border: none;
-            border-top: 2px solid #e9ecef;
-            margin: 25pt 0;
-        }
-
-        /* 封面样式 */
-        .cover-page {
-            text-align: center;
-            page-break-after: always;
-        }
-
-        /* 目录样式 */
-        .toc-page {
-            page-break-after: always;
-        }
-
-        .toc-title {
-            font-size: 28pt;
-            font-weight: 700;
-            text-align: center;
-            color: #1a1a1a;
-            margin-bottom: 40pt;
-            border-bottom: 3px solid #4a90e2;
-            padding-bottom: 15pt;
-        }
-
-        /* 章节样式 */
-        .chapter {
-            page-break-before: always;
-        }
-
-        /* 每个序号章节另起一页 */
-        .section {
-            margin-bottom: 30pt;
-            page-break-before: always;
-        }
-
-        /* 第一个section不分页（紧跟大章节标题） */
-        .chapter .section:first-of-type {
-            page-break-before: auto;
-        }
-
-        /* 打印优化 */
-        @media print {
-            body {
-                -webkit-print-color-adjust: exact;
-                print-color-adjust: exact;
-            }
-        }
-        """
-
-        return CSS(string=css_content, font_config=self.font_config)
-
-    def generate_pdf(self, output_filename="android_reverse_engineering_cookbook_final.pdf"):
-        """生成PDF文件"""
-        print("\n🚀 开始生成PDF (Final Edition - 完善版)...")
-        print("=" * 60)
-        print(f"⚡ 并行处理: {self.workers} 个工作进程")
-        print(f"💾 缓存: {'启用' if self.use_cache else '禁用'}")
-        print(f"🔍 验证: {'启用' if self.validate else '禁用'}")
-        print(f"🔧 自动修复: {'启用' if self.auto_fix else '禁用'}")
-        print("=" * 60)
-
-        # 合并所有docs文件
-        html_content = self.merge_docs_files_parallel()
-
-        # 创建CSS样式
-        css_styles = self.create_css_styles()
-
-        # 生成PDF
-        if os.path.dirname(output_filename):
-            output_path = output_filename
-        else:
-            output_path = os.path.join(self.output_dir, output_filename)
-
-        try:
-            print("\n📄 正在渲染PDF...")
-            html_doc = HTML(string=html_content)
-            html_doc.write_pdf(
-                output_path,
-                stylesheets=[css_styles],
-                font_config=self.font_config
-            )
-
-            file_size_mb = os.path.getsize(output_path) / 1024 / 1024
-
-            print(f"\n✅ PDF生成成功!")
-            print(f"📁 文件路径: {output_path}")
-            print(f"📊 文件大小: {file_size_mb:.2f} MB")
-
-            # 保存HTML用于调试
-            html_path = os.path.join(self.output_dir, "docs_final_debug.html")
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            print(f"🔍 调试HTML: {html_path}")
-
-            print("\n" + "=" * 60)
-            print("🎉 PDF生成完成!")
-            print("✨ 特性:")
-            print("   ✅ 并行处理 - 快速生成")
-            print("   ✅ 完善中文支持 - 无编码错乱")
-            print("   ✅ PDF内链接跳转 - 完美导航")
-            print("   ✅ 格式自动修复 - 确保质量")
-            print("   ✅ 智能缓存 - 极速二次生成")
-            print("=" * 60)
-
-            return output_path
-
-        except Exception as e:
-            print(f"\n❌ PDF生成失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
-
-
-def parse_section_filter(sections_arg):
-    """解析章节过滤参数"""
-    if not sections_arg:
-        return None
-
-    result = []
-    for item in sections_arg.split(','):
-        item = item.strip()
-        try:
-            result.append(int(item))
-        except ValueError:
-            result.append(item)
-
-    return result
+# 覆盖 generate_pdf.py 中 android 项目的配置：本版本的 Recipe 编号与输出文件名；
+# 独立的版本名使缓存、PDF 片段和构建历史与主版本分开
+PROJECT_OVERRIDES = {
+    "edition": "android_final",
+    "recipe_numbers": RECIPE_NUMBERS,
+    "output_file": "android_reverse_engineering_cookbook_final.pdf",
+}
 
 
 def main():
@@ -1133,6 +116,7 @@ def main():
   %(prog)s --skip-validation                # 跳过验证快速生成
   %(prog)s --fix-files                      # 修复文件格式问题
   %(prog)s --fix-files --no-cache -w 12     # 组合使用
+  %(prog)s --incremental                    # 只重新排版有改动的章节
         """
     )
     parser.add_argument('--sections', '-s', type=str,
@@ -1147,56 +131,43 @@ def main():
                        help='自动修复文件格式问题')
     parser.add_argument('--workers', '-w', type=int,
                        help='并行工作进程数（默认：CPU核心数）')
+    parser.add_argument('--format', choices=['pdf', 'html'], default='pdf',
+                       help='输出格式：pdf（默认）或按章节拆分的HTML预览（不调用 WeasyPrint）')
+    parser.add_argument('--incremental', action='store_true',
+                       help='按章节缓存 PDF 片段，只重新排版有改动的章节（需要 pypdf）')
+    parser.add_argument('--parallel-render', action='store_true',
+                       help='在所有 CPU 核心上并行排版各章节（需要 pypdf）')
+    parser.add_argument('--translate', action='store_true',
+                       help='将代码块中的中文注释翻译为英文')
 
     args = parser.parse_args()
 
     print("🚀 Android Reverse Engineering Cookbook")
     print("   Final PDF Generator - 完善版")
     print("=" * 60)
-    print("✨ 集成所有优点:")
-    print("   ⚡ 并行处理 (2-4倍提速)")
-    print("   🔤 完善中文支持")
-    print("   🔗 PDF内链接跳转")
-    print("   🔧 格式自动修复")
-    print("   💾 智能缓存 (10-20倍二次提速)")
-    print("=" * 60)
-
-    # 检查依赖
-    try:
-        import mistune
-        import weasyprint
-        import yaml
-        print("✅ 依赖检查通过")
-    except ImportError as e:
-        print(f"❌ 缺少依赖: {e}")
-        print("请运行: pip install mistune weasyprint pillow pyyaml")
-        return
 
-    section_filter = parse_section_filter(args.sections) if args.sections else None
-
-    converter = FinalDocsToPDFConverter(
-        section_filter=section_filter,
+    # 指定章节时输出 {文件名}_partial.pdf，不会覆盖完整版；带目录的路径按原样使用
+    output_filename = args.output or PROJECT_OVERRIDES["output_file"]
+    if args.sections:
+        output_filename = f"{output_filename.replace('.pdf', '')}_partial.pdf"
+    if os.path.dirname(output_filename):
+        output_filename = os.path.abspath(output_filename)
+
+    return build_projects(
+        ["android"],
+        output_filename=output_filename,
+        project_overrides={"android": PROJECT_OVERRIDES},
+        workers=args.workers,
         validate=not args.skip_validation,
         auto_fix=args.fix_files,
         use_cache=not args.no_cache,
-        workers=args.workers
+        incremental=args.incremental,
+        parallel_render=args.parallel_render,
+        output_format=args.format,
+        section_filter=parse_section_filter(args.sections),
+        content_hooks=[CommentTranslator()] if args.translate else None
     )
 
-    nav = converter.load_navigation_structure()
-    if not nav:
-        print("❌ 未找到导航结构")
-        return
-
-    if section_filter:
-        print(f"\n📋 将生成章节: {section_filter}")
-
-    output_filename = args.output if args.output else "android_reverse_engineering_cookbook_final.pdf"
-    if section_filter:
-        base_name = output_filename.replace('.pdf', '')
-        output_filename = f"{base_name}_partial.pdf"
-
-    converter.generate_pdf(output_filename)
-
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+Benchmarks for the PDF generator (generate_pdf.py).
+
+    python -m benchmarks.corpus /tmp/corpus --files 200   # synthetic corpus only
+    python -m benchmarks.bench_pdf --sizes 50,200,500     # timings + regression check
+    python -m benchmarks.bench_startup                    # import / worker startup cost
+    python -m benchmarks.bench_cache_format               # cache records vs. pickle / TEXT
+    python -m benchmarks.bench_markdown                   # markdown backend parse throughput
+    python -m benchmarks.golden_markdown --show 3         # backend HTML vs. golden pages
+"""
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache Record Format Benchmark
+
+Compares the cache record format of pdf_cache.py with the formats it
+replaced, on the real android/web docs:
+
+- per-file caches (legacy docs_to_pdf converters):
+  pickled {'hash', 'html'} dicts vs. record files
+- render cache database (generate_pdf.py):
+  plain TEXT rows vs. record BLOBs
+
+For each format it reports the bytes on disk, the time to write every
+page and the time to load every page back (best of --repeat runs), with
+records both as stored by default (uncompressed) and zlib-compressed
+(RECORD_COMPRESS_LEVEL 6) for comparison. The run fails if default
+records take more than cache_format.max_size_ratio of the bytes, or more
+than cache_format.max_load_ratio of the load time, of the format they
+replaced (see benchmarks/thresholds.json).
+
+Results are written as JSON to output/benchmarks/.
+
+Why records are stored uncompressed (RECORD_COMPRESS_LEVEL 0), measured
+on the 180 pages (3.3 MB of HTML) of both books, Python 3.11, Linux x86-64:
+
+    per-file caches      bytes     write     load (best of 5)
+      pickle           3.34 MB    10.7 ms    9.5 ms
+      record           3.34 MB    21.5 ms    7.9 ms
+      record-zlib      1.08 MB   129.6 ms   25.8 ms
+    render cache database
+      TEXT rows        3.54 MB     6.4 ms    9.4 ms
+      record           3.54 MB    10.4 ms    9.9 ms
+      record-zlib      1.28 MB   113.1 ms   27.5 ms
+
+zlib inflates at about 130 MB/s on that machine, so compressed records
+load ~3x slower than what they replaced; uncompressed records match
+pickle and TEXT while keeping the digest/version header and never
+unpickling anything.
+
+Usage:
+    python -m benchmarks.bench_cache_format
+    python -m benchmarks.bench_cache_format --repeat 10
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import pickle
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import mistune
+
+from pdf_cache import RECORD_COMPRESS_LEVEL, RenderCache, encode_record, read_record_file, write_record_file
+
+BENCH_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output", "benchmarks")
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+# Compressed records are measured at this level next to the default ones
+ZLIB_LEVEL = 6
+RECORD_VARIANTS = (('record', RECORD_COMPRESS_LEVEL), ('record-zlib', ZLIB_LEVEL))
+DOCS_DIRS = [os.path.join(PROJECT_ROOT, "android_reversing", "docs"),
+             os.path.join(PROJECT_ROOT, "web_reversing", "docs")]
+
+
+def render_corpus():
+    """Render every markdown page of the real docs, returns [(name, digest, html)]"""
+    pages = []
+    for docs_dir in DOCS_DIRS:
+        for path in sorted(glob.glob(os.path.join(docs_dir, "**", "*.md"), recursive=True)):
+            with open(path, 'rb') as f:
+                raw = f.read()
+            name = hashlib.md5(os.path.relpath(path, PROJECT_ROOT).encode('utf-8')).hexdigest()
+            pages.append((name, hashlib.md5(raw).hexdigest(), mistune.html(raw.decode('utf-8'))))
+    return pages
+
+
+def best_of(repeat, fn):
+    """Best wall time of fn() over repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def bench_files(pages, work_dir, repeat):
+    """Pickle files vs. record files, one file per page"""
+    pickle_dir = os.path.join(work_dir, "pickle")
+    os.makedirs(pickle_dir)
+
+    def write_pickles():
+        for name, digest, html in pages:
+            with open(os.path.join(pickle_dir, f"{name}.pkl"), 'wb') as f:
+                pickle.dump({'hash': digest, 'html': html}, f)
+
+    def load_pickles():
+        for name, digest, _ in pages:
+            with open(os.path.join(pickle_dir, f"{name}.pkl"), 'rb') as f:
+                data = pickle.load(f)
+            assert data['hash'] == digest
+
+    results = {'pickle': {'write_seconds': best_of(repeat, write_pickles),
+                          'load_seconds': best_of(repeat, load_pickles),
+                          'bytes': directory_bytes(pickle_dir)}}
+    for label, level in RECORD_VARIANTS:
+        record_dir = os.path.join(work_dir, label)
+        os.makedirs(record_dir)
+
+        def write_records():
+            for name, digest, html in pages:
+                write_record_file(os.path.join(record_dir, f"{name}.rec"), html, digest=digest,
+                                  compress_level=level)
+
+        def load_records():
+            for name, digest, _ in pages:
+                assert read_record_file(os.path.join(record_dir, f"{name}.rec"), digest=digest) is not None
+
+        results[label] = {'write_seconds': best_of(repeat, write_records),
+                          'load_seconds': best_of(repeat, load_records),
+                          'bytes': directory_bytes(record_dir)}
+    return results
+
+
+def bench_database(pages, work_dir, repeat):
+    """TEXT rows vs. record BLOBs in the render cache database"""
+    results = {}
+    levels = dict(RECORD_VARIANTS)
+    for label in ('text',) + tuple(levels):
+        cache_dir = os.path.join(work_dir, f"db_{label}")
+        cache = RenderCache(cache_dir, compress_level=levels.get(label, 0))
+        keys = [digest + name for name, digest, _ in pages]
+
+        def write():
+            if label in levels:
+                cache.put_many((key, name, html, []) for key, (name, _, html) in zip(keys, pages))
+            else:
+                # Rows as written before cache records existed
+                with cache.conn:
+                    cache.conn.executemany(
+                        "INSERT OR REPLACE INTO entries (key, path, html, created, last_used, size) "
+                        "VALUES (?, ?, ?, 0, 0, ?)",
+                        [(key, name, html, len(html)) for key, (name, _, html) in zip(keys, pages)])
+
+        def load():
+            for key in keys:
+                assert cache.get(key) is not None
+
+        write_seconds = best_of(repeat, write)
+        cache.vacuum()
+        results[label] = {'write_seconds': write_seconds,
+                          'load_seconds': best_of(repeat, load),
+                          'bytes': os.path.getsize(cache.db_path)}
+        cache.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cache record format on the real docs')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per measurement, the best one is kept (default: 5)')
+    args = parser.parse_args()
+
+    pages = render_corpus()
+    html_bytes = sum(len(html.encode('utf-8')) for _, _, html in pages)
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pages': len(pages),
+        'html_bytes': html_bytes,
+        'encode_seconds': best_of(args.repeat, lambda: [encode_record(html) for _, _, html in pages]),
+        'compress_level': RECORD_COMPRESS_LEVEL,
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="bench_cache_format_")
+    try:
+        results['files'] = bench_files(pages, work_dir, args.repeat)
+        results['database'] = bench_database(pages, work_dir, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n  {len(pages)} pages, {html_bytes / 1024 / 1024:.2f} MB of HTML, "
+          f"encoded in {results['encode_seconds'] * 1000:.1f} ms")
+    for group, label in (('files', 'per-file cache'), ('database', 'render cache database')):
+        print(f"  {label}:")
+        for name, row in results[group].items():
+            print(f"    {name:<12} {row['bytes'] / 1024 / 1024:>8.2f} MB   "
+                  f"write {row['write_seconds'] * 1000:>8.1f} ms   load {row['load_seconds'] * 1000:>8.1f} ms")
+
+    os.makedirs(BENCH_OUTPUT_DIR, exist_ok=True)
+    result_path = os.path.join(BENCH_OUTPUT_DIR, f"cache-format-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n  Results: {result_path}")
+
+    with open(THRESHOLDS_FILE, 'r', encoding='utf-8') as f:
+        thresholds = json.load(f).get('cache_format', {})
+    max_size_ratio = thresholds.get('max_size_ratio', 1.0)
+    max_load_ratio = thresholds.get('max_load_ratio', 1.0)
+    violations = []
+    for group, old in (('files', 'pickle'), ('database', 'text')):
+        record, replaced = results[group]['record'], results[group][old]
+        ratio = record['bytes'] / replaced['bytes']
+        if ratio > max_size_ratio:
+            violations.append(f"{group}: records are {ratio:.2f}x the size of {old} (max {max_size_ratio}x)")
+        ratio = record['load_seconds'] / replaced['load_seconds']
+        if ratio > max_load_ratio:
+            violations.append(f"{group}: records load {ratio:.2f}x slower than {old} (max {max_load_ratio}x)")
+    if violations:
+        print("\n  Threshold violations:")
+        for violation in violations:
+            print(f"    - {violation}")
+        return 1
+    print("\n  All thresholds met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
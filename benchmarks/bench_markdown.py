@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown Backend Throughput Benchmark
+
+Parses every markdown page of the real android/web docs with each
+backend of pdf_markdown.py that is installed and reports the parse
+throughput in MB/s of markdown source (best of --repeat runs), next to
+the size of the HTML each backend produces.
+
+Only the parser is timed: recipe numbering, link conversion and
+highlighting are the same for every backend. Whether a backend renders
+the books the same way is checked by benchmarks/golden_markdown.py.
+
+Results are written as JSON to output/benchmarks/.
+
+Usage:
+    python -m benchmarks.bench_markdown
+    python -m benchmarks.bench_markdown --backends mistune,markdown-it --repeat 10
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import platform
+import argparse
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from pdf_markdown import BACKENDS, get_backend
+
+BENCH_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output", "benchmarks")
+DOCS_DIRS = [os.path.join(PROJECT_ROOT, "android_reversing", "docs"),
+             os.path.join(PROJECT_ROOT, "web_reversing", "docs")]
+
+
+def load_corpus():
+    """Return the text of every markdown page of the real docs"""
+    pages = []
+    for docs_dir in DOCS_DIRS:
+        for path in sorted(glob.glob(os.path.join(docs_dir, "**", "*.md"), recursive=True)):
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+    return pages
+
+
+def bench_backend(backend, pages, repeat):
+    """Best time to parse every page, and the HTML bytes produced"""
+    # The first call imports the parser, keep that out of the timings
+    backend.render('')
+    best, html_bytes = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = [backend.render(page) for page in pages]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        html_bytes = sum(len(page.encode('utf-8')) for page in html)
+    return best, html_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark markdown parse throughput on the real docs')
+    parser.add_argument('--backends', type=str, default=','.join(BACKENDS),
+                        help=f'Comma separated backends (default: {",".join(BACKENDS)})')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per backend, the best one is kept (default: 5)')
+    args = parser.parse_args()
+
+    pages = load_corpus()
+    source_bytes = sum(len(page.encode('utf-8')) for page in pages)
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pages': len(pages),
+        'source_bytes': source_bytes,
+        'backends': {},
+    }
+
+    print(f"\n  {len(pages)} pages, {source_bytes / 1024 / 1024:.2f} MB of markdown")
+    print(f"  {'Backend':<14} {'Version':<10} {'Seconds':>9} {'MB/s':>8} {'HTML MB':>9}")
+    for name in [name.strip() for name in args.backends.split(',') if name.strip()]:
+        backend = get_backend(name)
+        if not backend.available():
+            print(f"  {name:<14} not installed (pip install {backend.distribution})")
+            results['backends'][name] = None
+            continue
+        seconds, html_bytes = bench_backend(backend, pages, args.repeat)
+        throughput = source_bytes / 1024 / 1024 / seconds
+        results['backends'][name] = {'version': backend.version(), 'seconds': seconds,
+                                     'mb_per_second': throughput, 'html_bytes': html_bytes}
+        print(f"  {name:<14} {backend.version():<10} {seconds:>9.3f} {throughput:>8.2f} "
+              f"{html_bytes / 1024 / 1024:>9.2f}")
+
+    os.makedirs(BENCH_OUTPUT_DIR, exist_ok=True)
+    result_path = os.path.join(BENCH_OUTPUT_DIR, f"markdown-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n  Results: {result_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Generator Benchmark Suite
+
+Times the hot paths of generate_pdf.py on synthetic cookbooks of several
+sizes, cold and warm cache:
+
+- process_single_markdown_file   (serial, cold vs warm render cache)
+- markdown stage                 (worker pool, 1 worker vs N workers)
+- convert_internal_links         (all pages)
+- create_table_of_contents
+- UnifiedPDFConverter.generate_pdf (cold vs warm; skipped without WeasyPrint)
+
+Results are written as JSON to output/benchmarks/. Each run is checked
+against benchmarks/thresholds.json: the measured cache and parallel
+speedups must reach the minimums (the module docstring of generate_pdf.py
+claims 10-20x and 2-4x), and with --baseline every timing must stay within
+the allowed regression ratio of the baseline run.
+
+Usage:
+    python -m benchmarks.bench_pdf                          # default sizes
+    python -m benchmarks.bench_pdf --sizes 50,200 -w 8
+    python -m benchmarks.bench_pdf --save-baseline          # record baseline
+    python -m benchmarks.bench_pdf --baseline output/benchmarks/baseline.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from datetime import datetime
+from contextlib import redirect_stdout
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.corpus import CorpusGenerator, CorpusSpec  # noqa: E402
+
+BENCH_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output", "benchmarks")
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+
+
+def timed(fn, repeat=1):
+    """Run fn repeat times and return (best seconds, last result)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def quiet(fn):
+    """Call fn with the converter's progress output suppressed"""
+    def wrapper(*args, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def make_converter(gp, config, output_dir, **kwargs):
+    converter = gp.UnifiedPDFConverter("bench", project_config=config, output_dir=output_dir, **kwargs)
+    quiet(converter.load_navigation_structure)()
+    quiet(converter.build_path_anchor_mapping)()
+    return converter
+
+
+def bench_size(gp, size, workers, work_dir, with_pdf):
+    """Run every benchmark on one corpus size"""
+    corpus_dir = os.path.join(work_dir, f"corpus_{size}")
+    config = CorpusGenerator(CorpusSpec(files=size)).generate(corpus_dir)
+    metrics = {}
+
+    # process_single_markdown_file, serial, cold then warm cache
+    output_dir = os.path.join(work_dir, f"out_{size}_serial")
+    converter = make_converter(gp, config, output_dir, workers=1)
+    tasks = converter.collect_files_to_process()
+    gp.init_markdown_worker({converter.project_key: converter.worker_state()})
+
+    def run_serial():
+        results = [gp.process_single_markdown_file(task) for task in tasks]
+        # Cache hits come back as (key, None, [], [], diagnostics)
+        rendered = [r for r in results if r[3] and r[3][1] is not None]
+        converter.render_cache.put_many((r[3][0], r[2], r[3][1], r[3][4]) for r in rendered)
+        converter.render_cache.put_highlights(e for r in rendered for e in r[3][2])
+        return results
+
+    metrics['process_single_markdown_file_cold'], _ = timed(quiet(run_serial))
+    metrics['process_single_markdown_file_warm'], _ = timed(quiet(run_serial), repeat=3)
+
+    # Markdown stage through the worker pool, cache disabled
+    stage_times = {}
+    for worker_count in sorted({1, workers}):
+        pool_converter = make_converter(gp, config, os.path.join(work_dir, f"out_{size}_w{worker_count}"),
+                                        workers=worker_count, use_cache=False)
+        stage_times[worker_count], _ = timed(quiet(pool_converter.render_markdown_files))
+    metrics['markdown_stage_1_worker'] = stage_times[1]
+    metrics[f'markdown_stage_{workers}_workers'] = stage_times[workers]
+
+    # Link rewriting and TOC on their own
+    contents = []
+    for _, path, _ in tasks:
+        with open(os.path.join(converter.docs_dir, path), 'r', encoding='utf-8') as f:
+            contents.append((f.read(), path))
+    metrics['convert_internal_links'], _ = timed(
+        lambda: [gp.convert_internal_links(c, converter.link_index, path) for c, path in contents], repeat=3)
+    metrics['create_table_of_contents'], _ = timed(converter.create_table_of_contents, repeat=3)
+
+    speedups = {
+        'cache': metrics['process_single_markdown_file_cold'] / max(metrics['process_single_markdown_file_warm'], 1e-9),
+        'parallel': stage_times[1] / max(stage_times[workers], 1e-9),
+    }
+
+    if with_pdf:
+        pdf_dir = os.path.join(work_dir, f"out_{size}_pdf")
+        for label in ('cold', 'warm'):
+            pdf_converter = make_converter(gp, config, pdf_dir, workers=workers)
+            metrics[f'generate_pdf_{label}'], _ = timed(quiet(pdf_converter.generate_pdf))
+        speedups['pdf_cache'] = metrics['generate_pdf_cold'] / max(metrics['generate_pdf_warm'], 1e-9)
+
+    return {'size': size, 'metrics': metrics, 'speedups': speedups}
+
+
+def check_thresholds(results, thresholds, baseline=None):
+    """Return a list of human readable threshold violations"""
+    failures = []
+    for run in results['runs']:
+        size = run['size']
+        for name, minimum in thresholds.get('min_speedup', {}).items():
+            value = run['speedups'].get(name)
+            if value is not None and value < minimum:
+                failures.append(f"size {size}: {name} speedup {value:.2f}x < {minimum}x")
+
+    if baseline:
+        limits = thresholds.get('max_regression', {})
+        baseline_runs = {run['size']: run for run in baseline['runs']}
+        for run in results['runs']:
+            base = baseline_runs.get(run['size'])
+            if not base:
+                continue
+            for name, value in run['metrics'].items():
+                base_value = base['metrics'].get(name)
+                if not base_value:
+                    continue
+                limit = limits.get(name, limits.get('default', 1.25))
+                if value > base_value * limit:
+                    failures.append(f"size {run['size']}: {name} {value:.3f}s > "
+                                    f"{limit}x baseline {base_value:.3f}s")
+    return failures
+
+
+def print_run(run):
+    print(f"\n  Corpus size: {run['size']} files")
+    for name, value in run['metrics'].items():
+        print(f"    {name:<40} {value * 1000:>10.1f} ms")
+    for name, value in run['speedups'].items():
+        print(f"    {name + ' speedup':<40} {value:>10.2f} x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PDF generator on synthetic corpora')
+    parser.add_argument('--sizes', type=str, default='50,200,500',
+                        help='Comma separated corpus sizes (default: 50,200,500)')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count(),
+                        help='Worker count for the parallel measurements')
+    parser.add_argument('--no-pdf', action='store_true',
+                        help='Skip the full generate_pdf measurements')
+    parser.add_argument('--baseline', type=str, help='Baseline results JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Also write the results to output/benchmarks/baseline.json')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated corpora')
+    args = parser.parse_args()
+
+    try:
+        import generate_pdf as gp
+    except ImportError as e:
+        print(f"  Missing dependency: {e}")
+        print("  Run: pip install mistune weasyprint pillow pyyaml")
+        return 1
+
+    with_pdf = not args.no_pdf
+    if with_pdf:
+        try:
+            import weasyprint  # noqa: F401
+        except (ImportError, OSError) as e:
+            print(f"  WeasyPrint unavailable ({e}), skipping generate_pdf benchmarks")
+            with_pdf = False
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    work_dir = tempfile.mkdtemp(prefix="pdf_bench_")
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'runs': [],
+    }
+
+    try:
+        for size in sizes:
+            run = bench_size(gp, size, args.workers, work_dir, with_pdf)
+            print_run(run)
+            results['runs'].append(run)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(BENCH_OUTPUT_DIR, exist_ok=True)
+    result_path = os.path.join(BENCH_OUTPUT_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n  Results: {result_path}")
+    if args.save_baseline:
+        shutil.copyfile(result_path, os.path.join(BENCH_OUTPUT_DIR, "baseline.json"))
+
+    with open(THRESHOLDS_FILE, 'r', encoding='utf-8') as f:
+        thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    failures = check_thresholds(results, thresholds, baseline)
+    if failures:
+        print("\n  Threshold violations:")
+        for failure in failures:
+            print(f"    - {failure}")
+        return 1
+    print("\n  All thresholds met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
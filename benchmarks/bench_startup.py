@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF Generator Startup Benchmark
+
+Measures what it costs to get generate_pdf.py running, in fresh
+interpreters so nothing is already imported:
+
+- import generate_pdf         (main process; also what a spawned worker pays)
+- generate_pdf.py --help      (whole CLI process)
+- worker startup              (pool of N workers, fork and spawn start methods:
+                               time until every worker answered, plus the
+                               import time measured inside each worker)
+
+It also lists the heavy modules (WeasyPrint, pypdf, Pillow, ...) that
+importing generate_pdf pulls in and the slowest imports from -X importtime.
+The run fails if a module listed under startup.forbidden_modules in
+benchmarks/thresholds.json is loaded by the import: markdown workers and
+the CLI must not pay for renderers they do not use.
+
+Results are written as JSON to output/benchmarks/.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup -w 8 --repeat 10
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+BENCH_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output", "benchmarks")
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+
+HEAVY_MODULES = ('weasyprint', 'pydyf', 'cssselect2', 'tinycss2', 'fontTools',
+                 'pypdf', 'pikepdf', 'PIL', 'watchdog')
+
+IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import generate_pdf
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{'seconds': elapsed, 'heavy_modules': heavy}}))
+"""
+
+
+def run_python(args, env=None):
+    """Run the current interpreter in PROJECT_ROOT and return (seconds, completed process)"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable] + args, cwd=PROJECT_ROOT, env=env,
+                               capture_output=True, text=True)
+    return time.perf_counter() - start, completed
+
+
+def bench_import(repeat):
+    """Best import time of generate_pdf in a fresh interpreter, and what it loaded"""
+    best, heavy = None, []
+    for _ in range(repeat):
+        _, completed = run_python(['-c', IMPORT_PROBE.format(heavy=HEAVY_MODULES)])
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        best = probe['seconds'] if best is None else min(best, probe['seconds'])
+        heavy = probe['heavy_modules']
+    return best, heavy
+
+
+def bench_help(repeat):
+    """Best wall time of a whole `generate_pdf.py --help` process"""
+    best = None
+    for _ in range(repeat):
+        elapsed, _ = run_python(['generate_pdf.py', '--help'])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def slowest_imports(limit=8):
+    """Top-level packages with the largest cumulative time in -X importtime"""
+    _, completed = run_python(['-X', 'importtime', '-c', 'import generate_pdf'])
+    packages = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        top = name.split('.')[0]
+        packages[top] = max(packages.get(top, 0), int(cumulative))
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [(name, microseconds / 1e6) for name, microseconds in ranked]
+
+
+def worker_probe(_):
+    """Pool task: time importing generate_pdf inside a worker process"""
+    start = time.perf_counter()
+    import generate_pdf  # noqa: F401
+    return {
+        'pid': os.getpid(),
+        'import_seconds': time.perf_counter() - start,
+        'heavy_modules': sorted(name for name in HEAVY_MODULES if name in sys.modules),
+    }
+
+
+def bench_workers(workers, start_method):
+    """Start a pool, wait until every worker has answered and collect their probes"""
+    context = multiprocessing.get_context(start_method)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        probes = {}
+        # Keep submitting until every worker process has run a probe
+        while len(probes) < workers:
+            for probe in executor.map(worker_probe, range(workers)):
+                probes.setdefault(probe['pid'], probe)
+            if time.perf_counter() - start > 60:
+                break
+        ready = time.perf_counter() - start
+    import_times = [probe['import_seconds'] for probe in probes.values()]
+    return {
+        'start_method': start_method,
+        'workers': len(probes),
+        'pool_ready_seconds': ready,
+        'worker_import_seconds_mean': sum(import_times) / len(import_times),
+        'worker_import_seconds_max': max(import_times),
+        'heavy_modules': sorted({name for probe in probes.values() for name in probe['heavy_modules']}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark generate_pdf.py startup and worker import cost')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count(),
+                        help='Pool size for the worker startup measurement')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Fresh interpreters per measurement, the best run is kept (default: 5)')
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+    try:
+        results['import_seconds'], results['heavy_modules'] = bench_import(args.repeat)
+    except RuntimeError as e:
+        print(f"  import generate_pdf failed: {e}")
+        return 1
+    results['help_seconds'] = bench_help(args.repeat)
+    results['slowest_imports'] = slowest_imports()
+    results['worker_pools'] = [bench_workers(args.workers, method)
+                               for method in ('fork', 'spawn')
+                               if method in multiprocessing.get_all_start_methods()]
+
+    print(f"\n  import generate_pdf                      {results['import_seconds'] * 1000:>10.1f} ms")
+    print(f"  generate_pdf.py --help                   {results['help_seconds'] * 1000:>10.1f} ms")
+    print(f"  heavy modules after import               {', '.join(results['heavy_modules']) or 'none'}")
+    print("  slowest imports (cumulative):")
+    for name, seconds in results['slowest_imports']:
+        print(f"    {name:<38} {seconds * 1000:>10.1f} ms")
+    for pool in results['worker_pools']:
+        print(f"  {pool['start_method']} pool, {pool['workers']} workers:")
+        print(f"    {'ready':<38} {pool['pool_ready_seconds'] * 1000:>10.1f} ms")
+        print(f"    {'import per worker (mean)':<38} {pool['worker_import_seconds_mean'] * 1000:>10.1f} ms")
+        print(f"    {'heavy modules in workers':<38} {', '.join(pool['heavy_modules']) or 'none'}")
+
+    os.makedirs(BENCH_OUTPUT_DIR, exist_ok=True)
+    result_path = os.path.join(BENCH_OUTPUT_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n  Results: {result_path}")
+
+    with open(THRESHOLDS_FILE, 'r', encoding='utf-8') as f:
+        forbidden = set(json.load(f).get('startup', {}).get('forbidden_modules', []))
+    loaded = set(results['heavy_modules'])
+    for pool in results['worker_pools']:
+        loaded.update(pool['heavy_modules'])
+    violations = sorted(loaded & forbidden)
+    if violations:
+        print(f"\n  Threshold violations:\n    - importing generate_pdf loads {', '.join(violations)}")
+        return 1
+    print("\n  All thresholds met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic Cookbook Corpus Generator
+
+Generates mkdocs projects shaped like android_reversing/docs: numbered
+top-level sections with nested sub-categories, recipe-numbered pages, CJK
+prose, fenced code blocks, wide tables and relative cross-links between
+pages. Output is deterministic for a given seed, so benchmark runs on the
+same parameters are comparable.
+
+Usage:
+    python -m benchmarks.corpus /tmp/corpus --files 200
+    python -m benchmarks.corpus /tmp/corpus --files 500 --code-blocks 8 --table-columns 12
+"""
+
+import os
+import random
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+import yaml
+
+
+SECTIONS = [
+    ("00-Quick-Start", "快速入门", "Q", []),
+    ("01-Recipes", "实战配方", "R", ["Analysis", "Network", "Unpacking", "Anti-Detection", "Automation"]),
+    ("02-Tools", "工具指南", "T", ["Dynamic", "Static", "Cheatsheets"]),
+    ("03-Case-Studies", "案例分析", "C", []),
+    ("04-Reference", "参考资料", "F", ["Foundations", "Advanced", "Engineering"]),
+    ("05-Appendix", "附录", "X", []),
+]
+
+# Relative share of pages per top-level section, roughly matching the android cookbook
+SECTION_WEIGHTS = [3, 35, 10, 8, 30, 5]
+
+CJK_WORDS = [
+    "逆向", "分析", "加密", "算法", "协议", "调试", "内存", "函数", "符号", "混淆",
+    "签名", "校验", "注入", "拦截", "设备", "指纹", "证书", "网络", "数据", "流程",
+    "工具", "脚本", "模块", "进程", "线程", "虚拟机", "字节码", "反编译", "动态", "静态",
+]
+
+LATIN_WORDS = [
+    "frida", "hook", "native", "jni", "dex", "smali", "so", "ollvm", "unidbg", "xposed",
+    "tls", "ja3", "okhttp", "retrofit", "proxy", "sslpinning", "arm64", "elf", "plt", "got",
+]
+
+CODE_LANGUAGES = ["javascript", "python", "java", "c", "bash", "smali"]
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of a synthetic cookbook"""
+    files: int = 100
+    paragraphs: int = 12
+    code_blocks: int = 4
+    code_lines: int = 18
+    tables: int = 1
+    table_columns: int = 8
+    table_rows: int = 10
+    cross_links: int = 6
+    cjk_ratio: float = 0.7
+    seed: int = 42
+
+
+class CorpusGenerator:
+    """Writes a synthetic mkdocs project (docs/ + mkdocs.yml) to disk"""
+
+    def __init__(self, spec: CorpusSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+
+    def _words(self, count: int) -> str:
+        words = []
+        for _ in range(count):
+            if self.rng.random() < self.spec.cjk_ratio:
+                words.append(self.rng.choice(CJK_WORDS))
+            else:
+                words.append(f" {self.rng.choice(LATIN_WORDS)} ")
+        return "".join(words).strip()
+
+    def _code_block(self) -> str:
+        language = self.rng.choice(CODE_LANGUAGES)
+        lines = []
+        for i in range(self.spec.code_lines):
+            indent = "    " * self.rng.randint(0, 2)
+            name = self.rng.choice(LATIN_WORDS)
+            lines.append(f"{indent}{name}_{i} = call_{self.rng.choice(LATIN_WORDS)}({i}, \"{name}\")  // {self._words(2)}")
+        return f"```{language}\n" + "\n".join(lines) + "\n```"
+
+    def _table(self) -> str:
+        columns = self.spec.table_columns
+        header = "| " + " | ".join(f"{self._words(1)} {c}" for c in range(columns)) + " |"
+        divider = "|" + "---|" * columns
+        rows = ["| " + " | ".join(self._words(self.rng.randint(1, 4)) for _ in range(columns)) + " |"
+                for _ in range(self.spec.table_rows)]
+        return "\n".join([header, divider] + rows)
+
+    def _relative_link(self, source: str, target: str) -> str:
+        return os.path.relpath(target, os.path.dirname(source) or ".").replace(os.sep, "/")
+
+    def _page(self, path: str, title: str, all_paths: List[str]) -> str:
+        blocks = [f"# {title}", ""]
+        kinds = (["p"] * self.spec.paragraphs + ["code"] * self.spec.code_blocks
+                 + ["table"] * self.spec.tables + ["link"] * self.spec.cross_links)
+        self.rng.shuffle(kinds)
+        for index, kind in enumerate(kinds):
+            if index % 5 == 0:
+                blocks.append(f"## {self._words(3)} {index}")
+            if kind == "p":
+                blocks.append(self._words(self.rng.randint(20, 60)))
+            elif kind == "code":
+                blocks.append(self._code_block())
+            elif kind == "table":
+                blocks.append(self._table())
+            else:
+                target = self.rng.choice(all_paths)
+                link = self._relative_link(path, target)
+                if self.rng.random() < 0.3:
+                    link += f"#{self.rng.choice(LATIN_WORDS)}"
+                blocks.append(f"- 参见 [{self._words(2)}]({link}) 了解{self._words(3)}")
+            blocks.append("")
+        return "\n".join(blocks)
+
+    def _layout(self) -> List[Dict]:
+        """Distribute the requested number of pages over sections and sub-categories"""
+        total_weight = sum(SECTION_WEIGHTS)
+        counts = [max(1, self.spec.files * w // total_weight) for w in SECTION_WEIGHTS]
+        counts[1] += self.spec.files - sum(counts)
+
+        layout = []
+        for (directory, title, prefix, categories), count in zip(SECTIONS, counts):
+            pages = []
+            for i in range(max(count, 1)):
+                category = categories[i % len(categories)] if categories else None
+                folder = f"{directory}/{category}" if category else directory
+                pages.append({
+                    'path': f"{folder}/page_{i:04d}.md",
+                    'recipe': f"{prefix}{i + 1:02d}",
+                    'category': category,
+                })
+            layout.append({'title': title, 'pages': pages, 'categories': categories})
+        return layout
+
+    def generate(self, root: str) -> Dict:
+        """Write the corpus under root and return a generate_pdf project config"""
+        docs_dir = os.path.join(root, "docs")
+        layout = self._layout()
+        all_paths = [page['path'] for section in layout for page in section['pages']]
+
+        nav = [{"首页": "index.md"}]
+        recipe_numbers = {}
+        os.makedirs(docs_dir, exist_ok=True)
+        with open(os.path.join(docs_dir, "index.md"), 'w', encoding='utf-8') as f:
+            f.write("# Synthetic Cookbook\n\n" + self._words(40) + "\n")
+
+        for section in layout:
+            items = []
+            grouped = {}
+            for page in section['pages']:
+                title = f"{page['recipe']}: {self._words(3)}"
+                recipe_numbers[page['path']] = page['recipe']
+                file_path = os.path.join(docs_dir, page['path'])
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(self._page(page['path'], title, all_paths))
+                entry = {title: page['path']}
+                if page['category']:
+                    grouped.setdefault(page['category'], []).append(entry)
+                else:
+                    items.append(entry)
+            for category in section['categories']:
+                if category in grouped:
+                    items.append({category: grouped[category]})
+            nav.append({section['title']: items})
+
+        mkdocs_file = os.path.join(root, "mkdocs.yml")
+        with open(mkdocs_file, 'w', encoding='utf-8') as f:
+            yaml.safe_dump({"site_name": "Synthetic Cookbook", "nav": nav}, f,
+                           allow_unicode=True, sort_keys=False)
+
+        return {
+            "name": f"Synthetic Cookbook ({self.spec.files} files)",
+            "short_name": "Synthetic Cookbook",
+            "docs_dir": docs_dir,
+            "mkdocs_file": mkdocs_file,
+            "output_file": f"synthetic_{self.spec.files}.pdf",
+            "theme_color": "#4a90e2",
+            "icon": "",
+            "subtitle": "Benchmark corpus",
+            "created_date": "2025-01-01",
+            "topics": [f"spec: {asdict(self.spec)}"],
+            "recipe_numbers": recipe_numbers,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic mkdocs cookbook corpus')
+    parser.add_argument('root', help='Directory to write docs/ and mkdocs.yml into')
+    parser.add_argument('--files', type=int, default=CorpusSpec.files)
+    parser.add_argument('--code-blocks', type=int, default=CorpusSpec.code_blocks)
+    parser.add_argument('--table-columns', type=int, default=CorpusSpec.table_columns)
+    parser.add_argument('--cross-links', type=int, default=CorpusSpec.cross_links)
+    parser.add_argument('--cjk-ratio', type=float, default=CorpusSpec.cjk_ratio)
+    parser.add_argument('--seed', type=int, default=CorpusSpec.seed)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(files=args.files, code_blocks=args.code_blocks,
+                      table_columns=args.table_columns, cross_links=args.cross_links,
+                      cjk_ratio=args.cjk_ratio, seed=args.seed)
+    config = CorpusGenerator(spec).generate(args.root)
+    print(f"  Generated {spec.files} files in {config['docs_dir']}")
+
+
+if __name__ == "__main__":
+    main()
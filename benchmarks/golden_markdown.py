@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Golden HTML Diff for Markdown Backends
+
+Renders every page of the books through the markdown stage of
+generate_pdf.py (recipe numbers, links, highlighting, images) with each
+backend of pdf_markdown.py and diffs the HTML against golden pages
+rendered by the reference backend. A backend whose pages all match can
+replace the reference without visual regressions.
+
+Golden pages live in benchmarks/golden/<project>/, outside the build
+output, and are only written by the reference backend (mistune) when
+asked to with --update. They are local snapshots of the books and are not
+tracked. Take them before upgrading or switching the parser; comparing
+the reference backend itself then catches regressions of a parser
+upgrade.
+
+Pages are compared as what they render, block by block (paragraphs, code
+blocks, list items, table rows, ...): whitespace between tags is
+collapsed (except inside <pre>), attributes are sorted, equivalent tags
+(<s>/<del>, <b>/<strong>, <i>/<em>) are unified, URLs are compared
+unquoted, inline styles without spacing or trailing semicolons, and id
+attributes, which do not render, are ignored. --strict compares the
+markup as written.
+
+Results are written as JSON to output/benchmarks/.
+
+Usage:
+    python -m benchmarks.golden_markdown --update              # take the golden pages first
+    python -m benchmarks.golden_markdown                       # every installed backend
+    python -m benchmarks.golden_markdown markdown-it --show 3  # with diff excerpts
+"""
+
+import io
+import os
+import sys
+import json
+import difflib
+import argparse
+import platform
+import tempfile
+import shutil
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import unquote
+from contextlib import redirect_stdout
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from generate_pdf import PROJECTS, UnifiedPDFConverter
+from pdf_markdown import BACKENDS, DEFAULT_BACKEND, get_backend
+
+BENCH_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output", "benchmarks")
+GOLDEN_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "golden")
+GOLDEN_META = "golden.json"
+
+EQUIVALENT_TAGS = {'s': 'del', 'strike': 'del', 'b': 'strong', 'i': 'em'}
+IGNORED_ATTRIBUTES = {'id'}
+# Percent-encoded and plain URLs point at the same target
+URL_ATTRIBUTES = {'href', 'src'}
+VOID_TAGS = {'br', 'hr', 'img', 'input', 'meta', 'link', 'col', 'area', 'base', 'source', 'wbr'}
+# Closing one of these ends a block, the unit pages are diffed in
+BLOCK_TAGS = {'p', 'pre', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'thead', 'tbody', 'table',
+              'ul', 'ol', 'blockquote', 'div', 'dt', 'dd', 'dl'}
+
+
+class VisualTokens(HTMLParser):
+    """Flatten an HTML fragment into the tokens that decide how it renders"""
+
+    def __init__(self, strict=False):
+        super().__init__(convert_charrefs=True)
+        self.strict = strict
+        self.tokens = []
+        self.pre_depth = 0
+
+    def tag_name(self, tag):
+        return tag if self.strict else EQUIVALENT_TAGS.get(tag, tag)
+
+    def attribute_value(self, name, value):
+        value = value or ''
+        if self.strict:
+            return value
+        if name in URL_ATTRIBUTES:
+            return unquote(value)
+        if name == 'style':
+            # "text-align:left" and "text-align: left;" render the same
+            return ';'.join(''.join(rule.split()) for rule in value.split(';') if rule.strip())
+        return value
+
+    def handle_starttag(self, tag, attrs):
+        tag = self.tag_name(tag)
+        attrs = sorted((name, self.attribute_value(name, value))
+                       for name, value in attrs if self.strict or name not in IGNORED_ATTRIBUTES)
+        self.tokens.append(f"<{tag}" + ''.join(f' {name}="{value}"' for name, value in attrs) + ">")
+        if tag == 'pre':
+            self.pre_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> and <br> render the same
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        tag = self.tag_name(tag)
+        if tag in VOID_TAGS:
+            return
+        self.tokens.append(f"</{tag}>")
+        if tag == 'pre' and self.pre_depth:
+            self.pre_depth -= 1
+
+    def handle_data(self, data):
+        if self.pre_depth:
+            self.tokens.extend(data.splitlines(keepends=True))
+            return
+        text = ' '.join(data.split())
+        if text:
+            self.tokens.append(text)
+
+
+def visual_blocks(html, strict=False):
+    """Return the rendered blocks (paragraphs, code blocks, list items, ...) of an HTML fragment"""
+    parser = VisualTokens(strict)
+    parser.feed(html)
+    parser.close()
+    blocks, current = [], []
+    for token in parser.tokens:
+        current.append(token)
+        if token.startswith('</') and token[2:-1] in BLOCK_TAGS:
+            blocks.append(' '.join(current))
+            current = []
+    if current:
+        blocks.append(' '.join(current))
+    return blocks
+
+
+def compare_page(golden_html, html, strict=False, context=1):
+    """Return (changed block count, diff excerpt lines) of one page"""
+    expected, actual = visual_blocks(golden_html, strict), visual_blocks(html, strict)
+    if expected == actual:
+        return 0, []
+    matcher = difflib.SequenceMatcher(None, expected, actual, autojunk=False)
+    changed = sum(max(i2 - i1, j2 - j1) for op, i1, i2, j1, j2 in matcher.get_opcodes() if op != 'equal')
+    excerpt = [line if len(line) <= 160 else line[:157] + '...' for line in
+               difflib.unified_diff(expected, actual, 'golden', 'backend', n=context, lineterm='')]
+    return changed, excerpt
+
+
+def render_pages(project_key, backend_name, workers):
+    """Render every nav page of a project with one backend, returns {path: html}"""
+    work_dir = tempfile.mkdtemp(prefix="golden_markdown_")
+    try:
+        with redirect_stdout(io.StringIO()):
+            converter = UnifiedPDFConverter(project_key, validate=False, use_cache=False, workers=workers,
+                                            output_dir=work_dir, markdown_backend=backend_name)
+            converter.prepare()
+            results = converter.render_markdown_files()
+        return {path: html for html, path in results.values()}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def golden_path(project_key, path):
+    return os.path.join(GOLDEN_DIR, project_key, *path.split('/')) + '.html'
+
+
+def write_golden(project_key, backend_name, pages):
+    """Replace the golden pages of a project"""
+    project_dir = os.path.join(GOLDEN_DIR, project_key)
+    shutil.rmtree(project_dir, ignore_errors=True)
+    for path, html in pages.items():
+        target = golden_path(project_key, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(html)
+    backend = get_backend(backend_name)
+    with open(os.path.join(project_dir, GOLDEN_META), 'w', encoding='utf-8') as f:
+        json.dump({'backend': backend.name, 'version': backend.version(), 'pages': sorted(pages),
+                   'created': datetime.now().isoformat(timespec='seconds')}, f, indent=2)
+
+
+def load_golden(project_key):
+    """Return (meta, {path: html}) of a project's golden pages, or (None, {})"""
+    meta_path = os.path.join(GOLDEN_DIR, project_key, GOLDEN_META)
+    if not os.path.exists(meta_path):
+        return None, {}
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    pages = {}
+    for path in meta['pages']:
+        with open(golden_path(project_key, path), 'r', encoding='utf-8') as f:
+            pages[path] = f.read()
+    return meta, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff the HTML of markdown backends against golden pages')
+    parser.add_argument('backends', nargs='*',
+                        help=f'Backends to check (default: every installed one of {", ".join(BACKENDS)})')
+    parser.add_argument('--reference', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f'Backend that renders the golden pages (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--projects', type=str, default=','.join(PROJECTS),
+                        help='Comma separated projects (default: all)')
+    parser.add_argument('--update', action='store_true',
+                        help='Take (or re-take) the golden pages with the reference backend first')
+    parser.add_argument('--show', type=int, default=0, metavar='N',
+                        help='Print diff excerpts of the N most changed pages per backend')
+    parser.add_argument('--strict', action='store_true',
+                        help='Also compare ids and tags that render the same')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count(),
+                        help='Markdown worker processes')
+    args = parser.parse_args()
+
+    projects = [name.strip() for name in args.projects.split(',') if name.strip()]
+    backends = args.backends or [name for name in BACKENDS if get_backend(name).available()]
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'strict': args.strict,
+        'golden': {},
+        'backends': {},
+    }
+
+    golden = {}
+    for project_key in projects:
+        meta, pages = load_golden(project_key)
+        if meta is None and not args.update:
+            print(f"  No golden pages of {project_key} in {GOLDEN_DIR}, take them with --update")
+            return 1
+        if args.update:
+            print(f"  Rendering golden pages of {project_key} with {args.reference}...")
+            write_golden(project_key, args.reference, render_pages(project_key, args.reference, args.workers))
+            meta, pages = load_golden(project_key)
+        golden[project_key] = pages
+        results['golden'][project_key] = meta
+        print(f"  Golden {project_key}: {len(pages)} pages by {meta['backend']} {meta['version']} "
+              f"({meta['created']})")
+
+    switchable = []
+    for name in backends:
+        backend = get_backend(name)
+        if not backend.available():
+            print(f"\n  {name}: not installed (pip install {backend.distribution})")
+            results['backends'][name] = None
+            continue
+
+        page_results = []
+        for project_key in projects:
+            pages = render_pages(project_key, name, args.workers)
+            for path in sorted(set(golden[project_key]) | set(pages)):
+                if path not in pages or path not in golden[project_key]:
+                    page_results.append((f"{project_key}/{path}", None, ['page missing']))
+                    continue
+                changed, excerpt = compare_page(golden[project_key][path], pages[path], args.strict)
+                page_results.append((f"{project_key}/{path}", changed, excerpt))
+
+        differing = sorted((row for row in page_results if row[1] != 0),
+                           key=lambda row: -1 if row[1] is None else row[1], reverse=True)
+        results['backends'][name] = {
+            'version': backend.version(),
+            'pages': len(page_results),
+            'identical': len(page_results) - len(differing),
+            'changed_blocks': sum(row[1] or 0 for row in differing),
+            'differing_pages': {page: changed for page, changed, _ in differing},
+        }
+        verdict = "no visual differences" if not differing else f"{len(differing)} pages differ"
+        print(f"\n  {name} {backend.version()}: {len(page_results) - len(differing)}/{len(page_results)} "
+              f"pages identical, {verdict}")
+        for page, changed, excerpt in differing[:max(args.show, 5)]:
+            print(f"    {page:<60} {'missing' if changed is None else f'{changed} blocks'}")
+        for page, _, excerpt in differing[:args.show]:
+            print(f"\n    --- {page}")
+            for line in excerpt[:40]:
+                print(f"    {line}")
+            if len(excerpt) > 40:
+                print(f"    ... {len(excerpt) - 40} more diff lines")
+        if not differing:
+            switchable.append(name)
+
+    os.makedirs(BENCH_OUTPUT_DIR, exist_ok=True)
+    result_path = os.path.join(BENCH_OUTPUT_DIR, f"golden-markdown-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n  Results: {result_path}")
+    print(f"  Render like the golden pages: {', '.join(switchable) or 'none'}")
+
+    checked = [name for name in backends if results['backends'].get(name)]
+    return 0 if checked and all(name in switchable for name in checked) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
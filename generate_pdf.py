@@ -23,22 +23,56 @@ Usage:
     python generate_pdf.py android -w 8         # Use 8 worker processes
     python generate_pdf.py web --no-cache       # Disable cache
     python generate_pdf.py all --fix-files      # Auto-fix format issues
+    python generate_pdf.py android --incremental  # Only re-layout changed sections
+    python generate_pdf.py all --parallel-render  # Lay out chapters on all cores
+    python generate_pdf.py android --profile out.json  # Per-stage timings + Chrome trace
+    python generate_pdf.py android --watch --incremental  # Rebuild on save
+    python generate_pdf.py web --format html    # Fast HTML preview, no WeasyPrint
+    python generate_pdf.py all --optimize       # Smaller, linearized PDFs + size report
+    python generate_pdf.py web --sections 3     # Partial build of one nav section
+    python generate_pdf.py android --paths 01-Recipes/Network/  # Partial build of some pages
+    python generate_pdf.py web --parts 1-2      # Partial build of the first two parts (see --list)
+    python generate_pdf.py web --translate      # Code comments translated to English
+    python generate_pdf.py web --markdown-backend markdown-it  # Another markdown parser
+    python generate_pdf.py android --plan       # Dry run: what would re-render, how long
+    python generate_pdf.py android --max-memory 2G  # Lay out in chapter batches to stay under 2 GB
+    python generate_pdf.py stats                # Build history trends, flags regressions
+    python generate_pdf.py cache prune          # Bound the caches (also: stats, clear, verify)
 """
 
 import os
 import re
 import sys
+import time
 import yaml
-import hashlib
-import pickle
+import fnmatch
+import shutil
+import sqlite3
 import argparse
+import importlib.util
 from datetime import datetime
-from typing import List, Dict, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
-
-import mistune
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
+from typing import List
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pdf_cache import (CACHE_DB_NAME, DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES, RenderCache,
+                       compute_render_key, get_worker_cache)
+from pdf_fonts import font_face_css, format_font_report, resolve_font_faces
+from pdf_fragments import (DEFAULT_MAX_FRAGMENT_BYTES, FragmentStore, document_anchor_pages, get_font_config, plan_fragments,
+                           render_document, render_fragmented)
+from pdf_history import (BuildHistory, build_record, comparable_builds, estimate_build,
+                         find_regressions, format_build_rows, format_metric_trend)
+from pdf_highlight import highlight_code_blocks, highlight_css, pygments_version
+from pdf_images import (IMAGE_EXTENSIONS, image_cache_usage, image_states, prune_image_cache,
+                        referenced_images, resolve_image_sources, rewrite_image_sources)
+from pdf_links import LinkIndex, path_anchors
+from pdf_markdown import BACKENDS, DEFAULT_BACKEND, get_backend
+from pdf_memory import LayoutMemoryModel, format_memory_size, parse_memory_size, plan_batches
+from pdf_optimize import PdfSizeAttribution, format_size_rows, optimize_pdf
+from pdf_preview import write_html_preview
+from pdf_profiler import RssSampler, StageProfiler, current_rss_bytes, peak_rss_bytes, worker_timing
+from pdf_translate import CommentTranslator
+from pdf_watch import ChangeWatcher
 
 
 # ============================================================================
@@ -425,102 +459,291 @@ class QuickFormatFixer:
         return fixes
 
 
+def find_format_issues(content: str) -> List[str]:
+    """Return format diagnostics of a markdown page, checked by the markdown workers"""
+    open_fence = None
+    for line_number, line in enumerate(content.split('\n'), 1):
+        if line.startswith('```'):
+            open_fence = None if open_fence else line_number
+    if open_fence:
+        return [f"unclosed code block opened at line {open_fence}"]
+    return []
+
+
 # ============================================================================
 # Parallel Processing
 # ============================================================================
 
-def process_single_markdown_file(args):
-    """Process a single markdown file (for parallel execution)"""
-    file_path, path, counter, use_cache, cache_dir, path_to_anchor, recipe_numbers = args
+# Bump whenever add_recipe_number_to_content_with_dict, convert_internal_links or
+# the HTML produced by the worker stage changes, so old cache entries are ignored
+RENDER_PIPELINE_VERSION = 6
 
-    try:
-        cache_key = f"{path}_{counter}"
-        cache_file = os.path.join(cache_dir,
-                                  f"{hashlib.md5(cache_key.encode()).hexdigest()}.pkl")
+MD_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
 
-        file_hash = hashlib.md5(open(file_path, 'rb').read()).hexdigest()
 
-        if use_cache and os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    if cached_data['hash'] == file_hash:
-                        return cached_data['html'], counter, path
-            except:
-                pass
+# Per-project state installed once per worker process by init_markdown_worker
+_worker_projects = {}
+
+
+def init_markdown_worker(project_states):
+    """Pool initializer: receive the shared state of every project in this build
+
+    project_states maps project_key to a dict with docs_dir, use_cache, cache_dir,
+    image_cache_dir, auto_fix, link_index, recipe_numbers, content_hooks,
+    markdown_backend and renderer_version. It is shipped once per worker
+    instead of being pickled into every task.
+    """
+    _worker_projects.update(project_states)
+
+
+def hook_token(hook):
+    """Cache key part of a content hook: its cache_token, else its qualified name"""
+    return getattr(hook, 'cache_token', None) or getattr(hook, '__qualname__', type(hook).__qualname__)
+
+
+def renderer_version(backend, hooks=()):
+    """Version part of the render cache key: markdown backend, Pygments, pipeline and content hooks"""
+    return (f"{backend.name}-{backend.version()}/pygments-{pygments_version() or 'none'}"
+            f"/pipeline-{RENDER_PIPELINE_VERSION}" + ''.join(f"/{hook_token(hook)}" for hook in hooks))
+
+
+def page_render_key(raw_content, content, path, link_index, recipe_numbers, source_dir, version):
+    """Render cache key of one nav page, shared by the markdown workers and --plan"""
+    return compute_render_key(
+        raw_content, path, recipe_numbers.get(path, ''),
+        collect_link_targets(content, link_index, path),
+        version,
+        image_states(content, source_dir)
+    )
+
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+def process_single_markdown_file(task):
+    """Process a single markdown file (for parallel execution)
+
+    Returns (html, counter, path, cache_entry, timing, diagnostics). The format
+    diagnostics come from the same read of the file as the HTML and are cached
+    along with it. cache_entry is (key, html, highlight_entries, highlight_hits,
+    diagnostics) for a new entry, (key, None, [], [], diagnostics) for a cache
+    hit, and None with the cache disabled. The main process marks hit keys
+    and highlight_hits, the cached code blocks the page reused, as used.
+    """
+    project_key, path, counter = task
+    start, start_cpu = time.time(), time.process_time()
+
+    try:
+        state = _worker_projects[project_key]
+        link_index = state['link_index']
+        recipe_numbers = state['recipe_numbers']
+        file_path = os.path.join(state['docs_dir'], path)
+        source_dir = os.path.dirname(file_path)
+        with open(file_path, 'rb') as f:
+            raw_content = f.read()
+        content = raw_content.decode('utf-8')
+
+        fixes = 0
+        if state['auto_fix'] and find_format_issues(content):
+            fixes = QuickFormatFixer.fix_file_issues(file_path)
+            if fixes:
+                with open(file_path, 'rb') as f:
+                    raw_content = f.read()
+                content = raw_content.decode('utf-8')
+
+        cache_key = page_render_key(raw_content, content, path, link_index, recipe_numbers, source_dir,
+                                    state['renderer_version'])
+
+        if state['use_cache']:
+            cache = get_worker_cache(state['cache_dir'])
+            cached = cache.get(cache_key) if cache else None
+            # A page whose optimized images were pruned is rendered again
+            cached_html = resolve_image_sources(cached[0], state['image_cache_dir']) if cached else None
+            if cached_html is not None:
+                diagnostics = cached[1]
+                timing = worker_timing(start, start_cpu, project=project_key, path=path, cache='hit',
+                                       html_bytes=len(cached_html), fixes=fixes)
+                return cached_html, counter, path, (cache_key, None, [], [], diagnostics), timing, diagnostics
+
+        diagnostics = find_format_issues(content)
+
+        # Project content hooks (e.g. --translate) see the source as written
+        for hook in state['content_hooks']:
+            content = hook(content, path)
 
         # Add Recipe number to content's first heading (e.g., "# 验证码绕过" -> "# R27: 验证码绕过")
         content = add_recipe_number_to_content_with_dict(content, path, recipe_numbers)
 
         # Convert internal links to PDF anchors
-        content = convert_internal_links(content, path_to_anchor)
+        content = convert_internal_links(content, link_index, path)
 
         # Convert to HTML
-        html_content = mistune.html(content)
+        html_content = get_backend(state['markdown_backend']).render(content)
+
+        # Highlight code blocks, blocks seen in earlier builds come from the cache
+        cache = get_worker_cache(state['cache_dir']) if state['use_cache'] else None
+        highlight_hits = []
+
+        def lookup_highlight(key):
+            highlighted = cache.get_highlight(key)
+            if highlighted is not None:
+                highlight_hits.append(key)
+            return highlighted
+
+        html_content, highlight_entries, highlight_stats = highlight_code_blocks(
+            html_content, lookup_highlight if cache else None)
+
+        # Downsample referenced images and point the HTML at the cached copies
+        html_content, image_stats = rewrite_image_sources(html_content, source_dir,
+                                                          state['image_cache_dir'])
+
+        # New entries are written by the main process in one transaction; pages with images
+        # that could not be optimized point at absolute source paths and are not cached
+        cacheable = state['use_cache'] and not image_stats['failed']
+        cache_entry = ((cache_key, html_content, highlight_entries, highlight_hits, diagnostics)
+                       if cacheable else None)
+        timing = worker_timing(start, start_cpu, project=project_key, path=path, cache='miss',
+                               html_bytes=len(html_content), fixes=fixes, **highlight_stats, **image_stats)
+        html_content = resolve_image_sources(html_content, state['image_cache_dir']) or html_content
+        return html_content, counter, path, cache_entry, timing, diagnostics
+
+    except Exception as e:
+        print(f"  Error processing {path}: {e}")
+        timing = worker_timing(start, start_cpu, project=project_key, path=path, cache='error')
+        return None, counter, path, None, timing, []
 
-        # Cache result
-        if use_cache:
-            os.makedirs(cache_dir, exist_ok=True)
-            with open(cache_file, 'wb') as f:
-                pickle.dump({
-                    'hash': file_hash,
-                    'html': html_content
-                }, f)
 
-        return html_content, counter, path
+def layout_document(html_path, css_text, output_path):
+    """Lay out and write a whole book inside a pool worker, returns ({pages, anchors}, timing)
 
-    except Exception as e:
-        print(f"  Error processing {file_path}: {e}")
-        return None, counter, path
+    Only the path of the streamed HTML file crosses the process boundary.
+    """
+    start, start_cpu = time.time(), time.process_time()
+    layout = render_document(html_path, css_text, output_path)
+    return layout, worker_timing(start, start_cpu, pages=layout['pages'],
+                                 html_bytes=os.path.getsize(html_path))
+
+
+def create_worker_pool(workers, converters):
+    """Start the process pool shared by every project of this invocation
+
+    The pool serves both the markdown stage and parallel fragment layout, so
+    its startup cost is paid once even when several cookbooks are built.
+    """
+    project_states = {converter.project_key: converter.worker_state() for converter in converters}
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_markdown_worker,
+                               initargs=(project_states,))
+
+
+def is_internal_md_link(link_url):
+    """Check whether a link points at another markdown page"""
+    return link_url.endswith('.md') or '.md#' in link_url
+
+
+def collect_link_targets(content, link_index, source_path=None):
+    """Return the sorted (url, anchor) pairs a document's internal links resolve to
+
+    This is the part of the link map that actually affects a file's HTML, so it is
+    what goes into the render cache key instead of the whole link index.
+    """
+    targets = set()
+    for match in MD_LINK_PATTERN.finditer(content):
+        link_url = match.group(2)
+        if is_internal_md_link(link_url):
+            targets.add((link_url, link_index.resolve(link_url, source_path)))
+    return sorted(targets, key=lambda item: (item[0], item[1] or ''))
 
 
-def convert_internal_links(content, path_to_anchor):
+def convert_internal_links(content, link_index, source_path=None):
     """Convert internal markdown links to PDF anchors"""
 
     def replace_link(match):
         link_text = match.group(1)
         link_url = match.group(2)
 
-        if not (link_url.endswith('.md') or '.md#' in link_url):
+        if not is_internal_md_link(link_url):
             return match.group(0)
 
-        if '#' in link_url:
-            file_path, anchor = link_url.split('#', 1)
-        else:
-            file_path = link_url
-            anchor = None
-
-        normalized_path = file_path
-        while normalized_path.startswith('./'):
-            normalized_path = normalized_path[2:]
-        while normalized_path.startswith('../'):
-            normalized_path = normalized_path[3:]
-
-        target_anchor = None
-        if normalized_path in path_to_anchor:
-            target_anchor = path_to_anchor[normalized_path]
-        else:
-            filename = normalized_path.split('/')[-1]
-            for path, anchor_id in path_to_anchor.items():
-                if path.endswith(filename):
-                    target_anchor = anchor_id
-                    break
-
+        target_anchor = link_index.resolve(link_url, source_path)
         if target_anchor:
-            if anchor:
-                return f'[{link_text}](#{target_anchor}-{anchor})'
-            else:
-                return f'[{link_text}](#{target_anchor})'
+            return f'[{link_text}](#{target_anchor})'
         else:
             return f'{link_text}'
 
-    content = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', replace_link, content)
+    content = MD_LINK_PATTERN.sub(replace_link, content)
     return content
 
 
+# ============================================================================
+# Partial Builds
+# ============================================================================
+
+def parse_section_filter(sections_arg):
+    """Parse --sections: comma separated top-level nav indexes or name fragments"""
+    if not sections_arg:
+        return None
+
+    result = []
+    for item in sections_arg.split(','):
+        item = item.strip()
+        try:
+            result.append(int(item))
+        except ValueError:
+            result.append(item)
+
+    return result
+
+
+def parse_part_filter(parts_arg):
+    """Parse --parts: comma separated part numbers or ranges, e.g. "1-3,5" """
+    if not parts_arg:
+        return None
+
+    parts = set()
+    for item in parts_arg.split(','):
+        item = item.strip()
+        if '-' in item:
+            start, end = item.split('-', 1)
+            parts.update(range(int(start), int(end) + 1))
+        elif item:
+            parts.add(int(item))
+    return sorted(parts)
+
+
+def parse_path_filter(paths_arg):
+    """Parse --paths: comma separated docs-relative pages, directories or glob patterns"""
+    if not paths_arg:
+        return None
+    return [item.strip() for item in paths_arg.split(',') if item.strip()]
+
+
+def iter_nav_paths(nav_items):
+    """Yield every page path of a nav subtree, in nav order"""
+    for item in nav_items:
+        if isinstance(item, dict):
+            for path in item.values():
+                if isinstance(path, str):
+                    yield path
+                elif isinstance(path, list):
+                    yield from iter_nav_paths(path)
+
+
+def prune_nav_items(nav_items, keep):
+    """Return a nav subtree with only the pages in keep, dropping groups left empty"""
+    pruned = []
+    for item in nav_items:
+        if not isinstance(item, dict):
+            continue
+        kept = {}
+        for title, path in item.items():
+            if isinstance(path, str) and path in keep:
+                kept[title] = path
+            elif isinstance(path, list):
+                children = prune_nav_items(path, keep)
+                if children:
+                    kept[title] = children
+        if kept:
+            pruned.append(kept)
+    return pruned
+
+
 # ============================================================================
 # Main PDF Converter
 # ============================================================================
@@ -529,27 +752,79 @@ class UnifiedPDFConverter:
     """Unified PDF converter for both Android and Web cookbooks"""
 
     def __init__(self, project_key: str, validate=True, auto_fix=False,
-                 use_cache=True, workers=None):
-        if project_key not in PROJECTS:
+                 use_cache=True, workers=None, incremental=False, parallel_render=False,
+                 profiler=None, project_config=None, output_dir=None, executor=None,
+                 keep_results=False, output_format='pdf', optimize=False,
+                 section_filter=None, path_filter=None, part_filter=None, content_hooks=None,
+                 markdown_backend=DEFAULT_BACKEND, max_memory=None):
+        # project_config lets callers (e.g. benchmarks) build projects not listed in PROJECTS
+        if project_config is None and project_key not in PROJECTS:
             raise ValueError(f"Unknown project: {project_key}. Use 'android' or 'web'.")
 
-        self.project = PROJECTS[project_key]
+        self.project = project_config or PROJECTS[project_key]
         self.project_key = project_key
+        # Editions of a project (own recipe numbering or output, e.g. android_final) keep their
+        # own caches, fragments, history and debug output
+        self.edition = self.project.get("edition", project_key)
         self.docs_dir = self.project["docs_dir"]
         self.mkdocs_file = self.project["mkdocs_file"]
-        self.output_dir = OUTPUT_DIR
-        self.cache_dir = os.path.join(CACHE_DIR, project_key)
+        self.output_dir = output_dir or OUTPUT_DIR
+        cache_root = os.path.join(output_dir, ".cache") if output_dir else CACHE_DIR
+        self.cache_dir = os.path.join(cache_root, self.edition)
+        self.fragments_dir = os.path.join(self.cache_dir, "fragments")
+        # Optimized images are content addressed, so projects share one directory
+        self.image_cache_dir = os.path.join(cache_root, "images")
         self.nav_structure = []
-        self.font_config = FontConfiguration()
+        # Resolved once and persisted next to the project caches
+        self.font_faces = resolve_font_faces(cache_root)
         self.path_to_anchor = {}
+        # Nav position of every page, the key of its markdown result
+        self.path_to_counter = {}
+        self.link_index = LinkIndex({})
         self.validate = validate
         self.auto_fix = auto_fix
         self.use_cache = use_cache
         self.workers = workers or os.cpu_count()
+        self.incremental = incremental
+        self.parallel_render = parallel_render
+        self.profiler = profiler or StageProfiler()
+        # Shared pool from create_worker_pool; a private one is started when None
+        self.executor = executor
+        # Watch mode keeps the last markdown results to only re-render changed files
+        self.keep_results = keep_results
+        self.last_results = None
+        self.output_format = output_format
+        self.optimize = optimize
+        # Format diagnostics of every nav page from the last markdown stage, by path
+        self.diagnostics = {}
+        # Partial builds: only the nav pages matched by every filter are built
+        self.section_filter = section_filter
+        self.path_filter = path_filter
+        self.part_filter = part_filter
+        # Callables (content, path) -> content applied to every page in the workers,
+        # see pdf_translate.py; their cache_token is part of the render cache key
+        self.content_hooks = list(content_hooks or [])
+        # Markdown parser of the workers, see pdf_markdown.py
+        self.markdown_backend = get_backend(markdown_backend)
+        self.renderer_version = renderer_version(self.markdown_backend, self.content_hooks)
+        self.selected_paths = None
+        # Page index of every anchor in the last written PDF, for the size report
+        self.anchor_pages = {}
+        # (rendered, cached) fragment counts of the last fragmented layout, for the build history
+        self.last_fragments = None
+        # Layout RSS budget in bytes (--max-memory), see pdf_memory.py
+        self.max_memory = max_memory
+        self.memory_model = LayoutMemoryModel(self.cache_dir)
+        # Budget, projection and sampled peak of the last bounded layout
+        self.last_memory = None
+        self.history = BuildHistory(cache_root)
         self.recipe_count = 0
 
         # Select recipe numbers based on project
-        self.recipe_numbers = ANDROID_RECIPE_NUMBERS if project_key == "android" else WEB_RECIPE_NUMBERS
+        if "recipe_numbers" in self.project:
+            self.recipe_numbers = self.project["recipe_numbers"]
+        else:
+            self.recipe_numbers = ANDROID_RECIPE_NUMBERS if project_key == "android" else WEB_RECIPE_NUMBERS
 
         # Author info
         self.author_email = "overkazaf@gmail.com"
@@ -558,13 +833,33 @@ class UnifiedPDFConverter:
         self.revision_date = datetime.now().strftime("%Y-%m-%d")
 
         os.makedirs(self.output_dir, exist_ok=True)
-        if use_cache:
-            os.makedirs(self.cache_dir, exist_ok=True)
+        self.render_cache = RenderCache(self.cache_dir) if use_cache else None
+        # Cache key of the latest render of every page, kept when the cache is pruned
+        self.page_cache_keys = {}
+
+    @property
+    def font_config(self):
+        """WeasyPrint font configuration, created on first use so markdown-only runs never import WeasyPrint"""
+        return get_font_config()
+
+    @property
+    def render_mode(self):
+        """Layout strategy of this build, builds are only compared within one mode"""
+        if self.output_format == 'html':
+            return 'html'
+        if self.parallel_render:
+            return 'parallel'
+        return 'incremental' if self.incremental else 'single'
+
+    def stage(self, name):
+        """Profile a build stage under this project's name"""
+        return self.profiler.stage(f"{self.project_key}/{name}", project=self.project_key)
 
     def load_navigation_structure(self):
         """Load navigation structure from mkdocs.yml"""
         try:
-            with open(self.mkdocs_file, 'r', encoding='utf-8') as f:
+            with self.stage('load_navigation_structure'), \
+                    open(self.mkdocs_file, 'r', encoding='utf-8') as f:
                 config = yaml.safe_load(f)
                 self.nav_structure = config.get('nav', [])
                 print(f"  Loaded {len(self.nav_structure)} main sections")
@@ -573,6 +868,88 @@ class UnifiedPDFConverter:
             print(f"  Failed to load mkdocs.yml: {e}")
             return []
 
+    def should_include_section(self, section_idx, section_name, part_idx=None):
+        """Check a top-level nav section against --parts (number) and --sections (index or name fragment)"""
+        if self.part_filter is not None and part_idx not in self.part_filter:
+            return False
+
+        if self.section_filter is None:
+            return True
+
+        if section_idx in self.section_filter:
+            return True
+
+        for filter_name in self.section_filter:
+            if isinstance(filter_name, str) and filter_name.lower() in section_name.lower():
+                return True
+
+        return False
+
+    def should_include_path(self, path):
+        """Check a nav page path against --paths (page, directory or glob pattern)"""
+        if self.path_filter is None:
+            return True
+
+        for pattern in self.path_filter:
+            # Also accept paths given from the repository root or the project directory
+            if os.path.exists(pattern):
+                pattern = os.path.relpath(os.path.abspath(pattern), os.path.abspath(self.docs_dir))
+            pattern = pattern.replace(os.sep, '/')
+            while pattern.startswith('./'):
+                pattern = pattern[2:]
+            if path == pattern or fnmatch.fnmatch(path, pattern) or path.startswith(pattern.rstrip('/') + '/'):
+                return True
+
+        return False
+
+    def select_nav_paths(self):
+        """Return the set of nav pages picked by the filters, or None for a full build"""
+        if self.section_filter is None and self.path_filter is None and self.part_filter is None:
+            return None
+
+        selected = set()
+        for section_idx, part_idx, section_name, items in self.iter_sections():
+            if part_idx is None or not self.should_include_section(section_idx, section_name, part_idx):
+                continue
+            selected.update(path for path in iter_nav_paths(items) if self.should_include_path(path))
+        return selected
+
+    def iter_sections(self):
+        """Yield (section index, part number, name, items) of every top-level nav entry
+
+        Parts number the top-level groups (entries with child pages) from 1;
+        single pages such as the home page have no part number.
+        """
+        part_idx = 0
+        for section_idx, section in enumerate(self.nav_structure):
+            if isinstance(section, dict):
+                for section_name, items in section.items():
+                    if isinstance(items, list):
+                        part_idx += 1
+                        yield section_idx, part_idx, section_name, items
+                    else:
+                        yield section_idx, None, section_name, items
+
+    def list_sections(self):
+        """Print the top-level nav sections with their --sections index and --parts number"""
+        print(f"\n  {self.project['name']}:")
+        print(f"    {'Index':>5}  {'Part':>4}  {'Pages':>5}  Section")
+        for section_idx, part_idx, section_name, items in self.iter_sections():
+            pages = sum(1 for _ in iter_nav_paths(items)) if part_idx else 1
+            print(f"    {section_idx:>5}  {part_idx or '-':>4}  {pages:>5}  {section_name}")
+
+    def is_selected(self, path):
+        """Check whether a nav page is part of this build"""
+        return self.selected_paths is None or path in self.selected_paths
+
+    def filter_nav_items(self, items):
+        """Prune a section's nav items to the selection, None when nothing of it is built"""
+        if self.selected_paths is None:
+            return items
+        if not isinstance(items, list):
+            return None
+        return prune_nav_items(items, self.selected_paths) or None
+
     def build_path_anchor_mapping(self):
         """Build file path to anchor ID mapping"""
         counter = 0
@@ -584,8 +961,7 @@ class UnifiedPDFConverter:
                     for title, path in item.items():
                         if isinstance(path, str):
                             counter += 1
-                            anchor_id = f"section-{counter}"
-                            self.path_to_anchor[path] = anchor_id
+                            self.path_to_counter[path] = counter
                         elif isinstance(path, list):
                             scan_nav_items(path)
 
@@ -595,50 +971,39 @@ class UnifiedPDFConverter:
                     if section_name != "Home" and isinstance(items, list):
                         scan_nav_items(items)
 
+        # Anchors follow the paths, so a reordered nav keeps the HTML of linking pages cacheable
+        self.path_to_anchor = path_anchors(self.path_to_counter)
         self.recipe_count = sum(1 for path in self.path_to_anchor if path in self.recipe_numbers)
         print(f"  Built {len(self.path_to_anchor)} file path mappings")
         print(f"  Found {self.recipe_count} recipes with numbers")
 
-    def validate_and_fix_files(self):
-        """Validate and fix file format issues"""
-        if not self.validate:
-            return
-
-        print("\n  Validating file formats...")
-
-        total_issues = 0
-        total_fixes = 0
-
-        for path, anchor_id in self.path_to_anchor.items():
-            file_path = os.path.join(self.docs_dir, path)
-            if not os.path.exists(file_path):
-                continue
-
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                has_issues = False
-                in_code_block = False
-                for line in content.split('\n'):
-                    if re.match(r'^```', line):
-                        in_code_block = not in_code_block
-                if in_code_block:
-                    has_issues = True
-                    total_issues += 1
-
-                if has_issues and self.auto_fix:
-                    fixes = QuickFormatFixer.fix_file_issues(file_path)
-                    total_fixes += fixes
-
-            except:
-                continue
-
-        if total_issues > 0:
-            print(f"  Found {total_issues} format issues")
-            if self.auto_fix:
-                print(f"  Auto-fixed {total_fixes} issues")
-        else:
+        # Built once per build and shipped read-only to the markdown workers. Anchors cover
+        # the whole nav so partial and full builds share cache entries
+        excluded = ()
+        if self.selected_paths is not None:
+            excluded = set(self.path_to_anchor) - self.selected_paths
+        self.link_index = LinkIndex(self.path_to_anchor, excluded=excluded)
+        ambiguous = self.link_index.ambiguous_basenames()
+        if ambiguous:
+            print(f"  {len(ambiguous)} file names are shared by several pages, "
+                  f"links that only match by file name are ambiguous:")
+            for line in self.link_index.report():
+                print(f"    {line}")
+
+    def report_diagnostics(self, total_fixes=0, limit=5):
+        """Print the format diagnostics the markdown workers found for the pages of this build"""
+        issues = [(path, diagnostics) for path, diagnostics in sorted(self.diagnostics.items())
+                  if diagnostics and path in self.path_to_anchor and self.is_selected(path)]
+        if total_fixes:
+            print(f"  Auto-fixed {total_fixes} format issues")
+        if issues:
+            print(f"  Found {sum(len(diagnostics) for _, diagnostics in issues)} format issues"
+                  f"{'' if self.auto_fix else ' (run with --fix-files to repair)'}:")
+            for path, diagnostics in issues[:limit]:
+                print(f"    {path}: {'; '.join(diagnostics)}")
+            if len(issues) > limit:
+                print(f"    ... and {len(issues) - limit} more files")
+        elif not total_fixes:
             print("  All files formatted correctly")
 
     def collect_files_to_process(self):
@@ -654,13 +1019,8 @@ class UnifiedPDFConverter:
                         if isinstance(path, str):
                             article_counter += 1
                             file_path = os.path.join(self.docs_dir, path)
-                            if os.path.exists(file_path):
-                                files_to_process.append((
-                                    file_path, path, article_counter,
-                                    self.use_cache, self.cache_dir,
-                                    self.path_to_anchor,
-                                    self.recipe_numbers
-                                ))
+                            if self.is_selected(path) and os.path.exists(file_path):
+                                files_to_process.append((self.project_key, path, article_counter))
                         elif isinstance(path, list):
                             collect_nav_items(path)
 
@@ -674,18 +1034,9 @@ class UnifiedPDFConverter:
 
         return files_to_process
 
-    def merge_docs_files_parallel(self):
-        """Merge all docs files in parallel"""
-        if not self.nav_structure:
-            self.load_navigation_structure()
-
-        self.build_path_anchor_mapping()
-
-        if self.validate:
-            self.validate_and_fix_files()
-
-        # Create base HTML
-        full_html = f"""
+    def html_document_parts(self):
+        """Return the (head, tail) of the document skeleton shared by every output"""
+        head = f"""
         <!DOCTYPE html>
         <html lang="zh-CN">
         <head>
@@ -695,39 +1046,162 @@ class UnifiedPDFConverter:
         </head>
         <body>
         """
+        tail = """
+        </body>
+        </html>
+        """
+        return head, tail
 
-        full_html += self.create_cover_page()
-        full_html += self.create_table_of_contents()
+    def wrap_html_document(self, body_html):
+        """Wrap body HTML in the document skeleton shared by every output"""
+        head, tail = self.html_document_parts()
+        return head + body_html + tail
 
-        files_to_process = self.collect_files_to_process()
-        print(f"\n  Processing {len(files_to_process)} files with {self.workers} workers...")
+    def write_html_document(self, html_path, front_matter, chapters):
+        """Stream the document into html_path one chapter at a time
 
-        # Parallel processing
-        results = {}
-        with ProcessPoolExecutor(max_workers=self.workers) as executor:
-            futures = {executor.submit(process_single_markdown_file, args): args
-                      for args in files_to_process}
+        chapters may be a generator: each chapter is assembled, written and
+        dropped before the next one, so the whole book never exists as a
+        single string in memory.
+        """
+        head, tail = self.html_document_parts()
+        tmp_path = f"{html_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(head)
+            f.write(front_matter)
+            for _, chapter_html in chapters:
+                f.write(chapter_html)
+            f.write(tail)
+        os.replace(tmp_path, html_path)
+        return html_path
+
+    def worker_state(self):
+        """Return the read-only state markdown workers need for this project"""
+        return {
+            'docs_dir': self.docs_dir,
+            'use_cache': self.use_cache,
+            'cache_dir': self.cache_dir,
+            'image_cache_dir': self.image_cache_dir,
+            'auto_fix': self.validate and self.auto_fix,
+            'link_index': self.link_index,
+            'recipe_numbers': self.recipe_numbers,
+            'content_hooks': self.content_hooks,
+            'markdown_backend': self.markdown_backend.name,
+            'renderer_version': self.renderer_version,
+        }
+
+    def worker_pool(self):
+        """Return the shared worker pool, or a private one for this build"""
+        if self.executor is not None:
+            return nullcontext(self.executor)
+        return create_worker_pool(self.workers, [self])
+
+    def render_markdown_files(self, changed_paths=None):
+        """Convert all nav files to HTML in parallel, returns {counter: (html, path)}
 
+        changed_paths limits the work to those nav paths when results of a
+        previous build with the same nav are kept (watch mode).
+        """
+        files_to_process = self.collect_files_to_process()
+        results = {}
+        if changed_paths is not None and self.last_results is not None:
+            for _, path, counter in files_to_process:
+                if path not in changed_paths and counter in self.last_results:
+                    results[counter] = self.last_results[counter]
+            files_to_process = [task for task in files_to_process if task[2] not in results]
+        print(f"\n  Processing {len(files_to_process)} files with {self.workers} workers...")
+        if results:
+            print(f"  Reusing {len(results)} unchanged files")
+
+        # Parallel processing, tasks only carry (project, path, counter)
+        new_cache_entries = []
+        new_highlights = []
+        used_keys = []
+        used_highlights = []
+        image_totals = {'images': 0, 'source_bytes': 0, 'optimized_bytes': 0}
+        highlight_totals = {'code_blocks': 0, 'code_blocks_highlighted': 0, 'code_blocks_lexed': 0}
+        total_fixes = 0
+        chunksize = max(1, len(files_to_process) // (self.workers * 4))
+        with self.worker_pool() as executor:
             completed = 0
-            for future in as_completed(futures):
-                html_content, counter, path = future.result()
+            for result in executor.map(process_single_markdown_file, files_to_process,
+                                       chunksize=chunksize):
+                html_content, counter, path, cache_entry, timing, diagnostics = result
+                self.profiler.add_worker_event('process_single_markdown_file', timing,
+                                               received=time.time())
+                self.diagnostics[path] = diagnostics
+                total_fixes += timing['args'].get('fixes', 0)
+                for totals in (image_totals, highlight_totals):
+                    for name in totals:
+                        totals[name] += timing['args'].get(name, 0)
                 if html_content:
                     results[counter] = (html_content, path)
                     completed += 1
                     if completed % 10 == 0 or completed == len(files_to_process):
                         print(f"    Progress: {completed}/{len(files_to_process)}")
+                if cache_entry:
+                    cache_key, cached_html, highlight_entries, highlight_hits, diagnostics = cache_entry
+                    self.page_cache_keys[path] = cache_key
+                    used_highlights.extend(highlight_hits)
+                    if cached_html is None:
+                        used_keys.append(cache_key)
+                    else:
+                        new_cache_entries.append((cache_key, path, cached_html, diagnostics))
+                        new_highlights.extend(highlight_entries)
 
         print(f"  Processed {len(results)} files")
+        if self.render_cache:
+            self.render_cache.put_many(new_cache_entries)
+            self.render_cache.put_highlights(new_highlights)
+            self.render_cache.touch(used_keys, used_highlights)
+            self.render_cache.count(hits=len(used_keys), misses=len(new_cache_entries))
+            print(f"  Cache: {len(used_keys)} hits, {len(new_cache_entries)} rendered")
+            # Pages reused from earlier renders of a watch session are still part of the book
+            keep = set(self.page_cache_keys.values())
+            keep.update(used_highlights, (entry[0] for entry in new_highlights))
+            evicted = self.render_cache.prune(keep=keep)
+            if evicted['entries'] or evicted['highlights']:
+                print(f"  Cache: evicted {evicted['entries']} stale entries "
+                      f"({evicted['bytes'] / 1024 / 1024:.2f} MB), {evicted['highlights']} code blocks")
+        if highlight_totals['code_blocks']:
+            print(f"  Highlighting: {highlight_totals['code_blocks']} code blocks, "
+                  f"{highlight_totals['code_blocks_highlighted']} highlighted, "
+                  f"{highlight_totals['code_blocks_lexed']} lexed")
+        if image_totals['images']:
+            print(f"  Images: {image_totals['images']} optimized, "
+                  f"{image_totals['source_bytes'] / 1024 / 1024:.2f} MB -> "
+                  f"{image_totals['optimized_bytes'] / 1024 / 1024:.2f} MB")
+
+        if self.validate:
+            self.report_diagnostics(total_fixes)
+
+        if self.keep_results:
+            self.last_results = results
+        return results
+
+    def build_chapters(self, results, split_sections=False):
+        """Assemble rendered files into per top-level nav section HTML, in nav order
+
+        Returns a list of (section_name, chapter_html). With split_sections each
+        chapter is further cut before every section that starts on a new page,
+        which lays out exactly like the whole chapter but gives the parallel
+        renderer smaller, evenly sized units of work.
+        """
+        return list(self.iter_chapters(results, split_sections=split_sections))
 
-        # Add results to HTML
+    def iter_chapters(self, results, split_sections=False):
+        """Yield the (section_name, chapter_html) pairs of build_chapters one at a time"""
         theme_color = self.project['theme_color']
         for section in self.nav_structure:
             if isinstance(section, dict):
                 for section_name, items in section.items():
                     if section_name == "Home":
                         continue
+                    items = self.filter_nav_items(items)
+                    if items is None:
+                        continue
 
-                    full_html += f"""
+                    chapter_header = f"""
                     <div class="chapter">
                         <h1 class="no-page-break">{section_name}</h1>
                     """
@@ -737,39 +1211,95 @@ class UnifiedPDFConverter:
                             if isinstance(item, dict):
                                 for title, path in item.items():
                                     if isinstance(path, str) and path in self.path_to_anchor:
-                                        counter = int(self.path_to_anchor[path].split('-')[1])
+                                        counter = self.path_to_counter[path]
                                         if counter in results:
                                             html_content, _ = results[counter]
                                             anchor_id = self.path_to_anchor[path]
                                             # Title from mkdocs.yml already contains recipe number (e.g., "R27: 验证码绕过技术")
                                             # So we don't need to add recipe_prefix here
-                                            html_output.append(f"""
+                                            html_output.append((True, f"""
                                             <div class="section" id="{anchor_id}">
                                                 <h2>{title}</h2>
                                                 {html_content}
                                             </div>
-                                            """)
+                                            """))
                                     elif isinstance(path, list):
                                         # Add subsection header for nested categories
-                                        html_output.append(f"""
+                                        html_output.append((False, f"""
                                         <div class="subsection-header" style="margin-top: 30pt; margin-bottom: 15pt; page-break-before: auto;">
                                             <h3 style="font-size: 16pt; color: {theme_color}; border-left: 4px solid {theme_color}; padding-left: 12pt; margin: 0;">{title}</h3>
                                         </div>
-                                        """)
+                                        """))
                                         add_results(path, html_output, level + 1)
 
                     section_html = []
                     if isinstance(items, list):
                         add_results(items, section_html)
-                    full_html += ''.join(section_html)
-                    full_html += "</div>"
 
-        full_html += """
-        </body>
-        </html>
+                    if not split_sections:
+                        chapter_html = chapter_header + ''.join(html for _, html in section_html)
+                        yield section_name, chapter_html + "</div>"
+                        continue
+
+                    # Every section but the chapter's first one has page-break-before: always,
+                    # so cutting right before it cannot change the layout
+                    pieces = [[chapter_header]]
+                    seen_section = False
+                    for is_section, html in section_html:
+                        if is_section and seen_section:
+                            pieces.append(['<div class="chapter">'])
+                        seen_section = seen_section or is_section
+                        pieces[-1].append(html)
+                    for index, piece in enumerate(pieces):
+                        name = section_name if index == 0 else f"{section_name} ({index + 1})"
+                        yield name, ''.join(piece) + "</div>"
+
+    def reset_navigation(self):
+        """Forget the nav, link index and kept results after mkdocs.yml changed"""
+        self.nav_structure = []
+        self.path_to_anchor = {}
+        self.path_to_counter = {}
+        self.link_index = LinkIndex({})
+        self.last_results = None
+        self.diagnostics = {}
+
+    def prepare(self):
+        """Load the nav and build the link index, once per build"""
+        if not self.nav_structure:
+            self.load_navigation_structure()
+        if self.nav_structure and not self.path_to_anchor:
+            self.selected_paths = self.select_nav_paths()
+            if self.selected_paths is not None:
+                total = sum(1 for section in self.nav_structure if isinstance(section, dict)
+                            for items in section.values() if isinstance(items, list)
+                            for _ in iter_nav_paths(items))
+                print(f"  Partial build: {len(self.selected_paths)} of {total} pages selected")
+            with self.stage('build_path_anchor_mapping'):
+                self.build_path_anchor_mapping()
+        return self.nav_structure
+
+    def build_document_parts(self, split_sections=False, stream=False, changed_paths=None):
+        """Run the markdown stage and return (front_matter_html, chapters)
+
+        With stream the chapters are returned as a generator that assembles
+        each chapter only when it is consumed.
         """
+        self.prepare()
+
+        with self.stage('front matter'):
+            front_matter = self.create_cover_page() + self.create_table_of_contents()
+        with self.stage('markdown stage (worker pool)'):
+            results = self.render_markdown_files(changed_paths)
+        if stream:
+            return front_matter, self.iter_chapters(results, split_sections=split_sections)
+        with self.stage('HTML assembly'):
+            chapters = self.build_chapters(results, split_sections=split_sections)
+        return front_matter, chapters
 
-        return full_html
+    def merge_docs_files_parallel(self):
+        """Merge all docs files in parallel"""
+        front_matter, chapters = self.build_document_parts()
+        return self.wrap_html_document(front_matter + ''.join(html for _, html in chapters))
 
     def _generate_learning_paths(self):
         """Generate recommended learning paths based on project type"""
@@ -1036,6 +1566,9 @@ class UnifiedPDFConverter:
                 for section_name, items in section.items():
                     if section_name == "Home":
                         continue
+                    items = self.filter_nav_items(items)
+                    if items is None:
+                        continue
                     # Add main section
                     toc_entries.append({
                         'title': section_name,
@@ -1092,9 +1625,14 @@ class UnifiedPDFConverter:
                 else:
                     recipe_badge = ''
                     display_title = translated_title
+                # Link each entry to its section; fragment builds resolve these across fragments
+                anchor_id = self.path_to_anchor.get(entry['path'])
+                title_html = f'<span style="color: #555; font-size: 9.5pt;">{display_title}</span>'
+                if anchor_id:
+                    title_html = f'<a href="#{anchor_id}">{title_html}</a>'
                 toc_html += f"""
                 <div class="toc-entry" style="margin-left: {indent}pt; margin-top: 3pt; padding: 3pt 0;">
-                    {recipe_badge}<span style="color: #555; font-size: 9.5pt;">{display_title}</span>
+                    {recipe_badge}{title_html}
                 </div>
                 """
 
@@ -1109,31 +1647,15 @@ class UnifiedPDFConverter:
 
     def create_css_styles(self):
         """Create PDF styles with Chinese font support"""
-        theme_color = self.project['theme_color']
+        from weasyprint import CSS
 
-        css_content = f"""
-        @font-face {{
-            font-family: 'Chinese Sans';
-            src: url('file:///System/Library/Fonts/Hiragino Sans GB.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/STHeiti Light.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/Supplemental/Songti.ttc') format('truetype'),
-                 url('file:///Library/Fonts/Arial Unicode.ttf') format('truetype');
-            font-weight: normal;
-        }}
+        return CSS(string=self.build_css_text(), font_config=self.font_config)
 
-        @font-face {{
-            font-family: 'Chinese Sans';
-            src: url('file:///System/Library/Fonts/Hiragino Sans GB.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/STHeiti Medium.ttc') format('truetype');
-            font-weight: bold;
-        }}
-
-        @font-face {{
-            font-family: 'Code Font';
-            src: url('file:///System/Library/Fonts/Menlo.ttc') format('truetype'),
-                 url('file:///System/Library/Fonts/Monaco.dfont') format('truetype');
-        }}
+    def build_css_text(self):
+        """Build the stylesheet source shared by every render mode"""
+        theme_color = self.project['theme_color']
 
+        css_content = font_face_css(self.font_faces) + highlight_css() + f"""
         @page {{
             size: A4;
             margin: 2.5cm 2cm 3cm 2cm;
@@ -1348,12 +1870,228 @@ class UnifiedPDFConverter:
         }}
         """
 
-        return CSS(string=css_content, font_config=self.font_config)
+        return css_content
+
+    def fragment_documents(self, front_matter, chapters):
+        """Return the (name, html_document) layout units of a fragmented build, in book order"""
+        fragments = [("Front matter", self.wrap_html_document(front_matter))]
+        fragments += [(name, self.wrap_html_document(html)) for name, html in chapters]
+        return fragments
+
+    def render_pdf_fragmented(self, front_matter, chapters, output_path):
+        """Render the book as cached PDF fragments and stitch them into one document
+
+        Fragments are laid out concurrently across the worker pool when
+        parallel rendering is enabled, otherwise one after another.
+        """
+        return self.render_fragments(self.fragment_documents(front_matter, chapters), output_path,
+                                     parallel=self.parallel_render)
+
+    def render_fragments(self, fragments, output_path, parallel=False):
+        """Lay out (name, html_document) fragments, reusing cached ones, and stitch them into output_path"""
+        with self.stage('CSS build'):
+            css_text = self.build_css_text()
+
+        kwargs = dict(title=self.project['name'], reuse=self.use_cache or self.incremental,
+                      stage=self.stage)
+        if parallel:
+            with self.worker_pool() as executor:
+                summary = render_fragmented(fragments, css_text, self.fragments_dir,
+                                            output_path, executor=executor, **kwargs)
+        else:
+            summary = render_fragmented(fragments, css_text, self.fragments_dir,
+                                        output_path, **kwargs)
+        self.anchor_pages = summary['anchors']
+        self.last_fragments = (len(summary['rendered']), len(summary['cached']))
+
+        print(f"  Fragments: {len(summary['rendered'])} rendered, "
+              f"{len(summary['cached'])} cached, {summary['pages']} pages")
+        # Bounded by age and size only, fragments of other selections stay reusable
+        evicted = FragmentStore(self.fragments_dir).prune(keep=summary['keys'])
+        if evicted['fragments']:
+            print(f"  Fragments: evicted {evicted['fragments']} stale fragments "
+                  f"({evicted['bytes'] / 1024 / 1024:.2f} MB)")
+        return summary
+
+    def render_pdf(self, html_path, output_path, in_process=False):
+        """Lay out the merged HTML file in one WeasyPrint pass
+
+        With a shared pool the layout runs as a pool task, so while it runs the
+        main process is free to drive another project's markdown stage.
+        """
+        if self.executor is None or in_process:
+            from weasyprint import HTML
+
+            with self.stage('CSS build'):
+                css_styles = self.create_css_styles()
+            with self.stage('WeasyPrint layout'):
+                document = HTML(filename=html_path).render(
+                    stylesheets=[css_styles],
+                    font_config=self.font_config
+                )
+            with self.stage('PDF write'):
+                document.write_pdf(output_path)
+            self.anchor_pages = document_anchor_pages(document)
+            return
 
-    def generate_pdf(self, output_filename=None):
+        with self.stage('CSS build'):
+            css_text = self.build_css_text()
+        with self.stage('WeasyPrint layout (pool)'):
+            layout, timing = self.executor.submit(layout_document, html_path, css_text,
+                                                  output_path).result()
+            self.anchor_pages = layout['anchors']
+            self.profiler.add_worker_event(f"{self.project_key}/layout_document", timing,
+                                           received=time.time())
+
+    def render_pdf_bounded(self, html_path, front_matter, chapters, output_path):
+        """Lay out the book within --max-memory, in chapter batches when one pass would not fit
+
+        Layouts run in this process, one at a time, so their RSS can be
+        sampled; the measured growth recalibrates the project's memory model.
+        Incremental and parallel builds keep their chapter fragments.
+        """
+        parts = [("Front matter", front_matter)] + list(chapters)
+        sizes = [len(html.encode('utf-8')) for _, html in parts]
+        baseline = current_rss_bytes() or 0
+        projected = self.memory_model.project(sum(sizes), baseline)
+        source = 'measured' if self.memory_model.calibrated else 'default'
+        print(f"  Memory budget: {format_memory_size(self.max_memory)}, now {format_memory_size(baseline)}, "
+              f"single pass projected at {format_memory_size(projected)} "
+              f"({source} {self.memory_model.bytes_per_html_byte:.0f} bytes per HTML byte)")
+
+        fragmented = self.incremental or self.parallel_render
+        if not fragmented and projected <= self.max_memory:
+            with RssSampler() as sampler:
+                self.render_pdf(html_path, output_path, in_process=True)
+            batch_count, layout_bytes = 1, sum(sizes)
+        else:
+            if fragmented:
+                fragments = self.fragment_documents(front_matter, chapters)
+                fragment_sizes = sizes
+            else:
+                limit = self.memory_model.max_html_bytes(self.max_memory, baseline)
+                fragments, fragment_sizes = [], []
+                for batch in plan_batches(sizes, limit):
+                    names = [parts[index][0] for index in batch]
+                    name = names[0] if len(names) == 1 else f"{names[0]} - {names[-1]}"
+                    fragments.append((name, self.wrap_html_document(
+                        ''.join(parts[index][1] for index in batch))))
+                    fragment_sizes.append(sum(sizes[index] for index in batch))
+                print(f"  Laying out {len(parts)} chapters in {len(fragments)} batches "
+                      f"of at most {format_memory_size(limit)} of HTML")
+            oversized = [name for (name, _), size in zip(fragments, fragment_sizes)
+                         if self.memory_model.project(size, baseline) > self.max_memory]
+            if oversized:
+                print(f"  Warning: {len(oversized)} chapters cannot be split and are projected over "
+                      f"the budget: {', '.join(oversized[:3])}")
+            if self.parallel_render:
+                print("  Parallel render: fragments are laid out one at a time under --max-memory")
+            with RssSampler() as sampler:
+                summary = self.render_fragments(fragments, output_path)
+            batch_count = len(fragments)
+            rendered = set(summary['rendered'])
+            layout_bytes = max([size for (name, _), size in zip(fragments, fragment_sizes)
+                                if name in rendered] + [0])
+
+        self.last_memory = {'budget': self.max_memory, 'projected': projected, 'start': sampler.start,
+                            'peak': sampler.peak, 'batches': batch_count}
+        print(f"  Layout memory: peak {format_memory_size(sampler.peak)} of {format_memory_size(self.max_memory)} "
+              f"({batch_count} {'batch' if batch_count == 1 else 'batches'}, {sampler.samples} samples)")
+        recalibrated = self.memory_model.record(layout_bytes, sampler.start, sampler.peak)
+        if sampler.peak is not None and sampler.peak > self.max_memory:
+            # Fragments of incremental and parallel builds are whole chapters, they cannot shrink
+            hint = "" if fragmented or not recalibrated else \
+                "; the memory model was recalibrated, the next build uses smaller batches"
+            print(f"  Warning: the layout exceeded --max-memory{hint}")
+
+    def nav_size_units(self):
+        """Return [(section_name, [(title, anchor_id)])] for every nav section, in book order"""
+        units = []
+
+        def collect(nav_items, files):
+            for item in nav_items:
+                if isinstance(item, dict):
+                    for title, path in item.items():
+                        if isinstance(path, str) and path in self.path_to_anchor:
+                            files.append((title, self.path_to_anchor[path]))
+                        elif isinstance(path, list):
+                            collect(path, files)
+
+        for section in self.nav_structure:
+            if isinstance(section, dict):
+                for section_name, items in section.items():
+                    items = self.filter_nav_items(items)
+                    if section_name != "Home" and isinstance(items, list):
+                        files = []
+                        collect(items, files)
+                        units.append((section_name, files))
+        return units
+
+    def optimize_output(self, output_path):
+        """Shrink the written PDF and report which nav sections its bytes belong to"""
+        with self.stage('PDF optimize'):
+            result = optimize_pdf(output_path)
+        merged = "duplicate objects merged" if result['merged'] is None else \
+            f"{result['merged']} duplicate objects merged"
+        print(f"  Optimized ({result['backend']}): {result['before'] / 1024 / 1024:.2f} MB -> "
+              f"{result['after'] / 1024 / 1024:.2f} MB, {merged}"
+              f"{', linearized' if result['linearized'] else ''}")
+        if result['skipped']:
+            print(f"  Skipped without pikepdf: {' and '.join(result['skipped'])} (pip install pikepdf)")
+
+        with self.stage('PDF size report'):
+            attribution = PdfSizeAttribution(output_path)
+            sections, files = [("Front matter", 0)], [("Front matter", 0)]
+            for section_name, section_files in self.nav_size_units():
+                starts = [(title, self.anchor_pages[anchor]) for title, anchor in section_files
+                          if anchor in self.anchor_pages]
+                if starts:
+                    sections.append((section_name, starts[0][1]))
+                    files.extend(starts)
+            section_rows, shared = attribution.by_units(sections)
+            file_rows, _ = attribution.by_units(files)
+
+        total = attribution.stream_bytes
+        print(f"  Size by section (decoded stream bytes, share of {total / 1024 / 1024:.2f} MB of streams "
+              f"in the {attribution.file_bytes / 1024 / 1024:.2f} MB file):")
+        if attribution.undecodable:
+            print(f"    {attribution.undecodable} streams with filters pypdf cannot decode are not counted")
+        for line in format_size_rows(section_rows, total):
+            print(f"    {line}")
+        print(f"    {'Shared (fonts, ...)':<40} {'':>11} {shared / 1024 / 1024:>8.2f} MB "
+              f"{shared * 100 / total if total else 0:>5.1f}%")
+        print("  Heaviest recipes:")
+        for line in format_size_rows(file_rows[1:], total, limit=10):
+            print(f"    {line}")
+
+    def generate_html_preview(self, changed_paths=None):
+        """Write a chaptered static HTML preview instead of a PDF, skipping WeasyPrint"""
+        marks = self.profiler_marks()
+        print("\n" + "=" * 60)
+        print(f"  {self.project['icon']} {self.project['name']} (HTML preview)")
+        print("=" * 60)
+
+        front_matter, chapters = self.build_document_parts(changed_paths=changed_paths)
+        # Like a partial PDF, a partial preview must never replace the full one
+        partial = '_partial' if self.selected_paths is not None else ''
+        preview_dir = os.path.join(self.output_dir, f"{self.edition}{partial}_preview")
+        with self.stage('HTML preview write'):
+            summary = write_html_preview(preview_dir, self.project['name'], self.build_css_text(),
+                                         front_matter, chapters)
+
+        print(f"\n  Preview generated: {summary['index']}")
+        print(f"  Pages: {summary['pages']} ({summary['written']} updated)")
+        self.record_build(marks, summary['bytes'], changed_paths)
+        return summary['index']
+
+    def generate_pdf(self, output_filename=None, changed_paths=None):
         """Generate PDF file"""
+        marks = self.profiler_marks()
         if output_filename is None:
             output_filename = self.project['output_file']
+            # A partial build must never replace the full book
+            if self.selected_paths is not None:
+                output_filename = output_filename.replace('.pdf', '.partial.pdf')
 
         print("\n" + "=" * 60)
         print(f"  {self.project['icon']} {self.project['name']}")
@@ -1362,32 +2100,46 @@ class UnifiedPDFConverter:
         print(f"  Cache: {'Enabled' if self.use_cache else 'Disabled'}")
         print(f"  Validation: {'Enabled' if self.validate else 'Disabled'}")
         print(f"  Auto-fix: {'Enabled' if self.auto_fix else 'Disabled'}")
+        print(f"  Incremental: {'Enabled' if self.incremental else 'Disabled'}")
+        print(f"  Parallel render: {'Enabled' if self.parallel_render else 'Disabled'}")
         print("=" * 60)
 
-        html_content = self.merge_docs_files_parallel()
-        css_styles = self.create_css_styles()
+        fragmented = self.incremental or self.parallel_render
+        # A memory-bounded layout needs the chapters, cut at every page-breaking section, to batch them
+        bounded = self.max_memory is not None
+        front_matter, chapters = self.build_document_parts(split_sections=self.parallel_render or
+                                                           (bounded and not fragmented),
+                                                           stream=not (fragmented or bounded),
+                                                           changed_paths=changed_paths)
 
         output_path = os.path.join(self.output_dir, output_filename)
+        html_path = os.path.join(self.output_dir, f"{self.edition}_debug.html")
+
+        # The debug HTML doubles as WeasyPrint's input for single-pass layout
+        with self.stage('HTML assembly + write'):
+            self.write_html_document(html_path, front_matter, chapters)
 
         try:
             print("\n  Rendering PDF...")
-            html_doc = HTML(string=html_content)
-            html_doc.write_pdf(
-                output_path,
-                stylesheets=[css_styles],
-                font_config=self.font_config
-            )
+            if bounded:
+                self.render_pdf_bounded(html_path, front_matter, chapters, output_path)
+            elif fragmented:
+                self.render_pdf_fragmented(front_matter, chapters, output_path)
+            else:
+                self.render_pdf(html_path, output_path)
+
+            if self.optimize:
+                self.optimize_output(output_path)
 
             file_size_mb = os.path.getsize(output_path) / 1024 / 1024
 
             print(f"\n  PDF generated successfully!")
             print(f"  Output: {output_path}")
             print(f"  Size: {file_size_mb:.2f} MB")
-
-            # Save debug HTML
-            html_path = os.path.join(self.output_dir, f"{self.project_key}_debug.html")
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            print(f"  Debug HTML: {html_path}")
+            for line in format_font_report(output_path, self.font_faces):
+                print(f"  {line}")
+            self.record_build(marks, os.path.getsize(output_path), changed_paths)
 
             print("\n" + "=" * 60)
             print("  Features included:")
@@ -1407,13 +2159,568 @@ class UnifiedPDFConverter:
             traceback.print_exc()
             return None
 
+    def profiler_marks(self):
+        """Return (stage count, worker event count, start time) marking the start of a build"""
+        return len(self.profiler.stages), len(self.profiler.worker_events), time.time()
+
+    def record_build(self, marks, output_bytes, changed_paths=None):
+        """Add the build profiled since marks to the build history
+
+        Partial builds and watch mode rebuilds are stored flagged as partial,
+        they say little about the time of the whole book.
+        """
+        stage_mark, event_mark, start = marks
+        # Another project may be building on a second thread of the same profiler
+        stages = [event for event in self.profiler.stages[stage_mark:]
+                  if event['args'].get('project') == self.project_key]
+        worker_events = [event for event in self.profiler.worker_events[event_mark:]
+                         if event['args'].get('project') == self.project_key]
+        mode = {'format': self.output_format, 'render_mode': self.render_mode,
+                'workers': self.workers, 'use_cache': self.use_cache,
+                'partial': self.selected_paths is not None or changed_paths is not None,
+                'output_bytes': output_bytes}
+        record = build_record(self.project_key, mode, stages, worker_events, time.time() - start,
+                              fragments=self.last_fragments, edition=self.edition)
+        try:
+            self.history.record(record)
+        except sqlite3.Error as e:
+            print(f"  Build history not updated: {e}")
+
+    def plan_build(self):
+        """Print what a build would re-render and estimate its stage times, without rendering
+
+        Pages are hashed exactly like the markdown workers hash them and looked
+        up in the render cache; fragmented builds also hash every chapter
+        against the fragment store. Stage times come from the last comparable
+        build in the build history.
+        """
+        self.prepare()
+        files_to_process = self.collect_files_to_process()
+        cached_paths = self.render_cache.paths() if self.render_cache else set()
+
+        results = {}
+        to_render = []
+        for _, path, counter in files_to_process:
+            file_path = os.path.join(self.docs_dir, path)
+            with open(file_path, 'rb') as f:
+                raw_content = f.read()
+            content = raw_content.decode('utf-8')
+            key = page_render_key(raw_content, content, path, self.link_index,
+                                  self.recipe_numbers, os.path.dirname(file_path), self.renderer_version)
+            cached = self.render_cache.get(key) if self.render_cache else None
+            if cached is not None:
+                results[counter] = (cached[0], path)
+                continue
+            if not self.render_cache:
+                reason = 'cache disabled'
+            else:
+                reason = 'changed' if path in cached_paths else 'new'
+            to_render.append((path, reason))
+            # Stand-in HTML: a chapter holding a page that is not rendered yet never matches a fragment
+            results[counter] = (f"<!-- not rendered yet: {path} -->", path)
+
+        pages_cached = len(results) - len(to_render)
+        print("\n" + "=" * 60)
+        print(f"  Build plan: {self.project['name']} ({self.output_format}, {self.render_mode})")
+        print("=" * 60)
+        print(f"  Pages: {len(results)} to build, {len(to_render)} to render, {pages_cached} from cache")
+        for path, reason in to_render:
+            print(f"    render  {path} ({reason})")
+
+        fragments_to_render = None
+        if self.output_format == 'pdf' and (self.incremental or self.parallel_render):
+            front_matter = self.create_cover_page() + self.create_table_of_contents()
+            chapters = self.build_chapters(results, split_sections=self.parallel_render)
+            rendered, cached = plan_fragments(self.fragment_documents(front_matter, chapters),
+                                              self.build_css_text(), self.fragments_dir,
+                                              reuse=self.use_cache or self.incremental)
+            fragments_to_render = len(rendered)
+            print(f"  Fragments: {len(rendered)} to lay out, {len(cached)} cached")
+            for name in rendered:
+                print(f"    layout  {name}")
+            if to_render:
+                print("  (assuming the pages to render leave the stylesheet unchanged)")
+
+        record = self.history.latest(self.edition, self.output_format, self.render_mode)
+        if record is None:
+            print("  Estimate: no recorded build of this kind yet, run one build first")
+            return {'to_render': to_render, 'pages_cached': pages_cached,
+                    'fragments_to_render': fragments_to_render, 'estimate': None}
+
+        estimates = estimate_build(record, len(to_render), pages_cached, self.workers,
+                                   fragments_to_render)
+        if not self.optimize:
+            estimates = [(stage, seconds) for stage, seconds in estimates
+                         if stage not in ('PDF optimize', 'PDF size report')]
+        elif 'PDF optimize' not in record['stages']:
+            estimates.append(('PDF optimize', None))
+        built = datetime.fromtimestamp(record['timestamp'])
+        print(f"  Estimated time (from the {record['render_mode']} build of {built:%Y-%m-%d %H:%M}, "
+              f"{record['workers']} workers):")
+        for stage, seconds in estimates:
+            print(f"    {stage:<36} {'no history' if seconds is None else f'{seconds:.2f}s':>10}")
+        known = [seconds for _, seconds in estimates if seconds is not None]
+        total = sum(known)
+        print(f"    {'total':<36} {total:>9.2f}s{' +' if len(known) < len(estimates) else ''}")
+        if self.selected_paths is not None:
+            print("  (layout and assembly times are those of the whole book)")
+        return {'to_render': to_render, 'pages_cached': pages_cached,
+                'fragments_to_render': fragments_to_render, 'estimate': total}
+
 
 # ============================================================================
 # Main Function
 # ============================================================================
 
+def generate_project_pdf(converter, output_filename=None, changed_paths=None):
+    """Build one project's PDF (or HTML preview), returns True on success"""
+    try:
+        if converter.output_format == 'html':
+            return bool(converter.generate_html_preview(changed_paths))
+        return bool(converter.generate_pdf(output_filename, changed_paths))
+    except Exception as e:
+        print(f"  Error generating {converter.project_key} PDF: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def generate_projects(converters, executor, output_filename=None, changed_paths=None):
+    """Build several projects on one shared pool, returns a success flag per project
+
+    changed_paths maps project_key to the nav paths to re-render, or None for
+    a full build of that project.
+    """
+    changed_paths = changed_paths or {}
+    for converter in converters:
+        converter.executor = executor
+
+    def build(converter):
+        return generate_project_pdf(converter, output_filename,
+                                    changed_paths.get(converter.project_key))
+
+    if len(converters) == 1:
+        return [build(converters[0])]
+    # Overlap the projects: one project's layout runs in the pool
+    # while the other's markdown stage is fed from its own thread
+    with ThreadPoolExecutor(max_workers=len(converters)) as project_threads:
+        return list(project_threads.map(build, converters))
+
+
+def watch_projects(converters, executor, workers, output_filename=None):
+    """Rebuild on every debounced change to docs/ or mkdocs.yml until Ctrl+C
+
+    The pool, imports and loaded nav stay warm between builds. A changed
+    markdown file only re-renders that file, a changed image the pages that
+    embed it; a changed mkdocs.yml reloads the nav and restarts the pool,
+    since workers hold the link index it produced.
+    Returns the pool in use when watching stops.
+    """
+    watch_paths = []
+    for converter in converters:
+        watch_paths += [converter.docs_dir, converter.mkdocs_file]
+    watcher = ChangeWatcher(watch_paths)
+    print(f"\n  Watching {len(converters)} project(s) for changes ({watcher.backend}), "
+          f"press Ctrl+C to stop")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            print("\n" + "=" * 60)
+            print(f"  {len(changed)} file(s) changed: "
+                  f"{', '.join(sorted(os.path.basename(path) for path in changed)[:5])}")
+
+            changed_paths = {}
+            nav_changed = False
+            for converter in converters:
+                if os.path.abspath(converter.mkdocs_file) in changed:
+                    converter.reset_navigation()
+                    nav_changed = True
+                    if converter.prepare():
+                        changed_paths[converter.project_key] = None
+                    else:
+                        print(f"  No navigation found for {converter.project_key}, waiting for a fix")
+                    continue
+                docs_dir = os.path.abspath(converter.docs_dir) + os.sep
+                paths = {os.path.relpath(path, docs_dir).replace(os.sep, '/')
+                         for path in changed if path.startswith(docs_dir)}
+                if any(path.lower().endswith(IMAGE_EXTENSIONS) for path in paths):
+                    # Image states are part of the cache keys, so only the pages embedding it re-render
+                    changed_paths[converter.project_key] = None
+                elif paths:
+                    changed_paths[converter.project_key] = paths
+
+            if nav_changed:
+                executor.shutdown()
+                executor = create_worker_pool(workers, converters)
+
+            affected = [converter for converter in converters if converter.project_key in changed_paths]
+            if not affected:
+                continue
+            start = time.time()
+            results = generate_projects(affected, executor, output_filename, changed_paths)
+            status = "Rebuilt" if all(results) else "Rebuild failed"
+            print(f"  {status} in {time.time() - start:.2f}s, watching for changes...")
+    except KeyboardInterrupt:
+        print("\n  Stopped watching")
+    finally:
+        watcher.close()
+    return executor
+
+
+def check_dependencies(output_format='pdf', plan=False, fragmented=False, markdown_backend=DEFAULT_BACKEND):
+    """Check what a build needs without importing it, returns False if something is missing"""
+    # WeasyPrint is only loaded where a layout actually runs,
+    # which with a worker pool is never this process
+    backend = get_backend(markdown_backend)
+    required = [backend.module, 'yaml']
+    if output_format == 'pdf' and not plan:
+        required.append('weasyprint')
+    missing = [name for name in required if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"  Missing dependency: {', '.join(missing)}")
+        print(f"  Run: pip install {backend.distribution} weasyprint pillow pyyaml")
+        return False
+    print("  Dependencies OK")
+
+    if output_format == 'pdf' and not plan and fragmented:
+        if importlib.util.find_spec('pypdf') is None:
+            print("  Missing dependency for fragment rendering / --optimize: pypdf")
+            print("  Run: pip install pypdf")
+            return False
+    return True
+
+
+def build_projects(project_keys, output_filename=None, project_overrides=None, workers=None,
+                   plan=False, list_sections=False, watch=False, profile=None, **options):
+    """Build cookbooks on one shared worker pool, the entry point of every PDF CLI
+
+    options go to UnifiedPDFConverter (validate, auto_fix, use_cache,
+    incremental, parallel_render, output_format, optimize, section_filter,
+    path_filter, part_filter, content_hooks, markdown_backend, max_memory).
+    project_overrides maps a project key to entries replacing those of its
+    PROJECTS config, such as the recipe numbering or output file of a
+    per-project edition; an "edition" entry gives the edition caches,
+    fragments and build history of its own.
+    Returns the exit status.
+    """
+    project_overrides = project_overrides or {}
+    fragmented = (options.get('incremental') or options.get('parallel_render') or options.get('optimize')
+                  or options.get('max_memory'))
+    if not list_sections and not check_dependencies(options.get('output_format', 'pdf'), plan, fragmented,
+                                                    options.get('markdown_backend', DEFAULT_BACKEND)):
+        return 1
+
+    # Create output directory
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    profiler = StageProfiler()
+
+    success = True
+    converters = []
+    for project_key in project_keys:
+        try:
+            project_config = None
+            if project_key in project_overrides:
+                project_config = {**PROJECTS[project_key], **project_overrides[project_key]}
+            converter = UnifiedPDFConverter(
+                project_key=project_key,
+                workers=workers,
+                profiler=profiler,
+                project_config=project_config,
+                keep_results=watch,
+                **options
+            )
+
+            if list_sections:
+                if converter.load_navigation_structure():
+                    converter.list_sections()
+                continue
+
+            nav = converter.prepare()
+            if not nav:
+                print(f"  No navigation found for {project_key}")
+                success = False
+                continue
+            if converter.selected_paths == set():
+                print(f"  No pages of {project_key} match --sections/--parts/--paths, skipping")
+                continue
+            converters.append(converter)
+
+        except Exception as e:
+            print(f"  Error loading {project_key} project: {e}")
+            import traceback
+            traceback.print_exc()
+            success = False
+
+    if list_sections:
+        return 0 if success else 1
+
+    # A plan only hashes inputs and reads the caches: no pool, no WeasyPrint
+    if plan:
+        for converter in converters:
+            converter.plan_build()
+        return 0 if success else 1
+
+    # One pool for every project, started after the link indexes it ships are built
+    if converters:
+        workers = workers or os.cpu_count()
+        executor = create_worker_pool(workers, converters)
+        try:
+            results = generate_projects(converters, executor, output_filename)
+            success = success and all(results)
+            if watch:
+                executor = watch_projects(converters, executor, workers, output_filename)
+        finally:
+            executor.shutdown()
+
+    if options.get('max_memory') and converters and not plan:
+        worker_peak = max([event['peak_rss'] or 0 for event in profiler.worker_events] + [0])
+        print("\n" + "=" * 60)
+        print(f"  Peak memory (budget {format_memory_size(options['max_memory'])}):")
+        print(f"    Main process: {format_memory_size(peak_rss_bytes())}")
+        print(f"    Workers:      {format_memory_size(worker_peak or None)}")
+        for converter in converters:
+            if converter.last_memory:
+                batches = converter.last_memory['batches']
+                print(f"    {converter.project_key} layout: {format_memory_size(converter.last_memory['peak'])} "
+                      f"in {batches} {'batch' if batches == 1 else 'batches'}")
+
+    if profile:
+        profiler.write_chrome_trace(profile)
+        print("\n" + "=" * 60)
+        print("  Build profile:")
+        print(profiler.summary_table())
+        print(f"\n  Chrome trace: {profile}")
+
+    print("\n" + "=" * 60)
+    if success:
+        print("  All PDFs generated successfully!")
+        print(f"  Output directory: {OUTPUT_DIR}")
+    else:
+        print("  Some PDFs failed to generate")
+    print("=" * 60)
+
+    return 0 if success else 1
+
+
+def select_editions(names, project):
+    """Names among names of the project and its editions (e.g. android, android_final), every one for 'all'"""
+    return sorted(name for name in names
+                  if project == 'all' or name == project or name.startswith(f"{project}_"))
+
+
+def edition_title(name):
+    """Display name of a project or of one of its editions"""
+    if name in PROJECTS:
+        return PROJECTS[name]['name']
+    project_key = name.split('_', 1)[0]
+    return f"{PROJECTS[project_key]['name']} - {name}" if project_key in PROJECTS else name
+
+
+def cached_editions():
+    """Every project, and every edition with a render cache or fragments under output/.cache"""
+    names = set(PROJECTS)
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            cache_dir = os.path.join(CACHE_DIR, name)
+            if (os.path.exists(os.path.join(cache_dir, CACHE_DB_NAME))
+                    or os.path.isdir(os.path.join(cache_dir, "fragments"))):
+                names.add(name)
+    return names
+
+
+def run_stats_command(argv):
+    """`generate_pdf.py stats`: recent builds, metric trends and regressions per project
+
+    Returns 1 when the last full build of a project regressed, so CI can fail on it.
+    """
+    parser = argparse.ArgumentParser(prog='generate_pdf.py stats',
+                                     description='Show recorded builds and flag regressions')
+    parser.add_argument('project', nargs='?', choices=['android', 'web', 'all'], default='all',
+                        help='Project to show, with its editions (default: all)')
+    parser.add_argument('--limit', '-n', type=int, default=10,
+                        help='Number of recent builds to list per project (default: 10)')
+    parser.add_argument('--partial', action='store_true',
+                        help='Also list partial and watch mode builds')
+    args = parser.parse_args(argv)
+
+    history = BuildHistory(CACHE_DIR)
+    projects = select_editions(history.projects(), args.project)
+    if not projects:
+        print(f"  No builds recorded yet in {history.db_path}")
+        return 0
+
+    regressed = False
+    for project_key in projects:
+        records = history.records(project_key, limit=args.limit, include_partial=args.partial)
+        full_builds = history.records(project_key)
+        print("\n" + "=" * 60)
+        print(f"  {edition_title(project_key)}")
+        print("=" * 60)
+        if not records:
+            print("  No builds recorded")
+            continue
+        for line in format_build_rows(records):
+            print(f"  {line}")
+        if args.partial:
+            print("  (* partial or watch mode build)")
+
+        comparable = comparable_builds(full_builds)
+        trend = format_metric_trend(comparable)
+        if trend:
+            print(f"\n  Seconds per stage, last {min(len(comparable), 5)} full "
+                  f"{comparable[-1]['format']}/{comparable[-1]['render_mode']} builds (oldest first):")
+            for line in trend:
+                print(f"    {line}")
+
+        regressions = find_regressions(full_builds)
+        if regressions:
+            regressed = True
+            print("\n  Regressions in the last build:")
+            for metric, seconds, baseline in regressions:
+                print(f"    {metric}: {seconds:.2f}s, median of earlier builds {baseline:.2f}s")
+        elif len(full_builds) > 1:
+            print("\n  No regressions in the last build")
+
+    return 1 if regressed else 0
+
+
+def cache_problems(cache, image_dir):
+    """Return [(key or None, problem)] of a render cache, including pages whose images are gone"""
+    problems = cache.verify()
+    existing = set(os.listdir(image_dir)) if os.path.isdir(image_dir) else set()
+    for key, path, html in cache.iter_entries():
+        missing = referenced_images(html) - existing
+        if missing:
+            problems.append((key, f"{path}: {len(missing)} optimized image(s) missing"))
+    return problems
+
+
+def run_cache_command(argv):
+    """`generate_pdf.py cache`: show, bound, clear or verify the caches under output/.cache
+
+    Returns 1 when verify finds problems.
+    """
+    parser = argparse.ArgumentParser(prog='generate_pdf.py cache',
+                                     description='Manage the render, fragment and image caches')
+    parser.add_argument('action', choices=['stats', 'prune', 'clear', 'verify'],
+                        help='stats: sizes and hit rates, prune: apply the bounds and drop broken or '
+                             'unreferenced entries, clear: delete everything, verify: check integrity')
+    parser.add_argument('project', nargs='?', choices=['android', 'web', 'all'], default='all',
+                        help='Project whose caches to manage, with its editions (default: all)')
+    parser.add_argument('--max-size', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024, metavar='MB',
+                        help=f'prune: keep at most this much cached HTML and code per project '
+                             f'(default: {DEFAULT_MAX_BYTES // 1024 // 1024})')
+    parser.add_argument('--max-fragment-size', type=float, default=DEFAULT_MAX_FRAGMENT_BYTES / 1024 / 1024,
+                        metavar='MB', help=f'prune: keep at most this much of PDF fragments per project '
+                                           f'(default: {DEFAULT_MAX_FRAGMENT_BYTES // 1024 // 1024})')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE_DAYS, metavar='DAYS',
+                        help=f'prune: drop entries and fragments not used for this many days '
+                             f'(default: {DEFAULT_MAX_AGE_DAYS})')
+    args = parser.parse_args(argv)
+
+    projects = select_editions(cached_editions(), args.project)
+    image_dir = os.path.join(CACHE_DIR, "images")
+    problem_count = 0
+
+    for project_key in projects:
+        cache_dir = os.path.join(CACHE_DIR, project_key)
+        fragments = FragmentStore(os.path.join(cache_dir, "fragments"), readonly=True)
+        print("\n" + "=" * 60)
+        print(f"  {edition_title(project_key)} ({cache_dir})")
+        print("=" * 60)
+        cache = RenderCache(cache_dir) if os.path.exists(os.path.join(cache_dir, CACHE_DB_NAME)) else None
+        if cache is None:
+            print("  No render cache")
+        try:
+            if args.action == 'stats':
+                if cache is not None:
+                    stats = cache.stats()
+                    lookups = stats['hits'] + stats['misses']
+                    print(f"  Render cache: {stats['entries']} entries for {stats['paths']} pages, "
+                          f"{stats['stored_bytes'] / 1024 / 1024:.2f} MB of HTML records, "
+                          f"{stats['highlights']} code blocks ({stats['highlight_bytes'] / 1024 / 1024:.2f} MB), "
+                          f"{stats['file_bytes'] / 1024 / 1024:.2f} MB on disk")
+                    print(f"  Lookups: {stats['hits']} hits, {stats['misses']} misses"
+                          + (f" ({stats['hits'] * 100 / lookups:.0f}% hit rate)" if lookups else ""))
+                    print(f"  Evicted: {stats['evicted_entries']} entries "
+                          f"({stats['evicted_bytes'] / 1024 / 1024:.2f} MB)")
+                    if stats['entries']:
+                        print(f"  Last used: {datetime.fromtimestamp(stats['oldest_use']):%Y-%m-%d %H:%M} "
+                              f"(oldest) .. {datetime.fromtimestamp(stats['newest_use']):%Y-%m-%d %H:%M}")
+                count, size = fragments.usage()
+                print(f"  Fragments: {count} PDFs, {size / 1024 / 1024:.2f} MB")
+
+            elif args.action == 'prune':
+                if cache is not None:
+                    broken = [key for key, _ in cache_problems(cache, image_dir) if key is not None]
+                    cache.remove(broken)
+                    evicted = cache.prune(int(args.max_size * 1024 * 1024), args.max_age)
+                    cache.vacuum()
+                    print(f"  Render cache: {evicted['entries']} entries evicted "
+                          f"({evicted['bytes'] / 1024 / 1024:.2f} MB), {len(broken)} broken entries and "
+                          f"{evicted['highlights']} stale code blocks removed")
+                broken_fragments = [name for name, _ in fragments.verify()]
+                removed = fragments.remove(broken_fragments)
+                evicted = fragments.prune(int(args.max_fragment_size * 1024 * 1024), args.max_age)
+                print(f"  Fragments: {evicted['fragments']} evicted ({evicted['bytes'] / 1024 / 1024:.2f} MB), "
+                      f"{removed} broken files removed")
+
+            elif args.action == 'clear':
+                if cache is not None:
+                    cache.clear()
+                    print("  Render cache cleared")
+                if os.path.isdir(fragments.fragments_dir):
+                    shutil.rmtree(fragments.fragments_dir)
+                    print("  Fragments cleared")
+
+            elif args.action == 'verify':
+                problems = cache_problems(cache, image_dir) if cache is not None else []
+                problems += [(None, f"fragments/{name}: {problem}") for name, problem in fragments.verify()]
+                for _, problem in problems[:20]:
+                    print(f"  - {problem}")
+                if len(problems) > 20:
+                    print(f"    ... and {len(problems) - 20} more")
+                print(f"  {len(problems)} problem(s) found" if problems else "  No problems found")
+                problem_count += len(problems)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    # Optimized images are shared by the projects, so the pages of every project and edition are checked
+    count, size = image_cache_usage(image_dir)
+    if args.action == 'stats':
+        print(f"\n  Images (shared): {count} files, {size / 1024 / 1024:.2f} MB")
+    elif args.action == 'prune':
+        keep = set()
+        for project_key in cached_editions():
+            db_dir = os.path.join(CACHE_DIR, project_key)
+            if os.path.exists(os.path.join(db_dir, CACHE_DB_NAME)):
+                cache = RenderCache(db_dir)
+                try:
+                    for _, _, html in cache.iter_entries():
+                        keep |= referenced_images(html)
+                finally:
+                    cache.close()
+        removed, removed_bytes = prune_image_cache(image_dir, keep)
+        print(f"\n  Images (shared): {removed} unreferenced files removed "
+              f"({removed_bytes / 1024 / 1024:.2f} MB), {count - removed} kept")
+    elif args.action == 'clear' and args.project == 'all' and os.path.isdir(image_dir):
+        shutil.rmtree(image_dir)
+        print("\n  Images cleared")
+
+    return 1 if problem_count else 0
+
+
 def main():
     """Main entry point"""
+    # Maintenance commands parse their own arguments
+    if len(sys.argv) > 1 and sys.argv[1] == 'stats':
+        return run_stats_command(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        return run_cache_command(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description='Unified PDF Generator for Reverse Engineering Cookbooks',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1425,6 +2732,21 @@ Examples:
   %(prog)s android -w 8             # Use 8 worker processes
   %(prog)s web --no-cache           # Disable cache
   %(prog)s all --fix-files          # Auto-fix format issues
+  %(prog)s android --incremental    # Only re-layout changed sections
+  %(prog)s all --parallel-render    # Lay out chapters on all cores
+  %(prog)s android --profile out.json  # Per-stage timings + Chrome trace
+  %(prog)s android --watch --incremental  # Rebuild on save
+  %(prog)s web --format html        # Fast HTML preview, no WeasyPrint
+  %(prog)s all --optimize           # Smaller, linearized PDFs + size report
+  %(prog)s web --sections 3         # Partial build of one nav section
+  %(prog)s android --paths 01-Recipes/Network/  # Partial build of some pages
+  %(prog)s web --parts 1-2          # Partial build of the first two parts (see --list)
+  %(prog)s web --translate          # Code comments translated to English
+  %(prog)s web --markdown-backend markdown-it  # Another markdown parser
+  %(prog)s android --plan           # Dry run: what would re-render, how long
+  %(prog)s android --max-memory 2G  # Lay out in chapter batches to stay under 2 GB
+  %(prog)s stats                    # Build history trends, flags regressions
+  %(prog)s cache stats              # Cache sizes and hit rates (also: prune, clear, verify)
         """
     )
     parser.add_argument('project', choices=['android', 'web', 'all'],
@@ -1439,8 +2761,40 @@ Examples:
                        help='Auto-fix format issues')
     parser.add_argument('--workers', '-w', type=int,
                        help='Number of parallel workers (default: CPU count)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Render each nav section to a cached PDF fragment and only re-layout changed sections')
+    parser.add_argument('--parallel-render', action='store_true',
+                       help='Lay out chapters concurrently across the worker pool and merge them')
+    parser.add_argument('--profile', type=str, metavar='TRACE_JSON',
+                       help='Record per-stage wall/CPU/RSS and write a Chrome trace-event file')
+    parser.add_argument('--format', choices=['pdf', 'html'], default='pdf',
+                       help='Output format: pdf (default) or a chaptered HTML preview that skips WeasyPrint')
+    parser.add_argument('--sections', '-s', type=str,
+                       help='Only build these top-level nav sections (indexes or name fragments, comma separated)')
+    parser.add_argument('--paths', type=str,
+                       help='Only build these docs pages (paths, directories or glob patterns, comma separated)')
+    parser.add_argument('--parts', type=str,
+                       help='Only build these parts, the top-level nav groups numbered from 1 (e.g. "1-2" or "1,3")')
+    parser.add_argument('--list', action='store_true',
+                       help='List the top-level nav sections with their --sections index and --parts number')
+    parser.add_argument('--translate', action='store_true',
+                       help='Translate Chinese comments in code blocks to English')
+    parser.add_argument('--markdown-backend', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                       help=f'Markdown parser of the workers (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--optimize', action='store_true',
+                       help='Deduplicate, compress and linearize the PDF and report its size per nav section')
+    parser.add_argument('--plan', action='store_true',
+                       help='Only print which pages/fragments would be re-rendered and an estimated build time')
+    parser.add_argument('--max-memory', type=str, metavar='SIZE',
+                       help='Keep the layout under this RSS (e.g. 2G, 1500M), splitting it into chapter batches')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep running and rebuild when docs/ or mkdocs.yml change')
 
     args = parser.parse_args()
+    try:
+        max_memory = parse_memory_size(args.max_memory)
+    except ValueError as e:
+        parser.error(str(e))
 
     print("=" * 60)
     print("  Reverse Engineering Cookbook - PDF Generator")
@@ -1455,64 +2809,29 @@ Examples:
     print("    - Unified output directory")
     print("=" * 60)
 
-    # Check dependencies
-    try:
-        import mistune
-        import weasyprint
-        import yaml
-        print("  Dependencies OK")
-    except ImportError as e:
-        print(f"  Missing dependency: {e}")
-        print("  Run: pip install mistune weasyprint pillow pyyaml")
-        return 1
-
-    # Create output directory
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    projects_to_generate = []
-    if args.project == 'all':
-        projects_to_generate = ['android', 'web']
-    else:
-        projects_to_generate = [args.project]
-
-    success = True
-    for project_key in projects_to_generate:
-        try:
-            converter = UnifiedPDFConverter(
-                project_key=project_key,
-                validate=not args.skip_validation,
-                auto_fix=args.fix_files,
-                use_cache=not args.no_cache,
-                workers=args.workers
-            )
-
-            nav = converter.load_navigation_structure()
-            if not nav:
-                print(f"  No navigation found for {project_key}")
-                success = False
-                continue
-
-            output_filename = args.output if args.output and len(projects_to_generate) == 1 else None
-            result = converter.generate_pdf(output_filename)
-
-            if not result:
-                success = False
-
-        except Exception as e:
-            print(f"  Error generating {project_key} PDF: {e}")
-            import traceback
-            traceback.print_exc()
-            success = False
-
-    print("\n" + "=" * 60)
-    if success:
-        print("  All PDFs generated successfully!")
-        print(f"  Output directory: {OUTPUT_DIR}")
-    else:
-        print("  Some PDFs failed to generate")
-    print("=" * 60)
-
-    return 0 if success else 1
+    project_keys = ['android', 'web'] if args.project == 'all' else [args.project]
+    return build_projects(
+        project_keys,
+        output_filename=args.output if args.output and len(project_keys) == 1 else None,
+        workers=args.workers,
+        plan=args.plan,
+        list_sections=args.list,
+        watch=args.watch,
+        profile=args.profile,
+        validate=not args.skip_validation,
+        auto_fix=args.fix_files,
+        use_cache=not args.no_cache,
+        incremental=args.incremental,
+        parallel_render=args.parallel_render,
+        output_format=args.format,
+        optimize=args.optimize,
+        section_filter=parse_section_filter(args.sections),
+        path_filter=parse_path_filter(args.paths),
+        part_filter=parse_part_filter(args.parts),
+        content_hooks=[CommentTranslator()] if args.translate else None,
+        markdown_backend=args.markdown_backend,
+        max_memory=max_memory
+    )
 
 
 if __name__ == "__main__":
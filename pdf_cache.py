@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Render Cache
+
+Content-addressed cache for the markdown -> HTML stage of generate_pdf.py.
+
+Each entry is keyed by a digest of every input that affects the rendered
+HTML (file bytes, nav path, recipe number, resolved link targets, referenced
+image files and the renderer version), so reordering the nav no longer
+invalidates entries and changing the link map or the markdown parser can
+never serve stale HTML.
+
+All entries live in a single SQLite database per project instead of one
+pickle per file, so a lookup is an indexed query on an already open
+connection rather than an open() per file. Entries also carry the format
+diagnostics found while rendering, so a cache hit needs no re-validation.
+The same database memoizes highlighted code blocks (see pdf_highlight.py)
+in a second table.
+
+The cache is bounded: after every build, pages and highlighted code blocks
+not used for DEFAULT_MAX_AGE_DAYS are dropped, then the least recently
+used ones of either kind until both fit in DEFAULT_MAX_BYTES. Workers only
+read, so the main process marks the pages and blocks they hit as used. A
+dropped block is simply lexed again. Lifetime hit, miss and eviction
+counters are kept for `generate_pdf.py cache stats`.
+
+HTML is stored as cache records (encode_record): a small fixed header,
+the digest and version the record was written for (empty in the database,
+where the key already is the digest), then the UTF-8 payload. Unlike
+pickle, loading a record never executes anything, so a shared or copied
+cache directory is safe to read.
+
+Records are stored uncompressed by default: the payload is the plain
+UTF-8 HTML. zlib shrinks the cache to about a third, but inflating makes
+loads 3-4x slower than pickle or TEXT rows (see the measurements in
+benchmarks/bench_cache_format.py), and loads are what every warm build
+waits for. RECORD_COMPRESS_LEVEL 1-9 trades that load time for size;
+compressed records are always readable, whatever the setting. The file
+variant (read_record_file / write_record_file) is for caches kept as one
+file per entry.
+"""
+
+import os
+import json
+import time
+import mmap
+import zlib
+import struct
+import sqlite3
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+CACHE_DB_NAME = "render_cache.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+COUNTERS = ('hits', 'misses', 'evicted_entries', 'evicted_bytes')
+
+# magic, codec, digest length, version length, decoded length
+RECORD_HEADER = struct.Struct('<4sBBHI')
+RECORD_MAGIC = b'RCR1'
+CODEC_RAW, CODEC_ZLIB = 0, 1
+# 0 stores payloads raw, 1-9 zlib-compresses them (smaller, slower to load)
+RECORD_COMPRESS_LEVEL = 0
+# Below this size compression rarely pays for its header
+RECORD_MIN_COMPRESS = 256
+
+
+# ============================================================================
+# Cache Records
+# ============================================================================
+
+def encode_record(html: str, digest: str = '', version: str = '',
+                  compress_level: int = RECORD_COMPRESS_LEVEL) -> bytes:
+    """Serialize html into a cache record carrying its digest and version"""
+    raw = html.encode('utf-8')
+    codec, payload = CODEC_RAW, raw
+    if compress_level and len(raw) >= RECORD_MIN_COMPRESS:
+        compressed = zlib.compress(raw, compress_level)
+        if len(compressed) < len(raw):
+            codec, payload = CODEC_ZLIB, compressed
+    digest_bytes, version_bytes = digest.encode('ascii'), version.encode('utf-8')
+    header = RECORD_HEADER.pack(RECORD_MAGIC, codec, len(digest_bytes), len(version_bytes), len(raw))
+    return b''.join((header, digest_bytes, version_bytes, payload))
+
+
+def decode_record(data, digest: Optional[str] = None, version: Optional[str] = None) -> Optional[str]:
+    """Return the HTML of a cache record, None if it is malformed or digest/version do not match
+
+    data may be any buffer (bytes, mmap, memoryview); the payload is
+    decompressed straight from it without copying the record first.
+    """
+    view = memoryview(data)
+    if len(view) < RECORD_HEADER.size:
+        return None
+    magic, codec, digest_length, version_length, raw_length = RECORD_HEADER.unpack_from(view)
+    if magic != RECORD_MAGIC:
+        return None
+    offset = RECORD_HEADER.size
+    if digest is not None and bytes(view[offset:offset + digest_length]) != digest.encode('ascii'):
+        return None
+    offset += digest_length
+    if version is not None and bytes(view[offset:offset + version_length]) != version.encode('utf-8'):
+        return None
+    payload = view[offset + version_length:]
+    try:
+        raw = zlib.decompress(payload) if codec == CODEC_ZLIB else payload
+    except zlib.error:
+        return None
+    if len(raw) != raw_length:
+        return None
+    return str(raw, 'utf-8')
+
+
+def read_record_file(path: str, digest: Optional[str] = None, version: Optional[str] = None) -> Optional[str]:
+    """Load the HTML of a record file, None if it is missing, stale or malformed"""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return decode_record(mapped, digest, version)
+    except (OSError, ValueError, UnicodeDecodeError):
+        # ValueError: mmap of an empty file
+        return None
+
+
+def write_record_file(path: str, html: str, digest: str = '', version: str = '',
+                      compress_level: int = RECORD_COMPRESS_LEVEL):
+    """Atomically write html as a record file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_record(html, digest, version, compress_level))
+    os.replace(tmp_path, path)
+
+
+def _stored_html(value) -> Optional[str]:
+    """HTML of an entries/highlights column: a record, or plain text in databases written before records"""
+    if isinstance(value, str):
+        return value
+    try:
+        return decode_record(value)
+    except UnicodeDecodeError:
+        return None
+
+
+# ============================================================================
+# Render Cache
+# ============================================================================
+
+
+def compute_render_key(content: bytes, path: str, recipe_number: str,
+                       link_targets: Iterable[Tuple[str, Optional[str]]],
+                       renderer_version: str,
+                       asset_states: Iterable[Tuple[str, str]] = ()) -> str:
+    """Digest every input of a single markdown render into a cache key"""
+    digest = hashlib.sha256()
+    digest.update(renderer_version.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((recipe_number or '').encode('utf-8'))
+    digest.update(b'\0')
+    for link_url, target in link_targets:
+        digest.update(f"{link_url}\x1f{target or ''}\x1e".encode('utf-8'))
+    digest.update(b'\0')
+    for asset, asset_state in asset_states:
+        digest.update(f"{asset}\x1f{asset_state}\x1e".encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """SQLite-backed store of rendered HTML keyed by input digest"""
+
+    def __init__(self, cache_dir: str, readonly: bool = False, compress_level: int = RECORD_COMPRESS_LEVEL):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, CACHE_DB_NAME)
+        self.readonly = readonly
+        self.compress_level = compress_level
+
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                        timeout=30, check_same_thread=False)
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            # WAL lets worker processes read while the main process writes
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    html BLOB NOT NULL,
+                    created REAL NOT NULL,
+                    diagnostics TEXT NOT NULL DEFAULT '[]',
+                    last_used REAL NOT NULL DEFAULT 0,
+                    size INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+            if 'diagnostics' not in columns:
+                # Databases created before diagnostics were cached
+                self.conn.execute("ALTER TABLE entries ADD COLUMN diagnostics TEXT NOT NULL DEFAULT '[]'")
+            if 'last_used' not in columns:
+                # Databases created before the cache was bounded
+                self.conn.execute("ALTER TABLE entries ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                self.conn.execute("ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self.conn.execute("UPDATE entries SET last_used = created, size = length(CAST(html AS BLOB))")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_by_use ON entries (last_used)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS highlights (
+                    key TEXT PRIMARY KEY,
+                    html BLOB NOT NULL,
+                    created REAL NOT NULL DEFAULT 0,
+                    last_used REAL NOT NULL DEFAULT 0
+                )
+            """)
+            highlight_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(highlights)")}
+            if 'created' not in highlight_columns:
+                self.conn.execute("ALTER TABLE highlights ADD COLUMN created REAL NOT NULL DEFAULT 0")
+                self.conn.execute("UPDATE highlights SET created = ?", (time.time(),))
+            if 'last_used' not in highlight_columns:
+                # Databases created before highlights were evicted by use
+                self.conn.execute("ALTER TABLE highlights ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                self.conn.execute("UPDATE highlights SET last_used = created")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            self.conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, List[str]]]:
+        """Return cached (html, diagnostics) for key, or None on a miss"""
+        try:
+            row = self.conn.execute("SELECT html, diagnostics FROM entries WHERE key = ?",
+                                    (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        html = _stored_html(row[0])
+        return (html, json.loads(row[1])) if html is not None else None
+
+    def paths(self) -> Set[str]:
+        """Return every nav path that has at least one cached render"""
+        try:
+            return {row[0] for row in self.conn.execute("SELECT DISTINCT path FROM entries")}
+        except sqlite3.Error:
+            return set()
+
+    def put_many(self, entries: Iterable[Tuple[str, str, str, List[str]]]) -> int:
+        """Store (key, path, html, diagnostics) entries in a single transaction"""
+        now = time.time()
+        rows = []
+        for key, path, html, diagnostics in entries:
+            record = encode_record(html, compress_level=self.compress_level)
+            rows.append((key, path, record, now, json.dumps(diagnostics, ensure_ascii=False), now,
+                         len(record)))
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, path, html, created, diagnostics, last_used, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def touch(self, keys: Iterable[str], highlight_keys: Iterable[str] = ()) -> int:
+        """Mark entries and highlighted blocks served from the cache as used now"""
+        now = time.time()
+        rows = [(now, key) for key in keys]
+        highlight_rows = [(now, key) for key in highlight_keys]
+        if not rows and not highlight_rows:
+            return 0
+        with self.conn:
+            self.conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", rows)
+            self.conn.executemany("UPDATE highlights SET last_used = ? WHERE key = ?", highlight_rows)
+        return len(rows) + len(highlight_rows)
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, str]]:
+        """Yield (key, path, html) of every readable entry"""
+        for key, path, value in self.conn.execute("SELECT key, path, html FROM entries").fetchall():
+            html = _stored_html(value)
+            if html is not None:
+                yield key, path, html
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """Delete the given entries"""
+        rows = [(key,) for key in keys]
+        with self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", rows)
+        return len(rows)
+
+    def get_highlight(self, key: str) -> Optional[str]:
+        """Return a memoized highlighted code block, '' for unknown languages, None on a miss"""
+        try:
+            row = self.conn.execute("SELECT html FROM highlights WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return _stored_html(row[0]) if row else None
+
+    def put_highlights(self, entries: Iterable[Tuple[str, str]]) -> int:
+        """Store (key, highlighted_html) code block entries in a single transaction"""
+        now = time.time()
+        rows = [(key, encode_record(html, compress_level=self.compress_level), now, now)
+                for key, html in entries]
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO highlights (key, html, created, last_used) "
+                                  "VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def count(self, **increments: int):
+        """Add to the lifetime counters, e.g. count(hits=3, misses=1)"""
+        rows = [(name, value) for name, value in increments.items() if value]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                rows
+            )
+
+    def prune(self, max_bytes: int = DEFAULT_MAX_BYTES, max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+              keep: Iterable[str] = ()) -> Dict:
+        """Drop stale entries and blocks, then least recently used ones until the cache fits in max_bytes
+
+        Pages and highlighted blocks share the budget and are evicted in one
+        least recently used order. Keys in keep (the pages and blocks the
+        current build uses) are never dropped. Returns {entries, bytes,
+        highlights}, bytes counting both kinds.
+        """
+        keep = set(keep)
+        cutoff = time.time() - max_age_days * 86400
+        evicted = {'entries': [], 'highlights': []}
+        evicted_bytes = 0
+
+        rows = [(last_used, 'entries', key, size) for key, size, last_used in
+                self.conn.execute("SELECT key, size, last_used FROM entries").fetchall()]
+        rows += [(last_used, 'highlights', key, size) for key, size, last_used in self.conn.execute(
+            "SELECT key, length(CAST(html AS BLOB)), last_used FROM highlights").fetchall()]
+        rows.sort()
+        total = sum(row[3] for row in rows)
+        for last_used, table, key, size in rows:
+            if key in keep:
+                continue
+            if last_used >= cutoff and total <= max_bytes:
+                break
+            evicted[table].append(key)
+            evicted_bytes += size
+            total -= size
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in evicted['entries']])
+            self.conn.executemany("DELETE FROM highlights WHERE key = ?",
+                                  [(key,) for key in evicted['highlights']])
+        self.count(evicted_entries=len(evicted['entries']), evicted_bytes=evicted_bytes)
+        return {'entries': len(evicted['entries']), 'bytes': evicted_bytes,
+                'highlights': len(evicted['highlights'])}
+
+    def stats(self) -> Dict:
+        """Return entry/highlight counts and sizes, lifetime counters and use times"""
+        entries, paths, stored_bytes, oldest, newest = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT path), COALESCE(SUM(size), 0), MIN(last_used), MAX(last_used) "
+            "FROM entries").fetchone()
+        highlights, highlight_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length(CAST(html AS BLOB))), 0) FROM highlights").fetchone()
+        stats = {name: 0 for name in COUNTERS}
+        stats.update(self.conn.execute("SELECT name, value FROM counters").fetchall())
+        file_bytes = sum(os.path.getsize(f"{self.db_path}{suffix}") for suffix in ('', '-wal')
+                         if os.path.exists(f"{self.db_path}{suffix}"))
+        stats.update({'entries': entries, 'paths': paths, 'stored_bytes': stored_bytes,
+                      'highlights': highlights, 'highlight_bytes': highlight_bytes,
+                      'oldest_use': oldest, 'newest_use': newest, 'file_bytes': file_bytes})
+        return stats
+
+    def verify(self) -> List[Tuple[Optional[str], str]]:
+        """Check the database and every entry, returns [(key or None, problem)]"""
+        problems = []
+        for (message,) in self.conn.execute("PRAGMA integrity_check").fetchall():
+            if message != 'ok':
+                problems.append((None, message))
+        for key, path, value, diagnostics in self.conn.execute(
+                "SELECT key, path, html, diagnostics FROM entries").fetchall():
+            html = _stored_html(value)
+            if html is None:
+                problems.append((key, f"{path}: unreadable record"))
+            elif not html.strip():
+                problems.append((key, f"{path}: empty HTML"))
+            try:
+                json.loads(diagnostics)
+            except ValueError:
+                problems.append((key, f"{path}: unreadable diagnostics"))
+        return problems
+
+    def clear(self):
+        """Delete every entry, highlighted block and counter, and shrink the file"""
+        with self.conn:
+            for table in ('entries', 'highlights', 'counters'):
+                self.conn.execute(f"DELETE FROM {table}")
+        self.vacuum()
+
+    def vacuum(self):
+        """Give the space of deleted rows back to the file system"""
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Close the underlying connection"""
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+
+_worker_caches = {}
+
+
+def get_worker_cache(cache_dir: str) -> Optional[RenderCache]:
+    """Return a read-only cache connection reused for the life of a worker process"""
+    # Keyed by pid so a forked worker never reuses its parent's connection
+    memo_key = (os.getpid(), cache_dir)
+    if memo_key not in _worker_caches:
+        try:
+            _worker_caches[memo_key] = RenderCache(cache_dir, readonly=True)
+        except sqlite3.Error:
+            _worker_caches[memo_key] = None
+    return _worker_caches[memo_key]
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Font Pipeline
+
+Font handling for generate_pdf.py:
+
+1. Resolution - every configured face (CJK sans regular/bold, code font)
+   is resolved once to a font file that exists on this machine: first the
+   known per-platform paths, then fontconfig (fc-match). The result is
+   persisted in the cache dir and only re-checked when a resolved file
+   disappears or changes, so builds stop probing missing macOS paths and
+   fontconfig on every run.
+2. @font-face rules are generated from the resolved files only.
+3. Report - embedded font bytes per PDF next to the size of the full font
+   files, read back from the written PDF with pypdf. WeasyPrint already
+   embeds only the glyphs a book uses (its default since full_fonts and
+   optimize_size exist), so the report is where a full, unsubset CJK font
+   (tens of MB per face) would show up.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+FONT_CACHE_NAME = "fonts.json"
+
+# (family, weight, candidate files in preference order, fontconfig patterns)
+FONT_FACES = [
+    ('Chinese Sans', 'normal', [
+        '/System/Library/Fonts/Hiragino Sans GB.ttc',
+        '/System/Library/Fonts/STHeiti Light.ttc',
+        '/System/Library/Fonts/Supplemental/Songti.ttc',
+        '/Library/Fonts/Arial Unicode.ttf',
+        '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+        '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+        '/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc',
+        '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+        'C:/Windows/Fonts/msyh.ttc',
+    ], ['Noto Sans CJK SC', 'Source Han Sans SC', 'WenQuanYi Micro Hei', 'Microsoft YaHei']),
+    ('Chinese Sans', 'bold', [
+        '/System/Library/Fonts/Hiragino Sans GB.ttc',
+        '/System/Library/Fonts/STHeiti Medium.ttc',
+        '/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc',
+        '/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc',
+        '/usr/share/fonts/google-noto-cjk/NotoSansCJK-Bold.ttc',
+        '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+        'C:/Windows/Fonts/msyhbd.ttc',
+    ], ['Noto Sans CJK SC:bold', 'Source Han Sans SC:bold', 'WenQuanYi Micro Hei', 'Microsoft YaHei:bold']),
+    ('Code Font', 'normal', [
+        '/System/Library/Fonts/Menlo.ttc',
+        '/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf',
+        '/usr/share/fonts/dejavu/DejaVuSansMono.ttf',
+        'C:/Windows/Fonts/consola.ttf',
+    ], ['Menlo', 'DejaVu Sans Mono', 'Consolas']),
+]
+
+FONT_FILE_KEYS = ('/FontFile', '/FontFile2', '/FontFile3')
+
+
+def _faces_signature() -> str:
+    return hashlib.sha256(json.dumps(FONT_FACES).encode('utf-8')).hexdigest()
+
+
+def _file_state(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _fc_match(pattern: str) -> Optional[str]:
+    """Ask fontconfig for the file of pattern, if fc-match is installed and really has that family"""
+    if not shutil.which('fc-match'):
+        return None
+    try:
+        output = subprocess.run(['fc-match', '--format=%{family}\t%{file}', pattern],
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    families, _, path = output.partition('\t')
+    # fc-match always returns its best guess, even a Latin-only font for a CJK family
+    wanted = pattern.split(':')[0].lower()
+    if wanted not in [family.strip().lower() for family in families.split(',')]:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def _resolve_face(candidates: List[str], patterns: List[str]) -> Optional[str]:
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    for pattern in patterns:
+        path = _fc_match(pattern)
+        if path:
+            return path
+    return None
+
+
+def resolve_font_faces(cache_dir: str) -> List[Dict]:
+    """Return [{family, weight, path}] for every configured face, persisted in cache_dir
+
+    path is None when no file for the face exists on this machine; the CSS
+    font-family fallbacks then apply.
+    """
+    cache_path = os.path.join(cache_dir, FONT_CACHE_NAME)
+    signature = _faces_signature()
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('signature') == signature and all(
+                face['path'] is None or _file_state(face['path']) == face['state']
+                for face in cached['faces']):
+            return cached['faces']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    faces = []
+    for family, weight, candidates, patterns in FONT_FACES:
+        path = _resolve_face(candidates, patterns)
+        faces.append({'family': family, 'weight': weight, 'path': path,
+                      'state': _file_state(path) if path else None})
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'signature': signature, 'faces': faces}, f, ensure_ascii=False, indent=2)
+    return faces
+
+
+def font_face_css(faces: List[Dict]) -> str:
+    """Build @font-face rules for the resolved faces"""
+    rules = []
+    for face in faces:
+        if not face['path']:
+            continue
+        rules.append(f"""
+        @font-face {{
+            font-family: '{face['family']}';
+            src: url('{Path(face['path']).as_uri()}');
+            font-weight: {face['weight']};
+        }}
+""")
+    return ''.join(rules)
+
+
+def embedded_font_report(pdf_path: str) -> List[Dict]:
+    """Return [{name, subset, bytes}] for every font program embedded in a PDF, bytes decoded"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    fonts = {}
+    for page in reader.pages:
+        resources = page.get('/Resources')
+        font_dict = resources.get_object().get('/Font') if resources is not None else None
+        if font_dict is None:
+            continue
+        for font_ref in font_dict.get_object().values():
+            font = font_ref.get_object()
+            descendants = font.get('/DescendantFonts')
+            if descendants is not None:
+                font = descendants.get_object()[0].get_object()
+            descriptor = font.get('/FontDescriptor')
+            if descriptor is None:
+                continue
+            descriptor = descriptor.get_object()
+            for key in FONT_FILE_KEYS:
+                stream_ref = descriptor.get(key)
+                if stream_ref is None:
+                    continue
+                ident = getattr(stream_ref, 'idnum', id(stream_ref))
+                if ident in fonts:
+                    continue
+                name = str(font.get('/BaseFont', '?')).lstrip('/')
+                fonts[ident] = {
+                    'name': name,
+                    'subset': len(name) > 7 and name[6] == '+',
+                    'bytes': len(stream_ref.get_object().get_data()),
+                }
+    return sorted(fonts.values(), key=lambda item: item['bytes'], reverse=True)
+
+
+def format_font_report(pdf_path: str, faces: List[Dict]) -> List[str]:
+    """Printable lines comparing embedded font bytes with the full font files"""
+    try:
+        embedded = embedded_font_report(pdf_path)
+    except ImportError:
+        return []
+    except Exception as e:
+        return [f"Font report unavailable: {e}"]
+
+    full_bytes = sum(os.path.getsize(path) for path in {face['path'] for face in faces if face['path']})
+    embedded_bytes = sum(font['bytes'] for font in embedded)
+    lines = [f"Fonts: {len(embedded)} embedded, {embedded_bytes / 1024 / 1024:.2f} MB decoded "
+             f"(full font files: {full_bytes / 1024 / 1024:.2f} MB)"]
+    for font in embedded[:6]:
+        kind = "subset" if font['subset'] else "full"
+        lines.append(f"  {font['name'][:48]:<48} {font['bytes'] / 1024:>9.1f} KB  {kind}")
+    return lines
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - PDF Fragment Renderer
+
+Chapter-level incremental and parallel rendering for generate_pdf.py.
+
+Instead of laying out the whole merged HTML in one WeasyPrint pass, the book
+is split into fragments (front matter + one per top-level nav section). Each
+fragment is rendered to its own PDF, cached under a digest of its HTML and
+CSS, and the fragments are stitched into the final document:
+
+1. Internal links are rewritten to sentinel URIs before layout, then turned
+   back into GoTo destinations once every fragment's anchor positions are
+   known, so links work across fragment boundaries.
+2. Bookmarks are collected per fragment and rebuilt as one outline tree.
+3. Page numbers are not part of the fragments, so a fragment stays valid
+   wherever it lands in the book. They are stamped afterwards from a cheap
+   overlay document that only contains the page header margin box.
+
+Because fragments are independent, missing ones can also be laid out
+concurrently in a process pool; page offsets are only computed afterwards.
+
+The store keeps fragments of every selection (partial builds, memory
+batches, earlier revisions) so switching between them never re-lays out
+a whole book. It is bounded like the render cache: a fragment's PDF
+modification time is its last use, and FragmentStore.prune drops the ones
+unused for DEFAULT_MAX_AGE_DAYS, then the least recently used ones until
+the store fits in DEFAULT_MAX_FRAGMENT_BYTES.
+
+Requires: pip install pypdf
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+from contextlib import nullcontext
+from concurrent.futures import as_completed
+
+
+
+# Bump whenever the fragment metadata format or stitching logic changes
+FRAGMENT_FORMAT_VERSION = 1
+
+DEFAULT_MAX_FRAGMENT_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+
+XREF_SCHEME = "pdfxref:"
+PX_TO_PT = 0.75
+
+INTERNAL_HREF_PATTERN = re.compile(r'href="#([^"]*)"')
+
+# Page numbers are stamped from the overlay, so fragments drop the page counter box
+FRAGMENT_PAGE_CSS = """
+@page { @top-right { content: none; } }
+"""
+
+OVERLAY_PAGE_CSS = """
+@page {
+    @top-left { content: none; }
+    @bottom-center { content: none; }
+}
+html, body { background: transparent; }
+.page-stub { height: 1pt; page-break-after: always; }
+.page-stub:last-child { page-break-after: auto; }
+"""
+
+
+def externalize_internal_links(html: str) -> str:
+    """Rewrite in-document links into sentinel URIs resolved at stitch time"""
+    return INTERNAL_HREF_PATTERN.sub(lambda m: f'href="{XREF_SCHEME}{m.group(1)}"', html)
+
+
+def fragment_key(html: str, css_text: str, renderer_version: str) -> str:
+    """Digest the inputs of one fragment layout"""
+    digest = hashlib.sha256()
+    digest.update(f"{renderer_version}/fragments-{FRAGMENT_FORMAT_VERSION}".encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(css_text.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(html.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def weasyprint_version() -> str:
+    """Return the installed WeasyPrint version string, from package metadata when possible"""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        return version('weasyprint')
+    except PackageNotFoundError:
+        # e.g. a source checkout on sys.path, only known to the module itself
+        import weasyprint
+        return getattr(weasyprint, '__version__', 'unknown')
+
+
+_font_configs = {}
+
+
+def get_font_config():
+    """Return the FontConfiguration shared by every layout in this process
+
+    The @font-face rules are the same for every cookbook, so fonts are only
+    registered with fontconfig once per process instead of once per document.
+    """
+    from weasyprint.text.fonts import FontConfiguration
+
+    # Keyed by pid so a forked worker never reuses its parent's configuration
+    pid = os.getpid()
+    if pid not in _font_configs:
+        _font_configs[pid] = FontConfiguration()
+    return _font_configs[pid]
+
+
+def document_anchor_pages(document) -> Dict[str, int]:
+    """Map every anchor of a rendered WeasyPrint document to its page index"""
+    anchors = {}
+    for index, page in enumerate(document.pages):
+        for name in page.anchors:
+            anchors.setdefault(name, index)
+    return anchors
+
+
+def render_document(html_path: str, css_text: str, pdf_path: str) -> Dict:
+    """Lay out a complete HTML file, write it to pdf_path and return {pages, anchors}"""
+    from weasyprint import HTML, CSS
+
+    font_config = get_font_config()
+    stylesheet = CSS(string=css_text, font_config=font_config)
+    document = HTML(filename=html_path).render(stylesheets=[stylesheet], font_config=font_config)
+    tmp_path = f"{pdf_path}.tmp"
+    document.write_pdf(tmp_path)
+    os.replace(tmp_path, pdf_path)
+    return {'pages': len(document.pages), 'anchors': document_anchor_pages(document)}
+
+
+def render_fragment(html: str, css_text: str, pdf_path: str) -> Dict:
+    """Lay out one fragment, write it to pdf_path and return its layout metadata
+
+    Anchor and bookmark positions are stored in PDF points relative to the
+    fragment's own pages, which is all the stitcher needs to relocate them.
+    """
+    from weasyprint import HTML, CSS
+
+    font_config = get_font_config()
+    stylesheet = CSS(string=css_text, font_config=font_config)
+    document = HTML(string=html).render(stylesheets=[stylesheet], font_config=font_config)
+
+    meta = {'pages': len(document.pages), 'anchors': {}, 'bookmarks': []}
+    for index, page in enumerate(document.pages):
+        for name, (x, y) in page.anchors.items():
+            meta['anchors'].setdefault(name, [index, x * PX_TO_PT, (page.height - y) * PX_TO_PT])
+        for level, label, (x, y), state in page.bookmarks:
+            meta['bookmarks'].append([index, level, label,
+                                      x * PX_TO_PT, (page.height - y) * PX_TO_PT,
+                                      state != 'closed'])
+
+    tmp_path = f"{pdf_path}.tmp"
+    document.write_pdf(tmp_path)
+    os.replace(tmp_path, pdf_path)
+    return meta
+
+
+class FragmentStore:
+    """Directory of rendered fragment PDFs plus their layout metadata"""
+
+    def __init__(self, fragments_dir: str, readonly: bool = False):
+        self.fragments_dir = fragments_dir
+        if not readonly:
+            os.makedirs(fragments_dir, exist_ok=True)
+
+    def pdf_path(self, key: str) -> str:
+        return os.path.join(self.fragments_dir, f"{key}.pdf")
+
+    def meta_path(self, key: str) -> str:
+        return os.path.join(self.fragments_dir, f"{key}.json")
+
+    def load_meta(self, key: str) -> Optional[Dict]:
+        """Return cached metadata if both the PDF and its metadata exist"""
+        if not os.path.exists(self.pdf_path(key)):
+            return None
+        try:
+            with open(self.meta_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_meta(self, key: str, meta: Dict):
+        with open(self.meta_path(key), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def touch(self, keys: Iterable[str]):
+        """Mark reused fragments as used now"""
+        for key in keys:
+            try:
+                os.utime(self.pdf_path(key))
+            except OSError:
+                pass
+
+    def prune(self, max_bytes: int = DEFAULT_MAX_FRAGMENT_BYTES,
+              max_age_days: float = DEFAULT_MAX_AGE_DAYS, keep: Iterable[str] = ()) -> Dict:
+        """Drop stale fragments, then least recently used ones until the store fits in max_bytes
+
+        Fragments in keep (the ones the current build uses) are never dropped.
+        Returns {fragments, bytes}.
+        """
+        if not os.path.isdir(self.fragments_dir):
+            return {'fragments': 0, 'bytes': 0}
+        keep = set(keep)
+        cutoff = time.time() - max_age_days * 86400
+        fragments = []
+        for name in os.listdir(self.fragments_dir):
+            key, _, extension = name.partition('.')
+            if extension != 'pdf':
+                continue
+            try:
+                size = os.path.getsize(self.pdf_path(key))
+                last_used = os.path.getmtime(self.pdf_path(key))
+                if os.path.exists(self.meta_path(key)):
+                    size += os.path.getsize(self.meta_path(key))
+            except OSError:
+                continue
+            fragments.append((last_used, key, size))
+        fragments.sort()
+
+        total = sum(size for _, _, size in fragments)
+        evicted, evicted_bytes = [], 0
+        for last_used, key, size in fragments:
+            if key in keep:
+                continue
+            if last_used >= cutoff and total <= max_bytes:
+                break
+            evicted.append(f"{key}.pdf")
+            evicted_bytes += size
+            total -= size
+        self.remove(evicted)
+        return {'fragments': len(evicted), 'bytes': evicted_bytes}
+
+    def usage(self) -> Tuple[int, int]:
+        """Return (fragment count, bytes on disk)"""
+        if not os.path.isdir(self.fragments_dir):
+            return 0, 0
+        names = os.listdir(self.fragments_dir)
+        size = sum(os.path.getsize(os.path.join(self.fragments_dir, name)) for name in names)
+        return sum(1 for name in names if name.endswith('.pdf')), size
+
+    def verify(self) -> List[Tuple[str, str]]:
+        """Return [(file name, problem)] for incomplete, truncated or leftover files"""
+        if not os.path.isdir(self.fragments_dir):
+            return []
+        problems = []
+        names = set(os.listdir(self.fragments_dir))
+        for name in sorted(names):
+            key, _, extension = name.partition('.')
+            path = os.path.join(self.fragments_dir, name)
+            if extension == 'pdf':
+                if f"{key}.json" not in names:
+                    problems.append((name, "no layout metadata"))
+                with open(path, 'rb') as f:
+                    if f.read(5) != b'%PDF-':
+                        problems.append((name, "not a PDF"))
+            elif extension == 'json':
+                if f"{key}.pdf" not in names:
+                    problems.append((name, "no fragment PDF"))
+                elif self.load_meta(key) is None:
+                    problems.append((name, "unreadable layout metadata"))
+            else:
+                problems.append((name, "leftover file"))
+        return problems
+
+    def remove(self, names: Iterable[str]) -> int:
+        """Delete the given files together with their fragment PDF and metadata"""
+        removed = 0
+        for name in names:
+            key = name.split('.', 1)[0]
+            for path in (self.pdf_path(key), self.meta_path(key), os.path.join(self.fragments_dir, name)):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+def render_page_number_overlay(page_count: int, css_text: str, pdf_path: str):
+    """Render a document of empty pages that only carries the page counter margin box"""
+    from weasyprint import HTML, CSS
+
+    font_config = get_font_config()
+    stubs = '<div class="page-stub"></div>' * page_count
+    html = f'<!DOCTYPE html><html><head><meta charset="UTF-8"></head><body>{stubs}</body></html>'
+    stylesheet = CSS(string=css_text + OVERLAY_PAGE_CSS, font_config=font_config)
+    tmp_path = f"{pdf_path}.tmp"
+    HTML(string=html).write_pdf(tmp_path, stylesheets=[stylesheet], font_config=font_config)
+    os.replace(tmp_path, pdf_path)
+
+
+def stitch_fragments(fragments: List[Tuple[str, Dict]], output_path: str,
+                     overlay_path: Optional[str] = None, title: Optional[str] = None) -> int:
+    """Merge fragment PDFs into one document with global links and bookmarks
+
+    Returns the total page count.
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, FloatObject, NameObject, NullObject, Fit
+
+    writer = PdfWriter()
+    anchors = {}
+    bookmarks = []
+
+    for pdf_path, meta in fragments:
+        offset = len(writer.pages)
+        reader = PdfReader(pdf_path)
+        for page in reader.pages:
+            writer.add_page(page)
+        for name, (index, x, y) in meta['anchors'].items():
+            anchors.setdefault(name, (offset + index, x, y))
+        for index, level, label, x, y, is_open in meta['bookmarks']:
+            bookmarks.append((offset + index, level, label, x, y, is_open))
+
+    # Resolve sentinel links against the global anchor table
+    for page in writer.pages:
+        if '/Annots' not in page:
+            continue
+        kept_annots = ArrayObject()
+        for annot_ref in page['/Annots']:
+            annot = annot_ref.get_object()
+            action = annot.get('/A')
+            uri = str(action.get_object().get('/URI', '')) if action is not None else ''
+            if not uri.startswith(XREF_SCHEME):
+                kept_annots.append(annot_ref)
+                continue
+            target = anchors.get(unquote(uri[len(XREF_SCHEME):]))
+            if target is None:
+                # Same as WeasyPrint: links to unknown anchors are dropped
+                continue
+            target_index, x, y = target
+            del annot['/A']
+            annot[NameObject('/Dest')] = ArrayObject([
+                writer.pages[target_index].indirect_reference,
+                NameObject('/XYZ'), FloatObject(x), FloatObject(y), NullObject()
+            ])
+            kept_annots.append(annot_ref)
+        if kept_annots:
+            page[NameObject('/Annots')] = kept_annots
+        else:
+            del page['/Annots']
+
+    # Rebuild one outline tree from the per-fragment bookmark levels
+    parents = []
+    for page_index, level, label, x, y, is_open in bookmarks:
+        while parents and parents[-1][0] >= level:
+            parents.pop()
+        parent = parents[-1][1] if parents else None
+        item = writer.add_outline_item(label, page_index, parent=parent,
+                                       fit=Fit.xyz(left=x, top=y), is_open=is_open)
+        parents.append((level, item))
+
+    if overlay_path:
+        overlay = PdfReader(overlay_path)
+        for page, overlay_page in zip(writer.pages, overlay.pages):
+            page.merge_page(overlay_page)
+
+    if title:
+        writer.add_metadata({'/Title': title})
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+    os.replace(tmp_path, output_path)
+    return len(writer.pages)
+
+
+def iter_fragment_keys(fragments: List[Tuple[str, str]], fragment_css: str, renderer_version: str):
+    """Yield (name, key, html) for every fragment, with its internal links externalized"""
+    for name, html in fragments:
+        html = externalize_internal_links(html)
+        yield name, fragment_key(html, fragment_css, renderer_version), html
+
+
+def plan_fragments(fragments: List[Tuple[str, str]], css_text: str, fragments_dir: str,
+                   reuse: bool = True) -> Tuple[List[str], List[str]]:
+    """Return the (rendered, cached) fragment names render_fragmented would report
+
+    Only hashes the fragments and looks at the store; nothing is laid out
+    and WeasyPrint is not imported.
+    """
+    try:
+        renderer_version = weasyprint_version()
+    except ImportError:
+        # Without WeasyPrint no stored fragment can be reused
+        return [name for name, _ in fragments], []
+    store = FragmentStore(fragments_dir, readonly=True)
+    fragment_css = css_text + FRAGMENT_PAGE_CSS
+    rendered, cached = [], []
+    seen = set()
+    for name, key, _ in iter_fragment_keys(fragments, fragment_css, renderer_version):
+        if key in seen:
+            continue
+        seen.add(key)
+        if reuse and store.load_meta(key) is not None:
+            cached.append(name)
+        else:
+            rendered.append(name)
+    return rendered, cached
+
+
+def render_fragmented(fragments: List[Tuple[str, str]], css_text: str, fragments_dir: str,
+                      output_path: str, title: Optional[str] = None,
+                      executor=None, reuse: bool = True, stage=None) -> Dict:
+    """Render changed fragments, reuse cached ones and stitch the final PDF
+
+    fragments is a list of (name, html) in document order. With an executor
+    the missing fragments are laid out concurrently, largest first so the
+    longest layouts start early. Returns a summary dict with rendered/cached
+    fragment names, per-fragment page offsets, the global page index of
+    every anchor, the total page count and the store keys the document
+    uses. Nothing is deleted from the store here, see FragmentStore.prune.
+    stage, if given, is a factory of context managers used to profile the
+    layout, overlay and stitch steps.
+    """
+    stage = stage or (lambda name: nullcontext())
+    store = FragmentStore(fragments_dir)
+    renderer_version = weasyprint_version()
+    fragment_css = css_text + FRAGMENT_PAGE_CSS
+
+    metas = {}
+    pending = []
+    rendered, cached = [], []
+    keys = []
+    for name, key, html in iter_fragment_keys(fragments, fragment_css, renderer_version):
+        if key in keys:
+            keys.append(key)
+            continue
+        keys.append(key)
+        meta = store.load_meta(key) if reuse else None
+        if meta is None:
+            pending.append((key, name, html))
+            rendered.append(name)
+        else:
+            metas[key] = meta
+            cached.append(name)
+    store.touch(metas)
+
+    with stage('WeasyPrint layout (fragments)'):
+        _layout_pending(pending, metas, store, fragment_css, executor)
+
+    # Global page offsets follow from the fragment page counts in document order
+    stitched = []
+    offsets = []
+    anchors = {}
+    total_pages = 0
+    for (name, _), key in zip(fragments, keys):
+        offsets.append((name, total_pages))
+        for anchor, (index, _, _) in metas[key]['anchors'].items():
+            anchors.setdefault(anchor, total_pages + index)
+        total_pages += metas[key]['pages']
+        stitched.append((store.pdf_path(key), metas[key]))
+
+    overlay_key = fragment_key(f"overlay-{total_pages}", css_text, renderer_version)
+    keys.append(overlay_key)
+    overlay_path = store.pdf_path(overlay_key)
+    if store.load_meta(overlay_key) is None:
+        with stage('page number overlay'):
+            render_page_number_overlay(total_pages, css_text, overlay_path)
+        # Like every stored fragment, so `generate_pdf.py cache verify` can tell it is complete
+        store.save_meta(overlay_key, {'pages': total_pages, 'anchors': {}, 'bookmarks': []})
+    else:
+        store.touch([overlay_key])
+
+    with stage('PDF write (stitch)'):
+        stitch_fragments(stitched, output_path, overlay_path=overlay_path, title=title)
+
+    return {'rendered': rendered, 'cached': cached, 'offsets': offsets,
+            'anchors': anchors, 'pages': total_pages, 'keys': sorted(set(keys))}
+
+
+def _layout_pending(pending, metas, store, fragment_css, executor):
+    """Lay out fragments missing from the store, concurrently when an executor is given"""
+    if executor is not None and len(pending) > 1:
+        pending.sort(key=lambda item: len(item[2]), reverse=True)
+        futures = {executor.submit(render_fragment, html, fragment_css, store.pdf_path(key)): (key, name)
+                   for key, name, html in pending}
+        for future in as_completed(futures):
+            key, name = futures[future]
+            metas[key] = future.result()
+            store.save_meta(key, metas[key])
+            print(f"    Rendered fragment: {name} ({metas[key]['pages']} pages)")
+    else:
+        for key, name, html in pending:
+            print(f"    Rendering fragment: {name}")
+            metas[key] = render_fragment(html, fragment_css, store.pdf_path(key))
+            store.save_meta(key, metas[key])
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Code Highlighting
+
+Syntax highlighting stage of the markdown workers in generate_pdf.py.
+mistune emits fenced code as bare <pre><code class="language-x"> blocks;
+this module runs them through Pygments inside the workers, so the main
+process never pays for it.
+
+Every block is memoized by a digest of its language, its source and the
+Pygments version: first in a per-process LRU of MEMO_MAX_BLOCKS blocks,
+then in the highlights table of the render cache. A page that changed usually still contains
+mostly unchanged code blocks, and those are never lexed again.
+
+Highlighted markup only carries Pygments' short token classes, styled by
+the token rules of the theme (highlight_css). The stylesheet covers every
+token class, not just the ones the book uses: it is part of every PDF
+fragment key (pdf_fragments.py), and a stylesheet that followed the book
+would re-lay out every fragment whenever one page gained or lost a token
+class, and never match between partial and full builds.
+
+Blocks without a language, or with one Pygments does not know (mermaid,
+regex, ...), are left untouched. Without Pygments nothing is highlighted.
+
+Optional: pip install pygments
+"""
+
+import re
+import hashlib
+import html as html_lib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+HIGHLIGHT_STYLE = 'tango'
+HIGHLIGHT_CLASS = 'highlight'
+
+CODE_BLOCK_PATTERN = re.compile(
+    r'<pre><code class="language-([\w+#.-]+)">(.*?)</code></pre>', re.S)
+STYLE_RULE_PATTERN = re.compile(r'^\.' + HIGHLIGHT_CLASS + r' \.([\w-]+) \{')
+
+# Fence names used in the docs that Pygments knows under another alias
+LANGUAGE_ALIASES = {
+    'txt': 'text',
+    'shell': 'bash',
+    'sh': 'bash',
+    'js': 'javascript',
+}
+
+# Bounds the per-process memo of long-lived workers (watch mode)
+MEMO_MAX_BLOCKS = 4096
+
+_formatter = None
+_memo: "OrderedDict[str, Optional[str]]" = OrderedDict()
+
+
+def pygments_version() -> Optional[str]:
+    """Return the installed Pygments version, or None without Pygments"""
+    try:
+        import pygments
+    except ImportError:
+        return None
+    return pygments.__version__
+
+
+def block_key(language: str, source: str, version: str) -> str:
+    """Memo key of one code block"""
+    digest = hashlib.sha256()
+    digest.update(f"{version}\0{language}\0".encode('utf-8'))
+    digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _highlight(language: str, source: str) -> Optional[str]:
+    """Lex one block into token spans, None if Pygments has no lexer for language"""
+    global _formatter
+    from pygments import highlight
+    from pygments.formatters.html import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+
+    try:
+        lexer = get_lexer_by_name(LANGUAGE_ALIASES.get(language, language), stripnl=False)
+    except ClassNotFound:
+        return None
+    if _formatter is None:
+        _formatter = HtmlFormatter(nowrap=True)
+    return highlight(source, lexer, _formatter)
+
+
+def highlight_code_blocks(html: str, lookup: Optional[Callable[[str], Optional[str]]] = None
+                          ) -> Tuple[str, List[Tuple[str, str]], Dict]:
+    """Highlight every fenced code block of a rendered page
+
+    lookup(key) is consulted for blocks missing from the in-process memo,
+    typically the render cache of the project. Returns (html, new_entries,
+    stats) where new_entries are the (key, highlighted_html) pairs that were
+    lexed here and should be persisted, and stats = {code_blocks,
+    code_blocks_highlighted, code_blocks_lexed}: every block with a
+    language, those Pygments could highlight and those lexed here instead
+    of coming from the memo or the cache.
+    """
+    stats = {'code_blocks': 0, 'code_blocks_highlighted': 0, 'code_blocks_lexed': 0}
+    new_entries = []
+    version = pygments_version()
+    if version is None:
+        return html, new_entries, stats
+
+    def replace_block(match):
+        language = match.group(1).lower()
+        source = html_lib.unescape(match.group(2))
+        key = block_key(language, source, version)
+        stats['code_blocks'] += 1
+
+        if key in _memo:
+            highlighted = _memo[key]
+            _memo.move_to_end(key)
+        else:
+            highlighted = lookup(key) if lookup else None
+            if highlighted is None:
+                highlighted = _highlight(language, source)
+                stats['code_blocks_lexed'] += 1
+                # Unknown languages are stored as '' so they are not looked up again
+                new_entries.append((key, highlighted or ''))
+            _memo[key] = highlighted or None
+            if len(_memo) > MEMO_MAX_BLOCKS:
+                _memo.popitem(last=False)
+
+        if not highlighted:
+            return match.group(0)
+        stats['code_blocks_highlighted'] += 1
+        return (f'<pre class="{HIGHLIGHT_CLASS}"><code class="language-{match.group(1)}">'
+                f'{highlighted}</code></pre>')
+
+    return CODE_BLOCK_PATTERN.sub(replace_block, html), new_entries, stats
+
+
+def highlight_css(style: str = HIGHLIGHT_STYLE) -> str:
+    """Return the style rules of every token class of the theme, the same for every build"""
+    if pygments_version() is None:
+        return ''
+    from pygments.formatters.html import HtmlFormatter
+
+    style_defs = HtmlFormatter(style=style).get_style_defs(f'.{HIGHLIGHT_CLASS}')
+    rules = [f"        {line}" for line in style_defs.splitlines() if STYLE_RULE_PATTERN.match(line)]
+    return '\n' + '\n'.join(rules) + '\n' if rules else ''
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Build History
+
+Every generate_pdf.py build is recorded in one SQLite database under
+output/.cache: per-stage wall/CPU times, pages processed and served from
+the render cache, worker count, output size and peak memory.
+
+- `generate_pdf.py <project> --plan` estimates the next build from the most
+  recent comparable one.
+- `generate_pdf.py stats` prints the recent builds of each project and flags
+  stages that got slower than the builds before them.
+
+Partial builds (--sections/--paths) and watch mode rebuilds are recorded
+too, but flagged as partial: they are listed, never used as a baseline.
+"""
+
+import os
+import time
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+HISTORY_DB_NAME = "build_history.sqlite3"
+
+# Stages whose time depends on how much work the caches leave, see estimate_build
+MARKDOWN_STAGE = 'markdown stage (worker pool)'
+FRAGMENT_LAYOUT_STAGE = 'WeasyPrint layout (fragments)'
+
+# A metric regressed when it is both this much slower, relatively and in
+# seconds, than the median of the builds before it
+REGRESSION_RATIO = 1.25
+REGRESSION_MIN_SECONDS = 0.5
+REGRESSION_BASELINE = 10
+
+
+def build_record(project_key: str, mode: Dict, stages: List[Dict], worker_events: List[Dict],
+                 elapsed: float, fragments: Optional[Tuple[int, int]] = None,
+                 edition: Optional[str] = None) -> Dict:
+    """Summarize the profiler events of one project build into a history record
+
+    stages and worker_events are the profiler events of this build only;
+    stage names lose their "<project>/" prefix. elapsed is the wall time of
+    the whole build, fragments the (rendered, cached) fragment counts.
+    Builds of an edition of the project are recorded under its edition key.
+    """
+    prefix = f"{project_key}/"
+    stage_times = {}
+    for event in stages:
+        name = event['name'][len(prefix):] if event['name'].startswith(prefix) else event['name']
+        wall, cpu = stage_times.get(name, (0.0, 0.0))
+        stage_times[name] = (wall + event['wall'], cpu + event['cpu'])
+
+    page_walls = {'hit': [], 'miss': []}
+    for event in worker_events:
+        if event['name'] == 'process_single_markdown_file' and event['args'].get('cache') in page_walls:
+            page_walls[event['args']['cache']].append(event['wall'])
+
+    record = dict(mode)
+    record.update({
+        'timestamp': time.time(),
+        'project': edition or project_key,
+        'stages': {name: wall for name, (wall, _) in stage_times.items()},
+        'stage_cpu': {name: cpu for name, (_, cpu) in stage_times.items()},
+        'pages_rendered': len(page_walls['miss']),
+        'pages_cached': len(page_walls['hit']),
+        'page_seconds': {kind: sum(walls) / len(walls) if walls else None
+                         for kind, walls in page_walls.items()},
+        'total': elapsed,
+        'peak_rss': max([event['peak_rss'] or 0 for event in stages] + [0]),
+        'worker_peak_rss': max([event['peak_rss'] or 0 for event in worker_events] + [0]),
+        'fragments_rendered': fragments[0] if fragments else None,
+        'fragments_cached': fragments[1] if fragments else None,
+    })
+    return record
+
+
+class BuildHistory:
+    """SQLite database of every build of every project"""
+
+    def __init__(self, cache_root: str):
+        self.cache_root = cache_root
+        self.db_path = os.path.join(cache_root, HISTORY_DB_NAME)
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, creating its tables on first use"""
+        os.makedirs(self.cache_root, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS builds (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                format TEXT NOT NULL,
+                render_mode TEXT NOT NULL,
+                partial INTEGER NOT NULL DEFAULT 0,
+                workers INTEGER,
+                use_cache INTEGER,
+                pages_rendered INTEGER NOT NULL,
+                pages_cached INTEGER NOT NULL,
+                fragments_rendered INTEGER,
+                fragments_cached INTEGER,
+                miss_seconds REAL,
+                hit_seconds REAL,
+                total REAL NOT NULL,
+                output_bytes INTEGER,
+                peak_rss INTEGER,
+                worker_peak_rss INTEGER
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stages (
+                build_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                wall REAL NOT NULL,
+                cpu REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS builds_by_project ON builds (project, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS stages_by_build ON stages (build_id)")
+        return conn
+
+    def record(self, entry: Dict) -> int:
+        """Store one build record, returns its id"""
+        conn = self.connect()
+        try:
+            with conn:
+                cursor = conn.execute("""
+                    INSERT INTO builds (project, timestamp, format, render_mode, partial, workers,
+                                        use_cache, pages_rendered, pages_cached, fragments_rendered,
+                                        fragments_cached, miss_seconds, hit_seconds, total,
+                                        output_bytes, peak_rss, worker_peak_rss)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (entry['project'], entry['timestamp'], entry['format'], entry['render_mode'],
+                      int(entry.get('partial', False)), entry.get('workers'),
+                      int(entry.get('use_cache', True)), entry['pages_rendered'], entry['pages_cached'],
+                      entry.get('fragments_rendered'), entry.get('fragments_cached'),
+                      entry['page_seconds']['miss'], entry['page_seconds']['hit'], entry['total'],
+                      entry.get('output_bytes'), entry.get('peak_rss'), entry.get('worker_peak_rss')))
+                build_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO stages (build_id, name, wall, cpu) VALUES (?, ?, ?, ?)",
+                    [(build_id, name, wall, entry.get('stage_cpu', {}).get(name, 0.0))
+                     for name, wall in entry['stages'].items()])
+            return build_id
+        finally:
+            conn.close()
+
+    def records(self, project: Optional[str] = None, limit: Optional[int] = None,
+                include_partial: bool = False) -> List[Dict]:
+        """Return stored builds oldest first, only the last limit ones when limit is given"""
+        if not os.path.exists(self.db_path):
+            return []
+        conn = self.connect()
+        try:
+            query = "SELECT * FROM builds WHERE 1 = 1"
+            params = []
+            if project is not None:
+                query += " AND project = ?"
+                params.append(project)
+            if not include_partial:
+                query += " AND partial = 0"
+            query += " ORDER BY timestamp DESC, id DESC"
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+
+            records = []
+            for row in reversed(conn.execute(query, params).fetchall()):
+                record = dict(row)
+                record['page_seconds'] = {'miss': record.pop('miss_seconds'),
+                                          'hit': record.pop('hit_seconds')}
+                record['stages'], record['stage_cpu'] = {}, {}
+                for stage in conn.execute("SELECT name, wall, cpu FROM stages WHERE build_id = ? "
+                                          "ORDER BY rowid", (record['id'],)):
+                    record['stages'][stage['name']] = stage['wall']
+                    record['stage_cpu'][stage['name']] = stage['cpu']
+                records.append(record)
+            return records
+        except sqlite3.Error:
+            return []
+        finally:
+            conn.close()
+
+    def projects(self) -> List[str]:
+        """Return every project with at least one recorded build"""
+        if not os.path.exists(self.db_path):
+            return []
+        conn = self.connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT DISTINCT project FROM builds ORDER BY project")]
+        finally:
+            conn.close()
+
+    def latest(self, project: str, output_format: str, render_mode: str) -> Optional[Dict]:
+        """Most recent full build of the same format, preferring the same render mode
+
+        A build served entirely from the cache has no time per rendered page
+        (and a --no-cache build none per cached page); those averages are taken
+        from the most recent build of any kind that has them.
+        """
+        records = self.records(project)
+        same_format = [record for record in records if record['format'] == output_format]
+        same_mode = [record for record in same_format if record['render_mode'] == render_mode]
+        candidates = same_mode or same_format
+        if not candidates:
+            return None
+        latest = dict(candidates[-1])
+        page_seconds = dict(latest['page_seconds'])
+        for kind in ('miss', 'hit'):
+            if page_seconds[kind] is None:
+                known = [record['page_seconds'][kind] for record in records
+                         if record['page_seconds'][kind] is not None]
+                page_seconds[kind] = known[-1] if known else None
+        latest['page_seconds'] = page_seconds
+        return latest
+
+
+def estimate_build(record: Dict, pages_to_render: int, pages_cached: int, workers: int,
+                   fragments_to_render: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Estimate every stage of the next build from a previous one, returns [(stage, seconds)]
+
+    The markdown stage is scaled by the pages that miss the cache and
+    fragment layout by the fragments that have to be laid out again; every
+    other stage is assumed to take as long as last time. Time the recorded
+    build spent outside any stage is reported as "other".
+    """
+    estimates = []
+    for stage, wall in record['stages'].items():
+        if stage == MARKDOWN_STAGE:
+            seconds = _estimate_markdown(record, wall, pages_to_render, pages_cached, workers)
+        elif stage == FRAGMENT_LAYOUT_STAGE and fragments_to_render is not None:
+            rendered = record.get('fragments_rendered') or 0
+            per_fragment = wall / rendered if rendered else None
+            if per_fragment is None:
+                # The recorded build reused every fragment, so it says nothing about layout cost
+                seconds = None if fragments_to_render else 0.0
+            else:
+                parallel = workers if record.get('render_mode') == 'parallel' else 1
+                seconds = per_fragment * fragments_to_render / max(1, min(parallel, fragments_to_render or 1))
+        else:
+            seconds = wall
+        estimates.append((stage, seconds))
+    unstaged = record['total'] - sum(record['stages'].values())
+    if unstaged > 0:
+        estimates.append(('other', unstaged))
+    return estimates
+
+
+def _estimate_markdown(record, wall, pages_to_render, pages_cached, workers):
+    page_seconds = record.get('page_seconds', {})
+    miss, hit = page_seconds.get('miss'), page_seconds.get('hit')
+    if pages_to_render and miss is None:
+        return None
+    recorded_workers = max(1, record.get('workers') or 1)
+    recorded_work = ((record.get('pages_rendered', 0) * (miss or 0))
+                     + (record.get('pages_cached', 0) * (hit or 0))) / recorded_workers
+    # Pool start-up, result transfer and cache writes
+    overhead = max(0.0, wall - recorded_work)
+    work = pages_to_render * (miss or 0) + pages_cached * (hit or 0)
+    return overhead + work / max(1, workers)
+
+
+# ============================================================================
+# Trends and Regressions
+# ============================================================================
+
+def comparable_metrics(record: Dict) -> Dict[str, float]:
+    """Timings of a build that do not depend on how warm the caches were
+
+    The markdown and fragment layout stages are compared per rendered page
+    and per laid out fragment instead of in total.
+    """
+    metrics = {}
+    for stage, wall in record['stages'].items():
+        if stage == FRAGMENT_LAYOUT_STAGE:
+            if record.get('fragments_rendered'):
+                metrics['layout per fragment'] = wall / record['fragments_rendered']
+        elif stage != MARKDOWN_STAGE:
+            metrics[stage] = wall
+    if record['page_seconds']['miss'] is not None:
+        metrics['markdown per rendered page'] = record['page_seconds']['miss']
+    if record['page_seconds']['hit'] is not None:
+        metrics['markdown per cached page'] = record['page_seconds']['hit']
+    return metrics
+
+
+def comparable_builds(records: List[Dict]) -> List[Dict]:
+    """Return the builds with the same format and render mode as the last one"""
+    if not records:
+        return []
+    kind = (records[-1]['format'], records[-1]['render_mode'])
+    return [record for record in records if (record['format'], record['render_mode']) == kind]
+
+
+def find_regressions(records: List[Dict]) -> List[Tuple[str, float, float]]:
+    """Compare the last build with the median of the comparable builds before it
+
+    records are full builds of one project, oldest first. Returns
+    [(metric, latest_seconds, baseline_seconds)] for every metric that is
+    both REGRESSION_RATIO times and REGRESSION_MIN_SECONDS slower than its
+    baseline.
+    """
+    records = comparable_builds(records)
+    if len(records) < 2:
+        return []
+    latest = records[-1]
+    baseline_metrics = [comparable_metrics(record) for record in records[-REGRESSION_BASELINE - 1:-1]]
+
+    regressions = []
+    for metric, seconds in comparable_metrics(latest).items():
+        values = sorted(metrics[metric] for metrics in baseline_metrics if metric in metrics)
+        if not values:
+            continue
+        baseline = values[len(values) // 2]
+        if seconds > baseline * REGRESSION_RATIO and seconds - baseline > REGRESSION_MIN_SECONDS:
+            regressions.append((metric, seconds, baseline))
+    return regressions
+
+
+def format_build_rows(records: List[Dict]) -> List[str]:
+    """Printable table of builds, oldest first; partial builds are marked with *"""
+    lines = [f"{'date':<16} {'mode':<13} {'pages':>5} {'hit%':>5} {'workers':>7} "
+             f"{'time':>8} {'size MB':>8} {'peak MB':>8}"]
+    for record in records:
+        pages = record['pages_rendered'] + record['pages_cached']
+        hit_rate = record['pages_cached'] * 100 / pages if pages else 0
+        mode = record['render_mode'] + ('*' if record.get('partial') else '')
+        size = f"{record['output_bytes'] / 1024 / 1024:.2f}" if record.get('output_bytes') else '-'
+        peak = max(record.get('peak_rss') or 0, record.get('worker_peak_rss') or 0)
+        lines.append(f"{datetime.fromtimestamp(record['timestamp']):%Y-%m-%d %H:%M} {mode:<13} "
+                     f"{pages:>5} {hit_rate:>5.0f} {record.get('workers') or 0:>7} "
+                     f"{record['total']:>7.2f}s {size:>8} {peak / 1024 / 1024:>8.0f}")
+    return lines
+
+
+def format_metric_trend(records: List[Dict], limit: int = 5) -> List[str]:
+    """Printable trend of the comparable metrics over the last builds, oldest first"""
+    columns = [comparable_metrics(record) for record in records[-limit:]]
+    names = []
+    for metrics in columns:
+        names += [name for name in metrics if name not in names]
+    lines = []
+    for name in names:
+        values = ' '.join(f"{metrics[name]:>8.2f}" if name in metrics else f"{'-':>8}"
+                          for metrics in columns)
+        lines.append(f"{name[:34]:<34} {values}")
+    return lines
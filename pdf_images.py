@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Image Optimizer
+
+Image stage of the markdown workers in generate_pdf.py. Local images
+referenced by a page are downsampled to the print resolution of the PDF
+content width and recompressed before WeasyPrint ever sees them, so large
+diagrams no longer go into layout and the PDF at full resolution.
+
+Optimized files are cached by a digest of the source bytes and the target
+DPI in output/.cache/images, and the <img> sources in the rendered HTML are
+rewritten to them. This also anchors the relative image paths of the docs
+to the page that references them, which the merged HTML had no base for.
+
+The HTML that goes into the render cache names optimized copies relative
+to the image cache (cached-image:<file>), so cached pages stay valid when
+the checkout moves. resolve_image_sources turns them into file:// URIs
+when a page is handed to the build, and reports pages whose copies were
+pruned so they are rendered again.
+
+Remote images are left untouched. Without Pillow, images are only
+resolved, not resized.
+
+Optimized copies that no cached page points to any more are removed by
+`generate_pdf.py cache prune`.
+
+Optional: pip install pillow
+"""
+
+import os
+import re
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+
+IMAGE_TARGET_DPI = 150
+# A4 width minus the 2cm left/right page margins of the PDF stylesheet
+CONTENT_WIDTH_INCHES = (21.0 - 4.0) / 2.54
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+JPEG_QUALITY = 85
+
+MD_IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)')
+HTML_IMG_SRC_PATTERN = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]+)(")', re.I)
+
+CACHED_IMAGE_SCHEME = "cached-image:"
+CACHED_IMAGE_SRC_PATTERN = re.compile(r'(<img\b[^>]*?\bsrc=")' + CACHED_IMAGE_SCHEME + r'([^"/]+)(")', re.I)
+
+
+def resolve_local_image(src: str, source_dir: str) -> Optional[str]:
+    """Return the file an image src points to, or None for remote or missing images"""
+    parsed = urlparse(src)
+    if parsed.scheme and parsed.scheme != 'file':
+        return None
+    path = unquote(parsed.path)
+    if not path.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    if not os.path.isabs(path):
+        path = os.path.join(source_dir, path)
+    path = os.path.normpath(path)
+    return path if os.path.isfile(path) else None
+
+
+def image_states(content: str, source_dir: str) -> List[Tuple[str, str]]:
+    """Return sorted (src, mtime/size) pairs of the local images a markdown page uses
+
+    Cheap to compute on every build; goes into the render cache key so a
+    changed image re-renders the pages that embed it.
+    """
+    states = set()
+    for src in MD_IMAGE_PATTERN.findall(content) + [m.group(2) for m in HTML_IMG_SRC_PATTERN.finditer(content)]:
+        path = resolve_local_image(src, source_dir)
+        if path:
+            stat = os.stat(path)
+            states.add((src, f"{stat.st_mtime_ns}:{stat.st_size}"))
+    return sorted(states)
+
+
+def optimize_image(path: str, cache_dir: str, dpi: int = IMAGE_TARGET_DPI) -> Tuple[str, int, int]:
+    """Downsample and recompress one image into cache_dir
+
+    Returns (optimized_path, source_bytes, optimized_bytes). The cached copy
+    is reused when it already exists.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    extension = os.path.splitext(path)[1].lower()
+    digest = hashlib.sha256(data + f"/{dpi}".encode('utf-8')).hexdigest()[:32]
+    target = os.path.join(cache_dir, f"{digest}{extension}")
+    if os.path.exists(target):
+        return target, len(data), os.path.getsize(target)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        from PIL import Image
+    except ImportError:
+        shutil.copyfile(path, tmp_path)
+    else:
+        with Image.open(path) as image:
+            max_width = int(CONTENT_WIDTH_INCHES * dpi)
+            if image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                image = image.resize((max_width, height), Image.LANCZOS)
+            if extension in ('.jpg', '.jpeg'):
+                image.convert('RGB').save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True,
+                                          progressive=True, dpi=(dpi, dpi))
+            elif extension == '.png':
+                image.save(tmp_path, 'PNG', optimize=True, dpi=(dpi, dpi))
+            else:
+                image.save(tmp_path, image.format or extension.lstrip('.').upper())
+        # Never keep a "optimized" copy that is bigger than the source
+        if os.path.getsize(tmp_path) >= len(data):
+            shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, target)
+    return target, len(data), os.path.getsize(target)
+
+
+def rewrite_image_sources(html: str, source_dir: str, cache_dir: str,
+                          dpi: int = IMAGE_TARGET_DPI) -> Tuple[str, Dict]:
+    """Point every local <img> of a rendered page at its optimized cached copy
+
+    Sources become cached-image:<file> references, see resolve_image_sources.
+    Returns (html, stats) with stats = {images, source_bytes, optimized_bytes,
+    failed}; a page with failed images embeds absolute source paths and
+    should not be cached.
+    """
+    stats = {'images': 0, 'source_bytes': 0, 'optimized_bytes': 0, 'failed': 0}
+
+    def replace_src(match):
+        path = resolve_local_image(match.group(2), source_dir)
+        if path is None:
+            return match.group(0)
+        try:
+            optimized, source_bytes, optimized_bytes = optimize_image(path, cache_dir, dpi)
+        except Exception as e:
+            print(f"  Image optimization failed for {path}: {e}")
+            stats['failed'] += 1
+            return f"{match.group(1)}{Path(path).as_uri()}{match.group(3)}"
+        stats['images'] += 1
+        stats['source_bytes'] += source_bytes
+        stats['optimized_bytes'] += optimized_bytes
+        return f"{match.group(1)}{CACHED_IMAGE_SCHEME}{os.path.basename(optimized)}{match.group(3)}"
+
+    return HTML_IMG_SRC_PATTERN.sub(replace_src, html), stats
+
+
+def resolve_image_sources(html: str, cache_dir: str) -> Optional[str]:
+    """Turn the cached-image: references of a page into file:// URIs of the image cache
+
+    Returns None when an optimized copy no longer exists, e.g. after
+    `generate_pdf.py cache prune`, so the page has to be rendered again.
+    """
+    missing = False
+
+    def replace_src(match):
+        nonlocal missing
+        path = os.path.join(cache_dir, match.group(2))
+        if not os.path.isfile(path):
+            missing = True
+            return match.group(0)
+        return f"{match.group(1)}{Path(path).as_uri()}{match.group(3)}"
+
+    html = CACHED_IMAGE_SRC_PATTERN.sub(replace_src, html)
+    return None if missing else html
+
+
+def referenced_images(html: str) -> Set[str]:
+    """Return the file names of the optimized copies a cached page points to"""
+    return {match.group(2) for match in CACHED_IMAGE_SRC_PATTERN.finditer(html)}
+
+
+def image_cache_usage(cache_dir: str) -> Tuple[int, int]:
+    """Return (file count, bytes) of the optimized image cache"""
+    if not os.path.isdir(cache_dir):
+        return 0, 0
+    names = os.listdir(cache_dir)
+    return len(names), sum(os.path.getsize(os.path.join(cache_dir, name)) for name in names)
+
+
+def prune_image_cache(cache_dir: str, keep_names: Iterable[str]) -> Tuple[int, int]:
+    """Delete optimized copies not in keep_names, returns (files, bytes) removed"""
+    if not os.path.isdir(cache_dir):
+        return 0, 0
+    keep = set(keep_names)
+    removed, removed_bytes = 0, 0
+    for name in os.listdir(cache_dir):
+        if name in keep:
+            continue
+        path = os.path.join(cache_dir, name)
+        size = os.path.getsize(path)
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+        removed_bytes += size
+    return removed, removed_bytes
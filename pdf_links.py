@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Link Index
+
+Precomputed resolution index for internal markdown links in generate_pdf.py.
+
+The index is built once per build from the nav path -> anchor mapping and
+answers every lookup with dictionary hits, in this order:
+
+1. Relative path  - the link resolved against the linking page's directory
+                    (what mkdocs itself does)
+2. Exact path     - the link taken as a docs-root relative nav path
+3. Normalized     - leading ./ and ../ segments stripped
+4. Basename       - the file name alone, when exactly one nav page has it
+
+When several nav pages share a basename, the first one in nav order wins
+and the basename is reported as ambiguous, so a link can no longer silently
+jump to the wrong recipe. The index only holds plain dicts, so it pickles
+cheaply and workers can use it read-only.
+
+Anchors are derived from the nav paths (path_anchors), not from the
+position of a page in the nav, so reordering the nav leaves the HTML of
+every linking page, and with it its render cache key, unchanged.
+
+Partial builds (--sections/--paths) still index every nav page but mark
+the ones outside the selection as excluded: links to them resolve to no
+anchor and degrade to plain text, instead of falling through to a
+basename match on an included page.
+"""
+
+import re
+import hashlib
+import posixpath
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+ANCHOR_PREFIX = 'page-'
+ANCHOR_UNSAFE_PATTERN = re.compile(r'[^A-Za-z0-9_-]+')
+
+# Resolution methods, in lookup order
+RESOLVED_RELATIVE = 'relative'
+RESOLVED_EXACT = 'exact'
+RESOLVED_NORMALIZED = 'normalized'
+RESOLVED_BASENAME = 'basename'
+RESOLVED_AMBIGUOUS = 'ambiguous'
+UNRESOLVED = 'unresolved'
+
+
+def path_anchors(paths: Iterable[str]) -> Dict[str, str]:
+    """Map nav paths to anchor ids derived from the paths alone
+
+    "01-Recipes/Network/ssl_pinning.md" becomes "page-01-Recipes-Network-ssl_pinning".
+    Paths whose ids would collide (e.g. non-ASCII file names) get a digest
+    of the path appended, which does not depend on nav order either.
+    """
+    slugs = {path: ANCHOR_PREFIX + ANCHOR_UNSAFE_PATTERN.sub('-', posixpath.splitext(path)[0]).strip('-')
+             for path in paths}
+    counts = Counter(slugs.values())
+    return {path: slug if counts[slug] == 1 else f"{slug}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+            for path, slug in slugs.items()}
+
+
+def split_link_url(link_url: str) -> Tuple[str, Optional[str]]:
+    """Split a link URL into (file path, fragment)"""
+    if '#' in link_url:
+        file_path, anchor = link_url.split('#', 1)
+        return file_path, anchor
+    return link_url, None
+
+
+def strip_relative_prefix(file_path: str) -> str:
+    """Drop leading ./ and ../ segments from a link path"""
+    while file_path.startswith('./'):
+        file_path = file_path[2:]
+    while file_path.startswith('../'):
+        file_path = file_path[3:]
+    return file_path
+
+
+class LinkIndex:
+    """Nav path, normalized path and basename lookups for internal links"""
+
+    def __init__(self, path_to_anchor: Dict[str, str], excluded: Iterable[str] = ()):
+        self.anchors = dict(path_to_anchor)
+        self.excluded = frozenset(excluded)
+        self.basenames: Dict[str, List[str]] = {}
+        for path in self.anchors:
+            self.basenames.setdefault(posixpath.basename(path), []).append(path)
+
+    def __len__(self):
+        return len(self.anchors)
+
+    def ambiguous_basenames(self) -> Dict[str, List[str]]:
+        """Return the basenames shared by more than one nav page"""
+        return {name: paths for name, paths in self.basenames.items() if len(paths) > 1}
+
+    def resolve_path(self, file_path: str, source_path: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """Resolve a link path to (nav path, method)"""
+        if source_path is not None:
+            relative = posixpath.normpath(posixpath.join(posixpath.dirname(source_path), file_path))
+            if relative in self.anchors:
+                return relative, RESOLVED_RELATIVE
+
+        if file_path in self.anchors:
+            return file_path, RESOLVED_EXACT
+
+        normalized = strip_relative_prefix(file_path)
+        if normalized in self.anchors:
+            return normalized, RESOLVED_NORMALIZED
+
+        candidates = self.basenames.get(posixpath.basename(normalized))
+        if not candidates:
+            return None, UNRESOLVED
+        if len(candidates) > 1:
+            return candidates[0], RESOLVED_AMBIGUOUS
+        return candidates[0], RESOLVED_BASENAME
+
+    def resolve(self, link_url: str, source_path: Optional[str] = None) -> Optional[str]:
+        """Resolve a markdown link URL to a PDF anchor, or None if it is unknown or excluded"""
+        file_path, anchor = split_link_url(link_url)
+        path, _ = self.resolve_path(file_path, source_path)
+        if path is None or path in self.excluded:
+            return None
+        target_anchor = self.anchors[path]
+        if anchor:
+            return f"{target_anchor}-{anchor}"
+        return target_anchor
+
+    def report(self, limit: int = 5) -> List[str]:
+        """Describe ambiguous basenames as printable lines"""
+        lines = []
+        ambiguous = self.ambiguous_basenames()
+        for name, paths in sorted(ambiguous.items())[:limit]:
+            lines.append(f"{name}: {', '.join(paths)} (links by basename use {paths[0]})")
+        if len(ambiguous) > limit:
+            lines.append(f"... and {len(ambiguous) - limit} more")
+        return lines
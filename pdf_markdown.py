@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Markdown Backends
+
+Markdown to HTML stage of the markdown workers in generate_pdf.py
+(--markdown-backend). Every backend turns one page into an HTML fragment
+with the markup the rest of the pipeline relies on: fenced code as
+<pre><code class="language-x"> (pdf_highlight.py), GFM tables and raw
+HTML passed through.
+
+- mistune        default, what the books have always been rendered with
+- markdown2      used by the older per-project scripts
+- markdown-it    markdown-it-py, CommonMark with tables and strikethrough
+
+Parsers are imported on first use, so only the selected one has to be
+installed. The backend name and version are part of the render cache key.
+
+benchmarks/bench_markdown.py compares their parse throughput and
+benchmarks/golden_markdown.py diffs their HTML against golden pages.
+"""
+
+import re
+import importlib.util
+from typing import Callable, Dict, Optional
+
+
+DEFAULT_BACKEND = 'mistune'
+
+# markdown2 tags fenced code as class="js language-js" (highlightjs-lang extra)
+MARKDOWN2_CODE_CLASS_PATTERN = re.compile(r'<pre><code class="[\w+#.-]+ (language-[\w+#.-]+)">')
+
+
+class MarkdownBackend:
+    """Markdown to HTML renderer used by the markdown workers"""
+
+    name = ''
+    module = ''        # import name, checked before a build starts
+    distribution = ''  # package to pip install, also where the version is read from
+
+    def __init__(self):
+        self._render: Optional[Callable[[str], str]] = None
+
+    def available(self) -> bool:
+        """Check whether the parser is installed, without importing it"""
+        return importlib.util.find_spec(self.module) is not None
+
+    def version(self) -> str:
+        """Installed parser version, read from package metadata so the main process never imports it"""
+        try:
+            from importlib.metadata import version
+            return version(self.distribution)
+        except Exception:
+            pass
+        try:
+            return getattr(__import__(self.module), '__version__', 'unknown')
+        except ImportError:
+            return 'unknown'
+
+    def load(self) -> Callable[[str], str]:
+        """Import the parser and return its text -> HTML function"""
+        raise NotImplementedError
+
+    def render(self, text: str) -> str:
+        """Convert one markdown page to an HTML fragment"""
+        if self._render is None:
+            self._render = self.load()
+        return self._render(text)
+
+
+class MistuneBackend(MarkdownBackend):
+    name = 'mistune'
+    module = 'mistune'
+    distribution = 'mistune'
+
+    def load(self):
+        import mistune
+        return mistune.html
+
+
+class Markdown2Backend(MarkdownBackend):
+    name = 'markdown2'
+    module = 'markdown2'
+    distribution = 'markdown2'
+    # highlightjs-lang keeps fenced code unhighlighted (no Pygments codehilite
+    # markup), the highlight stage of the workers styles it like any other page
+    extras = ['fenced-code-blocks', 'highlightjs-lang', 'tables', 'strike', 'footnotes']
+
+    def load(self):
+        import markdown2
+        markdowner = markdown2.Markdown(extras=self.extras)
+
+        def render(text):
+            html = markdowner.convert(text)
+            markdowner.reset()
+            return MARKDOWN2_CODE_CLASS_PATTERN.sub(r'<pre><code class="\1">', html)
+        return render
+
+
+class MarkdownItBackend(MarkdownBackend):
+    name = 'markdown-it'
+    module = 'markdown_it'
+    distribution = 'markdown-it-py'
+
+    def load(self):
+        from markdown_it import MarkdownIt
+        return MarkdownIt('commonmark', {'html': True}).enable(['table', 'strikethrough']).render
+
+
+BACKENDS = {backend.name: backend for backend in (MistuneBackend, Markdown2Backend, MarkdownItBackend)}
+
+# One instance per process, so each worker loads its parser once
+_instances: Dict[str, MarkdownBackend] = {}
+
+
+def get_backend(name: str = DEFAULT_BACKEND) -> MarkdownBackend:
+    """Return the backend registered under name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown markdown backend: {name}. Use one of {', '.join(BACKENDS)}.")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
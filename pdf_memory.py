@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Layout Memory Budget
+
+Memory guard of generate_pdf.py (--max-memory). WeasyPrint builds the box
+tree of the whole document before it writes a single page, so the peak
+RSS of a single-pass layout grows with the size of the book's HTML and
+can exceed what a CI runner has.
+
+The projected peak of a layout is the RSS of the layout process when it
+starts plus a per-project ratio of RSS growth per byte of HTML. The ratio
+is measured with pdf_profiler.RssSampler during every bounded layout and
+persisted next to the project caches, so the projection follows the
+books and the installed WeasyPrint; until a project has been measured a
+conservative default is used.
+
+When the projected peak of the whole book exceeds the budget, the book is
+laid out in batches of consecutive chapters, each small enough to fit,
+and the batches are stitched like the fragments of an incremental build
+(pdf_fragments.py), so links, bookmarks and page numbers are unchanged.
+"""
+
+import os
+import re
+import json
+from typing import List, Optional
+
+
+MEMORY_MODEL_NAME = "memory.json"
+
+# RSS growth per byte of HTML until a layout of the project was measured
+DEFAULT_LAYOUT_BYTES_PER_HTML_BYTE = 300
+
+# Smaller layouts are dominated by fonts and CSS, their ratio says little about a book
+MIN_CALIBRATION_HTML_BYTES = 512 * 1024
+
+MEMORY_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$', re.I)
+MEMORY_SIZE_UNITS = {'': 1024 ** 2, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+
+def parse_memory_size(size_arg: Optional[str]) -> Optional[int]:
+    """Parse a memory size such as "4G", "1500M" or "512MiB" into bytes, plain numbers are MB"""
+    if not size_arg:
+        return None
+    match = MEMORY_SIZE_PATTERN.match(size_arg)
+    if not match:
+        raise ValueError(f"Invalid memory size: {size_arg}. Use e.g. 4G, 1500M or 512MiB.")
+    return int(float(match.group(1)) * MEMORY_SIZE_UNITS[match.group(2).lower()])
+
+
+def format_memory_size(size: Optional[int]) -> str:
+    """Format a byte count as MB for reports"""
+    return "-" if size is None else f"{size / 1024 / 1024:.0f} MB"
+
+
+def plan_batches(sizes: List[int], max_batch_bytes: int) -> List[List[int]]:
+    """Group consecutive chapters into batches of at most max_batch_bytes of HTML
+
+    Returns the chapter indexes of every batch in book order. A chapter that
+    is larger than the limit on its own gets a batch of its own.
+    """
+    batches, current, current_bytes = [], [], 0
+    for index, size in enumerate(sizes):
+        if current and current_bytes + size > max_batch_bytes:
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(index)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class LayoutMemoryModel:
+    """Projected layout peak RSS of one project, calibrated by sampled layouts"""
+
+    def __init__(self, cache_dir: str):
+        self.path = os.path.join(cache_dir, MEMORY_MODEL_NAME)
+        self.bytes_per_html_byte = DEFAULT_LAYOUT_BYTES_PER_HTML_BYTE
+        self.calibrated = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.bytes_per_html_byte = float(data['bytes_per_html_byte'])
+            self.calibrated = True
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def project(self, html_bytes: int, baseline: int) -> int:
+        """Peak RSS of laying out html_bytes of HTML in a process currently at baseline"""
+        return baseline + int(self.bytes_per_html_byte * html_bytes)
+
+    def max_html_bytes(self, budget: int, baseline: int) -> int:
+        """Largest layout, in bytes of HTML, whose projected peak fits the budget"""
+        return max(0, int((budget - baseline) / self.bytes_per_html_byte))
+
+    def record(self, html_bytes: int, start_rss: Optional[int], peak_rss: Optional[int]) -> bool:
+        """Recalibrate from one sampled layout of html_bytes, returns whether the model changed"""
+        if start_rss is None or peak_rss is None or html_bytes < MIN_CALIBRATION_HTML_BYTES:
+            return False
+        growth = peak_rss - start_rss
+        if growth <= 0:
+            return False
+        self.bytes_per_html_byte = growth / html_bytes
+        self.calibrated = True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'bytes_per_html_byte': self.bytes_per_html_byte,
+                       'measured_html_bytes': html_bytes, 'measured_growth': growth}, f, indent=2)
+        os.replace(tmp_path, self.path)
+        return True
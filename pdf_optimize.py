@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - PDF Size Optimizer
+
+Optional post-processing stage of generate_pdf.py (--optimize):
+
+1. Deduplication - image XObjects and embedded font programs with
+   identical bytes are merged into one object. Stitched fragment PDFs and
+   repeated figures otherwise carry one copy per occurrence.
+2. Object streams - the many small dictionaries of a WeasyPrint PDF
+   (annotations, outlines, font descriptors) are packed into compressed
+   object streams.
+3. Linearization - the file is reordered so viewers can show the first
+   page before the whole download has arrived.
+
+With pikepdf all three steps run. Without it pypdf only merges identical
+objects through its public compress_identical_objects(); object streams
+and linearization are skipped (the result says so) and the number of
+merged objects is not known.
+
+The size report attributes the stream bytes of the written PDF (content
+streams, images, fonts) to the pages that reference them, and from there
+to nav sections. Objects used by pages of several sections, such as the
+font subsets, are reported as shared. Streams are measured decoded,
+through pypdf's public get_data(), so shares are of the decoded bytes
+rather than of the file; streams pypdf cannot decode are counted and
+reported instead.
+
+Optional: pip install pikepdf
+"""
+
+import os
+import hashlib
+from typing import Dict, List, Set, Tuple
+
+
+FONT_FILE_KEYS = ('/FontFile', '/FontFile2', '/FontFile3')
+
+
+# ============================================================================
+# Optimization
+# ============================================================================
+
+def optimize_pdf(pdf_path: str) -> Dict:
+    """Rewrite pdf_path in place, returns {backend, before, after, merged, linearized, skipped}"""
+    before = os.path.getsize(pdf_path)
+    tmp_path = f"{pdf_path}.opt.tmp"
+    try:
+        import pikepdf
+    except ImportError:
+        _optimize_with_pypdf(pdf_path, tmp_path)
+        backend, merged, linearized = 'pypdf', None, False
+        skipped = ['object streams', 'linearization']
+    else:
+        merged = _optimize_with_pikepdf(pikepdf, pdf_path, tmp_path)
+        backend, linearized, skipped = 'pikepdf', True, []
+
+    after = os.path.getsize(tmp_path)
+    if after < before:
+        os.replace(tmp_path, pdf_path)
+    else:
+        # Nothing to gain, keep the original bytes (and its linearization state)
+        os.remove(tmp_path)
+        after, linearized = before, False
+    return {'backend': backend, 'before': before, 'after': after,
+            'merged': merged, 'linearized': linearized, 'skipped': skipped}
+
+
+def _optimize_with_pypdf(pdf_path: str, tmp_path: str):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter(clone_from=pdf_path)
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+
+
+def _optimize_with_pikepdf(pikepdf, pdf_path: str, tmp_path: str) -> int:
+    with pikepdf.open(pdf_path) as pdf:
+        merged = _dedupe_streams(pikepdf, pdf)
+        pdf.remove_unreferenced_resources()
+        pdf.save(tmp_path, linearize=True, compress_streams=True,
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    return merged
+
+
+def _dedupe_streams(pikepdf, pdf) -> int:
+    """Point every reference to an image or font program at one copy per distinct content"""
+    canonical: Dict[Tuple, object] = {}
+    keys: Dict[Tuple[int, int], Tuple] = {}
+    merged: Set[Tuple[int, int]] = set()
+
+    def stream_key(stream) -> Tuple:
+        objgen = stream.objgen
+        if objgen not in keys:
+            entries = []
+            for name, value in sorted(stream.stream_dict.items()):
+                if name == '/Length':
+                    continue
+                if isinstance(value, pikepdf.Stream):
+                    # e.g. /SMask: equal when the referenced stream is equal
+                    entries.append((name, stream_key(value)))
+                else:
+                    entries.append((name, repr(value)))
+            digest = hashlib.sha256(stream.read_raw_bytes()).hexdigest()
+            keys[objgen] = (digest, tuple(entries))
+        return keys[objgen]
+
+    def dedupe(container, name):
+        value = container.get(name)
+        if not isinstance(value, pikepdf.Stream) or value.objgen == (0, 0):
+            return
+        first = canonical.setdefault(stream_key(value), value)
+        if first.objgen != value.objgen:
+            container[name] = first
+            merged.add(value.objgen)
+
+    def dedupe_resources(resources, seen):
+        if resources is None or (resources.objgen in seen and resources.objgen != (0, 0)):
+            return
+        seen.add(resources.objgen)
+        xobjects = resources.get('/XObject')
+        if xobjects is not None:
+            for name in list(xobjects.keys()):
+                xobject = xobjects[name]
+                if xobject.get('/Subtype') == '/Image':
+                    if '/SMask' in xobject:
+                        dedupe(xobject, '/SMask')
+                    dedupe(xobjects, name)
+                elif xobject.get('/Subtype') == '/Form':
+                    dedupe_resources(xobject.get('/Resources'), seen)
+        fonts = resources.get('/Font')
+        if fonts is not None:
+            for font in fonts.values():
+                for descendant in font.get('/DescendantFonts', [font]):
+                    descriptor = descendant.get('/FontDescriptor')
+                    if descriptor is not None:
+                        for key in FONT_FILE_KEYS:
+                            dedupe(descriptor, key)
+
+    seen = set()
+    for page in pdf.pages:
+        dedupe_resources(page.obj.get('/Resources'), seen)
+    return len(merged)
+
+
+# ============================================================================
+# Size Attribution
+# ============================================================================
+
+class PdfSizeAttribution:
+    """Decoded stream bytes of a PDF, attributed to the pages that reference them"""
+
+    def __init__(self, pdf_path: str):
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+        reader = PdfReader(pdf_path)
+        self.file_bytes = os.path.getsize(pdf_path)
+        self.page_count = len(reader.pages)
+        # idnum -> stream bytes, idnum -> indices of the pages using it
+        self.sizes: Dict[int, int] = {}
+        self.users: Dict[int, Set[int]] = {}
+        # Streams with a filter pypdf cannot decode, left out of the sizes
+        self.undecodable = 0
+
+        page_ids = {page.indirect_reference.idnum for page in reader.pages}
+        for index, page in enumerate(reader.pages):
+            visited = {page.indirect_reference.idnum}
+            stack = [value for key, value in page.items() if key != '/Parent']
+            while stack:
+                value = stack.pop()
+                if isinstance(value, IndirectObject):
+                    # Links point at other pages; those belong to their own page
+                    if value.idnum in visited or value.idnum in page_ids:
+                        continue
+                    visited.add(value.idnum)
+                    resolved = value.get_object()
+                    if isinstance(resolved, StreamObject):
+                        if value.idnum not in self.sizes:
+                            try:
+                                self.sizes[value.idnum] = len(resolved.get_data())
+                            except Exception:
+                                self.sizes[value.idnum] = 0
+                                self.undecodable += 1
+                        self.users.setdefault(value.idnum, set()).add(index)
+                    value = resolved
+                if isinstance(value, DictionaryObject):
+                    stack.extend(item for key, item in value.items() if key not in ('/Parent', '/P'))
+                elif isinstance(value, ArrayObject):
+                    stack.extend(value)
+
+    @property
+    def stream_bytes(self) -> int:
+        """Decoded bytes of every stream the pages reference"""
+        return sum(self.sizes.values())
+
+    def by_units(self, units: List[Tuple[str, int]]) -> Tuple[List[Tuple[str, int, int]], int]:
+        """Attribute stream bytes to page ranges
+
+        units is a list of (name, first_page) in document order; each unit runs
+        until the next one starts. Returns ([(name, pages, bytes)], shared_bytes)
+        where shared_bytes belong to objects used by more than one unit.
+        """
+        starts = [first_page for _, first_page in units]
+        page_units = []
+        unit = -1
+        for page in range(self.page_count):
+            while unit + 1 < len(starts) and starts[unit + 1] <= page:
+                unit += 1
+            page_units.append(unit)
+
+        unit_bytes = [0] * len(units)
+        shared = 0
+        for idnum, size in self.sizes.items():
+            owners = {page_units[page] for page in self.users[idnum]}
+            owner = owners.pop() if len(owners) == 1 else -1
+            if owner >= 0:
+                unit_bytes[owner] += size
+            else:
+                shared += size
+
+        rows = []
+        for index, (name, first_page) in enumerate(units):
+            last_page = starts[index + 1] if index + 1 < len(starts) else self.page_count
+            rows.append((name, max(last_page - first_page, 0), unit_bytes[index]))
+        return rows, shared
+
+
+def format_size_rows(rows: List[Tuple[str, int, int]], total: int, limit: int = None) -> List[str]:
+    """Printable lines of (name, pages, bytes) rows, largest first when limit is given"""
+    if limit is not None:
+        rows = sorted(rows, key=lambda row: row[2], reverse=True)[:limit]
+    lines = []
+    for name, pages, size in rows:
+        share = size * 100 / total if total else 0
+        lines.append(f"{name[:40]:<40} {pages:>5} pages {size / 1024 / 1024:>8.2f} MB {share:>5.1f}%")
+    return lines
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - HTML Preview
+
+Static HTML preview of the assembled book, written instead of a PDF by
+`generate_pdf.py --format html` and the per-project converters. It reuses
+the per-file HTML of the markdown stage and skips WeasyPrint entirely, so
+on a warm render cache it only costs the markdown stage plus file writes.
+
+Layout of the preview directory:
+
+    index.html          cover, table of contents and chapter list
+    chapter-01.html     one page per top-level nav section
+    preview.css         the PDF stylesheet plus screen-only rules
+
+The browser only loads the chapter being read, images are loaded lazily,
+and in-document links are rewritten to point at the chapter page that
+holds their anchor.
+"""
+
+import os
+import re
+import html as html_lib
+from typing import Dict, List, Optional, Tuple
+
+
+CHAPTER_MARKER = '<div class="chapter">'
+
+ID_PATTERN = re.compile(r'\bid="([^"]+)"')
+INTERNAL_HREF_PATTERN = re.compile(r'href="#([^"]*)"')
+IMG_PATTERN = re.compile(r'<img(?![^>]*\bloading=)')
+CHAPTER_TITLE_PATTERN = re.compile(r'<h1[^>]*>(.*?)</h1>', re.S)
+
+PREVIEW_CSS = """
+@media screen {
+    html { background: #f4f5f7; }
+    body { max-width: 900px; margin: 0 auto; padding: 0 32px 48px; background: #fff; }
+    .chapter, .section { page-break-before: auto !important; }
+    .preview-nav {
+        position: sticky; top: 0; z-index: 10;
+        display: flex; justify-content: space-between; gap: 12px;
+        padding: 10px 0; margin-bottom: 16px;
+        background: #fff; border-bottom: 1px solid #e1e4e8; font-size: 14px;
+    }
+    .preview-nav a { text-decoration: none; }
+    .preview-chapters li { margin: 6px 0; }
+    img { max-width: 100%; height: auto; }
+    pre { overflow-x: auto; }
+}
+"""
+
+
+def chapter_filename(index: int) -> str:
+    return f"chapter-{index + 1:02d}.html"
+
+
+def split_document_chapters(document_html: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split a merged book into (front_matter_html, [(chapter_name, chapter_html)])
+
+    For converters that only produce one merged document: everything before
+    the first chapter div is front matter, and each chapter runs until the
+    next chapter div starts.
+    """
+    body_start = document_html.find('<body>')
+    body_end = document_html.rfind('</body>')
+    if body_start != -1:
+        document_html = document_html[body_start + len('<body>'):body_end if body_end != -1 else None]
+
+    pieces = document_html.split(CHAPTER_MARKER)
+    chapters = []
+    for piece in pieces[1:]:
+        chapter_html = CHAPTER_MARKER + piece
+        match = CHAPTER_TITLE_PATTERN.search(chapter_html)
+        name = re.sub(r'<[^>]+>', '', match.group(1)).strip() if match else f"Chapter {len(chapters) + 1}"
+        chapters.append((name, chapter_html))
+    return pieces[0], chapters
+
+
+def _page(title: str, body: str) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html_lib.escape(title)}</title>
+<link rel="stylesheet" href="preview.css">
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def _nav(index: int, chapters: List[Tuple[str, str]]) -> str:
+    links = ['<a href="index.html">目录</a>']
+    if index > 0:
+        links.insert(0, f'<a href="{chapter_filename(index - 1)}">&larr; '
+                        f'{html_lib.escape(chapters[index - 1][0])}</a>')
+    if index + 1 < len(chapters):
+        links.append(f'<a href="{chapter_filename(index + 1)}">'
+                     f'{html_lib.escape(chapters[index + 1][0])} &rarr;</a>')
+    return f'<nav class="preview-nav">{"".join(links)}</nav>'
+
+
+def _write_if_changed(path: str, content: str) -> bool:
+    """Write content unless the file already holds exactly that, returns True if written"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def write_html_preview(preview_dir: str, title: str, css_text: Optional[str],
+                       front_matter: str, chapters: List[Tuple[str, str]]) -> Dict:
+    """Write the chaptered preview and return {'index', 'pages', 'written', 'bytes'}"""
+    os.makedirs(preview_dir, exist_ok=True)
+
+    # Which page every anchor lives on, so cross-chapter links can be rewritten
+    anchor_pages = {anchor: 'index.html' for anchor in ID_PATTERN.findall(front_matter)}
+    for index, (_, chapter_html) in enumerate(chapters):
+        for anchor in ID_PATTERN.findall(chapter_html):
+            anchor_pages.setdefault(anchor, chapter_filename(index))
+
+    def localize(page_html: str, page_name: str) -> str:
+        def replace_href(match):
+            target_page = anchor_pages.get(match.group(1))
+            if target_page is None or target_page == page_name:
+                return match.group(0)
+            return f'href="{target_page}#{match.group(1)}"'
+        page_html = INTERNAL_HREF_PATTERN.sub(replace_href, page_html)
+        return IMG_PATTERN.sub('<img loading="lazy"', page_html)
+
+    pages = {'preview.css': (css_text or '') + PREVIEW_CSS}
+
+    chapter_list = ''.join(
+        f'<li><a href="{chapter_filename(index)}">{html_lib.escape(name)}</a></li>'
+        for index, (name, _) in enumerate(chapters)
+    )
+    pages['index.html'] = _page(title, localize(front_matter, 'index.html')
+                                + f'<ol class="preview-chapters">{chapter_list}</ol>')
+
+    for index, (name, chapter_html) in enumerate(chapters):
+        filename = chapter_filename(index)
+        nav = _nav(index, chapters)
+        pages[filename] = _page(f"{name} - {title}", nav + localize(chapter_html, filename) + nav)
+
+    written = sum(1 for filename, content in pages.items()
+                  if _write_if_changed(os.path.join(preview_dir, filename), content))
+
+    # Chapters that no longer exist after a nav change
+    for filename in os.listdir(preview_dir):
+        if filename.startswith('chapter-') and filename not in pages:
+            os.remove(os.path.join(preview_dir, filename))
+
+    return {'index': os.path.join(preview_dir, 'index.html'), 'pages': len(pages), 'written': written,
+            'bytes': sum(len(content.encode('utf-8')) for content in pages.values())}
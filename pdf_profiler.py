@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Build Profiler
+
+Stage-level profiler for generate_pdf.py. Records wall time, CPU time and
+peak RSS for every build stage in the main process, plus one event per
+worker task, and exports them as a Chrome trace-event file (open it in
+chrome://tracing or https://ui.perfetto.dev) and a plain-text summary.
+
+Peak RSS is the process high-water mark when a stage ends, so the first
+stage whose value jumps is the one that allocated the memory. RssSampler
+polls the current RSS from a thread instead, to measure the peak of one
+block of work (e.g. a WeasyPrint layout) after memory was freed earlier.
+
+Usage:
+    python generate_pdf.py android --profile output/android_trace.json
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident set size of the current process in bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Return the current resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        # No procfs (macOS, Windows): the high-water mark is the closest we have
+        return peak_rss_bytes()
+
+
+class RssSampler:
+    """Sample the current RSS from a background thread while a block runs
+
+    with RssSampler() as sampler:
+        layout()
+    sampler.start, sampler.peak  # bytes, None where RSS cannot be read
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.start = None
+        self.peak = None
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self) -> Optional[int]:
+        """Take one sample and return it"""
+        rss = current_rss_bytes()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+            self.samples += 1
+        return rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.start = self.sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return False
+
+
+def worker_timing(start: float, start_cpu: float, **args) -> Dict:
+    """Build the timing record a worker task returns alongside its result"""
+    return {
+        'start': start,
+        'wall': time.time() - start,
+        'cpu': time.process_time() - start_cpu,
+        'pid': os.getpid(),
+        'peak_rss': peak_rss_bytes(),
+        'args': args,
+    }
+
+
+class StageProfiler:
+    """Collects stage and worker timings for one generate_pdf.py invocation"""
+
+    def __init__(self):
+        self.origin = time.time()
+        self.pid = os.getpid()
+        self.stages = []
+        self.worker_events = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, **args):
+        """Time a block of work in the current process"""
+        start = time.time()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            event = {
+                'name': name,
+                'start': start,
+                'wall': time.time() - start,
+                'cpu': time.process_time() - start_cpu,
+                'pid': self.pid,
+                'tid': threading.get_ident(),
+                'peak_rss': peak_rss_bytes(),
+                'args': args,
+            }
+            with self._lock:
+                self.stages.append(event)
+
+    def add_worker_event(self, name: str, timing: Dict, received: Optional[float] = None):
+        """Record a task timed inside a worker process
+
+        received is the time the main process got the result back; the gap
+        after the worker finished is the pickling/IPC overhead of the task.
+        """
+        event = dict(timing, name=name, tid=timing['pid'])
+        if received is not None:
+            event['transfer'] = max(0.0, received - (timing['start'] + timing['wall']))
+        with self._lock:
+            self.worker_events.append(event)
+
+    def stage_totals(self) -> List[Dict]:
+        """Aggregate stages by name, in first-seen order"""
+        totals = {}
+        for event in self.stages:
+            total = totals.setdefault(event['name'], {
+                'name': event['name'], 'count': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_rss': 0
+            })
+            total['count'] += 1
+            total['wall'] += event['wall']
+            total['cpu'] += event['cpu']
+            total['peak_rss'] = max(total['peak_rss'], event['peak_rss'] or 0)
+        return list(totals.values())
+
+    def chrome_trace(self) -> Dict:
+        """Return the recorded events in Chrome trace-event format"""
+        trace_events = []
+        pids = {self.pid: 'generate_pdf (main)'}
+        for event in self.worker_events:
+            pids.setdefault(event['pid'], f"worker {event['pid']}")
+        for pid, label in pids.items():
+            trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                                 'args': {'name': label}})
+
+        for event in self.stages + self.worker_events:
+            args = dict(event.get('args') or {})
+            args['cpu_ms'] = round(event['cpu'] * 1000, 3)
+            if event.get('peak_rss'):
+                args['peak_rss_mb'] = round(event['peak_rss'] / 1024 / 1024, 1)
+            if 'transfer' in event:
+                args['transfer_ms'] = round(event['transfer'] * 1000, 3)
+            trace_events.append({
+                'name': event['name'],
+                'cat': 'worker' if event['pid'] != self.pid else 'stage',
+                'ph': 'X',
+                'ts': round((event['start'] - self.origin) * 1e6),
+                'dur': round(event['wall'] * 1e6),
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': args,
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str):
+        """Write the trace-event JSON file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def summary_table(self) -> str:
+        """Format per-stage and per-worker totals as a text table"""
+        lines = [f"  {'Stage':<42} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak RSS (MB)':>14}",
+                 "  " + "-" * 77]
+        for total in self.stage_totals():
+            name = total['name'] if total['count'] == 1 else f"{total['name']} (x{total['count']})"
+            rss = f"{total['peak_rss'] / 1024 / 1024:.1f}" if total['peak_rss'] else "-"
+            lines.append(f"  {name[:42]:<42} {total['wall']:>9.2f} {total['cpu']:>9.2f} {rss:>14}")
+
+        if self.worker_events:
+            by_name = {}
+            for event in self.worker_events:
+                by_name.setdefault(event['name'], []).append(event)
+            lines.append("")
+            lines.append(f"  {'Worker task':<30} {'Tasks':>6} {'Wall (s)':>9} {'CPU (s)':>9} "
+                         f"{'Hits':>6} {'Avg xfer (ms)':>14}")
+            lines.append("  " + "-" * 77)
+            for name, events in by_name.items():
+                wall = sum(e['wall'] for e in events)
+                cpu = sum(e['cpu'] for e in events)
+                hits = sum(1 for e in events if e['args'].get('cache') == 'hit')
+                transfers = [e['transfer'] for e in events if 'transfer' in e]
+                transfer = f"{sum(transfers) / len(transfers) * 1000:.2f}" if transfers else "-"
+                lines.append(f"  {name[:30]:<30} {len(events):>6} {wall:>9.2f} {cpu:>9.2f} "
+                             f"{hits:>6} {transfer:>14}")
+        return "\n".join(lines)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Code Comment Translation
+
+Content hook of generate_pdf.py (--translate): rewrites Chinese comments
+inside fenced code blocks to English before a page is rendered, for
+editions of the books aimed at readers who do not read Chinese. Prose
+outside code blocks is left alone.
+
+Translation is a glossary replacement, so it is deterministic: the hook's
+cache_token goes into the render cache key, and translated pages are
+cached like any other page. Bump TRANSLATION_VERSION whenever the
+glossary or the comment patterns change.
+
+Content hooks run inside the markdown workers and are shipped to them
+with the project state, so they must be picklable: instances of module
+level classes, or module level functions.
+"""
+
+import re
+import json
+import hashlib
+from typing import Dict, Optional
+
+
+TRANSLATION_VERSION = 1
+
+CHINESE_PATTERN = re.compile(r'[\u4e00-\u9fa5]')
+
+# Fenced code blocks, the fences themselves are kept untouched
+CODE_FENCE_PATTERN = re.compile(r'^(\s*```[\w+#.-]*[ \t]*\n)(.*?)(^\s*```)', re.M | re.S)
+
+# (pattern, has closing group) of whole-line comments
+COMMENT_PATTERNS = [
+    (re.compile(r'^(\s*//\s*)(.+)$'), False),            # JavaScript, Java, C++
+    (re.compile(r'^(\s*#\s*)(.+)$'), False),             # Python, Shell
+    (re.compile(r'^(\s*/\*\s*)(.+?)(\s*\*/)$'), True),   # C-style block comment
+    (re.compile(r'^(\s*<!--\s*)(.+?)(\s*-->)$'), True),  # HTML comment
+    (re.compile(r'^(\s*--\s*)(.+)$'), False),            # SQL, Lua
+]
+INLINE_COMMENT_PATTERN = re.compile(r'(.+?)(//|#)(\s*)(.+)$')
+
+GLOSSARY = {
+    '绕过': 'Bypass',
+    '反调试': 'Anti-Debugging',
+    '检测': 'Detection',
+    '策略': 'Strategy',
+    '修改': 'Modify',
+    '拦截': 'Intercept',
+    '返回': 'Return',
+    '调用': 'Call',
+    '函数': 'Function',
+    '方法': 'Method',
+    '类': 'Class',
+    '对象': 'Object',
+    '参数': 'Parameter',
+    '变量': 'Variable',
+    '注释': 'Comment',
+    '代码': 'Code',
+    '脚本': 'Script',
+    '配置': 'Config',
+    '设置': 'Set',
+    '初始化': 'Initialize',
+    '处理': 'Process',
+    '解析': 'Parse',
+    '生成': 'Generate',
+    '创建': 'Create',
+    '删除': 'Delete',
+    '更新': 'Update',
+    '查询': 'Query',
+    '插入': 'Insert',
+    '获取': 'Get',
+    '判断': 'Check',
+    '如果': 'If',
+    '否则': 'Else',
+    '循环': 'Loop',
+    '遍历': 'Iterate',
+    '打印': 'Print',
+    '输出': 'Output',
+    '输入': 'Input',
+    '读取': 'Read',
+    '写入': 'Write',
+    '文件': 'File',
+    '目录': 'Directory',
+    '路径': 'Path',
+    '数据': 'Data',
+    '结果': 'Result',
+    '错误': 'Error',
+    '异常': 'Exception',
+    '成功': 'Success',
+    '失败': 'Failed',
+    '开始': 'Start',
+    '结束': 'End',
+}
+
+
+def is_chinese(text: str) -> bool:
+    """Check whether text contains Chinese characters"""
+    return bool(CHINESE_PATTERN.search(text))
+
+
+class CommentTranslator:
+    """Content hook translating Chinese code comments with a glossary"""
+
+    cache_token = f"translate-comments-{TRANSLATION_VERSION}"
+
+    def __init__(self, glossary: Optional[Dict[str, str]] = None):
+        self.glossary = glossary or GLOSSARY
+        self.memo: Dict[str, str] = {}
+        if glossary:
+            # A custom glossary renders differently, keep its pages apart in the cache
+            digest = hashlib.sha256(json.dumps(glossary, sort_keys=True).encode('utf-8')).hexdigest()
+            self.cache_token += f"-{digest[:16]}"
+
+    def __call__(self, content: str, path: str) -> str:
+        """Translate the comments of every fenced code block of a page"""
+        return CODE_FENCE_PATTERN.sub(
+            lambda m: m.group(1) + self.translate_code(m.group(2)) + m.group(3), content)
+
+    def translate_text(self, text: str) -> str:
+        """Translate one comment"""
+        if not is_chinese(text):
+            return text
+        if text not in self.memo:
+            result = text
+            for zh, en in self.glossary.items():
+                result = result.replace(zh, en)
+            self.memo[text] = result
+        return self.memo[text]
+
+    def translate_line(self, line: str) -> str:
+        """Translate the comment of one code line, if it has a Chinese one"""
+        for pattern, closed in COMMENT_PATTERNS:
+            match = pattern.match(line)
+            if match and is_chinese(match.group(2)):
+                suffix = match.group(3) if closed else ''
+                return match.group(1) + self.translate_text(match.group(2)) + suffix
+
+        match = INLINE_COMMENT_PATTERN.match(line)
+        if match and is_chinese(match.group(4)):
+            return match.group(1) + match.group(2) + match.group(3) + self.translate_text(match.group(4))
+        return line
+
+    def translate_code(self, code: str) -> str:
+        """Translate the comments of a code block"""
+        return '\n'.join(self.translate_line(line) for line in code.split('\n'))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reverse Engineering Cookbook - Change Watcher
+
+File watcher behind `generate_pdf.py --watch`. Uses watchdog (inotify on
+Linux, FSEvents on macOS) when it is installed and falls back to polling
+file modification times otherwise. Bursts of events, such as an editor
+writing a temp file and renaming it over the original, are debounced into
+one batch of changed paths.
+
+Optional: pip install watchdog
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, Set, Tuple
+
+from pdf_images import IMAGE_EXTENSIONS
+
+
+WATCHED_EXTENSIONS = ('.md', '.yml', '.yaml') + IMAGE_EXTENSIONS
+
+# Editor swap/backup files that should never trigger a rebuild
+IGNORED_PREFIXES = ('.#', '~$')
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp')
+
+
+def is_watched_file(path: str) -> bool:
+    """Check whether a changed path can affect the generated book"""
+    name = os.path.basename(path)
+    if name.startswith(IGNORED_PREFIXES) or name.endswith(IGNORED_SUFFIXES):
+        return False
+    return name.lower().endswith(WATCHED_EXTENSIONS)
+
+
+class ChangeWatcher:
+    """Blocks until files under the watched paths change, returns debounced batches"""
+
+    def __init__(self, paths: Iterable[str], debounce: float = 0.5, poll_interval: float = 1.0):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._pending: Set[str] = set()
+        self._last_event = 0.0
+        self._cond = threading.Condition()
+        self._observer = None
+
+        try:
+            self._start_watchdog()
+            self.backend = 'watchdog'
+        except ImportError:
+            self._snapshot = self._scan()
+            self.backend = 'polling'
+
+    def _start_watchdog(self):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, 'dest_path', None)):
+                    if path and is_watched_file(path):
+                        watcher._record(os.path.abspath(path))
+
+        self._observer = Observer()
+        for path in self.paths:
+            if os.path.isdir(path):
+                self._observer.schedule(Handler(), path, recursive=True)
+            else:
+                # Watch the parent directory so atomic renames over the file are seen
+                self._observer.schedule(Handler(), os.path.dirname(path), recursive=False)
+        self._observer.start()
+
+    def _record(self, path: str):
+        with self._cond:
+            if self._is_under_watched(path):
+                self._pending.add(path)
+                self._last_event = time.monotonic()
+                self._cond.notify_all()
+
+    def _is_under_watched(self, path: str) -> bool:
+        for watched in self.paths:
+            if path == watched or path.startswith(watched + os.sep):
+                return True
+        return False
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Return {path: (mtime_ns, size)} for every watched file"""
+        snapshot = {}
+        for watched in self.paths:
+            if os.path.isfile(watched):
+                stat = os.stat(watched)
+                snapshot[watched] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for root, _, files in os.walk(watched):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if not is_watched_file(path):
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _poll(self) -> Set[str]:
+        snapshot = self._scan()
+        changed = {path for path, state in snapshot.items() if self._snapshot.get(path) != state}
+        changed |= set(self._snapshot) - set(snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def wait(self) -> Set[str]:
+        """Block until a change happens and the watched files have been quiet for the debounce time"""
+        if self._observer is None:
+            changed = set()
+            while not changed:
+                time.sleep(self.poll_interval)
+                changed = self._poll()
+            while True:
+                time.sleep(self.debounce)
+                more = self._poll()
+                if not more:
+                    return changed
+                changed |= more
+
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            while True:
+                remaining = self._last_event + self.debounce - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            changed, self._pending = self._pending, set()
+        return changed
+
+    def close(self):
+        """Stop the watchdog observer thread, if any"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
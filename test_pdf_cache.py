@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for pdf_cache.py: cache records, render keys and LRU pruning
+"""
+
+import sqlite3
+
+import pytest
+
+from pdf_cache import (CODEC_RAW, CODEC_ZLIB, RECORD_HEADER, RenderCache, compute_render_key, decode_record,
+                       encode_record, read_record_file, write_record_file)
+
+
+HTML = '<h1>R01: 抓包</h1>' + '<p>SSL pinning bypass</p>' * 50
+
+
+# ============================================================================
+# Records
+# ============================================================================
+
+@pytest.mark.parametrize('compress_level', [0, 1, 6])
+def test_record_round_trip(compress_level):
+    record = encode_record(HTML, 'abc123', 'v1', compress_level)
+    assert decode_record(record) == HTML
+    assert decode_record(record, 'abc123', 'v1') == HTML
+    assert decode_record(memoryview(record)) == HTML
+
+
+def test_records_are_uncompressed_by_default():
+    assert RECORD_HEADER.unpack_from(encode_record(HTML))[1] == CODEC_RAW
+    assert RECORD_HEADER.unpack_from(encode_record(HTML, compress_level=6))[1] == CODEC_ZLIB
+
+
+def test_record_with_other_digest_or_version_is_rejected():
+    record = encode_record(HTML, 'abc123', 'v1')
+    assert decode_record(record, digest='def456') is None
+    assert decode_record(record, version='v2') is None
+
+
+@pytest.mark.parametrize('compress_level', [0, 6])
+def test_malformed_records_are_rejected(compress_level):
+    record = encode_record(HTML, compress_level=compress_level)
+    assert decode_record(b'') is None
+    assert decode_record(b'XXXX' + record[4:]) is None
+    assert decode_record(record[:-10]) is None
+
+
+def test_record_file_round_trip(tmp_path):
+    path = str(tmp_path / 'page.rec')
+    write_record_file(path, HTML, 'abc123', 'v1')
+    assert read_record_file(path, 'abc123', 'v1') == HTML
+    assert read_record_file(path, 'abc123', 'v2') is None
+    assert read_record_file(str(tmp_path / 'missing.rec')) is None
+    (tmp_path / 'empty.rec').write_bytes(b'')
+    assert read_record_file(str(tmp_path / 'empty.rec')) is None
+
+
+# ============================================================================
+# Render keys
+# ============================================================================
+
+def test_render_key_covers_every_input():
+    base = dict(content=b'# Page', path='a.md', recipe_number='R01',
+                link_targets=[('b.md', 'page-b')], renderer_version='v1', asset_states=[('x.png', '1')])
+    key = compute_render_key(**base)
+    assert compute_render_key(**base) == key
+    for name, value in [('content', b'# Other'), ('path', 'c.md'), ('recipe_number', 'R02'),
+                        ('link_targets', [('b.md', None)]), ('renderer_version', 'v2'),
+                        ('asset_states', [('x.png', '2')])]:
+        assert compute_render_key(**{**base, name: value}) != key, name
+
+
+# ============================================================================
+# Render cache
+# ============================================================================
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    yield cache
+    cache.close()
+
+
+def set_last_used(cache, table, times):
+    with cache.conn:
+        cache.conn.executemany(f"UPDATE {table} SET last_used = ? WHERE key = ?",
+                               [(when, key) for key, when in times.items()])
+
+
+def test_put_and_get(cache):
+    cache.put_many([('k1', 'a.md', HTML, ['issue'])])
+    assert cache.get('k1') == (HTML, ['issue'])
+    assert cache.get('k2') is None
+    cache.put_highlights([('h1', '<span class="k">def</span>')])
+    assert cache.get_highlight('h1') == '<span class="k">def</span>'
+
+
+def test_plain_text_rows_of_older_databases_stay_readable(cache):
+    with cache.conn:
+        cache.conn.execute("INSERT INTO entries (key, path, html, created, diagnostics, last_used, size) "
+                           "VALUES ('old', 'a.md', ?, 0, '[]', 0, 0)", (HTML,))
+    assert cache.get('old') == (HTML, [])
+
+
+def test_prune_evicts_least_recently_used_first(cache):
+    cache.put_many([(key, f"{key}.md", HTML, []) for key in ('e1', 'e2', 'e3')])
+    set_last_used(cache, 'entries', {'e1': 3e9, 'e2': 1e9, 'e3': 2e9})
+    size = cache.conn.execute("SELECT size FROM entries WHERE key = 'e1'").fetchone()[0]
+    evicted = cache.prune(max_bytes=2 * size, max_age_days=1e6)
+    assert evicted['entries'] == 1 and evicted['bytes'] == size
+    assert cache.get('e2') is None
+    assert cache.get('e1') is not None and cache.get('e3') is not None
+
+
+def test_prune_never_evicts_kept_keys(cache):
+    cache.put_many([(key, f"{key}.md", HTML, []) for key in ('e1', 'e2')])
+    set_last_used(cache, 'entries', {'e1': 1e9, 'e2': 2e9})
+    cache.prune(max_bytes=0, max_age_days=1e6, keep={'e1'})
+    assert cache.get('e1') is not None
+    assert cache.get('e2') is None
+
+
+def test_prune_drops_entries_older_than_max_age(cache):
+    cache.put_many([('old', 'a.md', HTML, []), ('new', 'b.md', HTML, [])])
+    set_last_used(cache, 'entries', {'old': 1.0})
+    evicted = cache.prune(max_age_days=30)
+    assert evicted['entries'] == 1
+    assert cache.get('old') is None and cache.get('new') is not None
+
+
+def test_prune_evicts_pages_and_code_blocks_in_one_lru_order(cache):
+    cache.put_many([('page', 'a.md', HTML, [])])
+    cache.put_highlights([('block', HTML)])
+    set_last_used(cache, 'entries', {'page': 2e9})
+    set_last_used(cache, 'highlights', {'block': 1e9})
+    size = cache.conn.execute("SELECT size FROM entries").fetchone()[0]
+    evicted = cache.prune(max_bytes=size, max_age_days=1e6)
+    assert evicted['highlights'] == 1 and evicted['entries'] == 0
+    assert cache.get_highlight('block') is None
+    assert cache.get('page') is not None
+
+
+def test_touch_marks_pages_and_code_blocks_as_used(cache):
+    cache.put_many([('page', 'a.md', HTML, [])])
+    cache.put_highlights([('block', HTML)])
+    set_last_used(cache, 'entries', {'page': 1.0})
+    set_last_used(cache, 'highlights', {'block': 1.0})
+    assert cache.touch(['page'], ['block']) == 2
+    assert cache.prune(max_age_days=30) == {'entries': 0, 'bytes': 0, 'highlights': 0}
+
+
+def test_highlights_of_older_databases_gain_a_use_time(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'render_cache.sqlite3'))
+    conn.execute("CREATE TABLE highlights (key TEXT PRIMARY KEY, html BLOB NOT NULL, "
+                 "created REAL NOT NULL DEFAULT 0)")
+    conn.execute("INSERT INTO highlights VALUES ('block', ?, 123.0)", (encode_record(HTML),))
+    conn.commit()
+    conn.close()
+    cache = RenderCache(str(tmp_path))
+    try:
+        assert cache.conn.execute("SELECT last_used FROM highlights").fetchone()[0] == 123.0
+        assert cache.get_highlight('block') == HTML
+    finally:
+        cache.close()
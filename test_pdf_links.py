@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for pdf_links.py: anchor ids, link resolution order, excluded pages
+and the render cache keys that depend on them
+"""
+
+from pdf_cache import compute_render_key
+from pdf_links import (RESOLVED_AMBIGUOUS, RESOLVED_BASENAME, RESOLVED_EXACT, RESOLVED_NORMALIZED,
+                       RESOLVED_RELATIVE, UNRESOLVED, LinkIndex, path_anchors)
+
+
+NAV_PATHS = [
+    '00-Quick-Start/index.md',
+    '01-Recipes/Network/ssl_pinning.md',
+    '01-Recipes/Network/index.md',
+    '02-Tools/frida.md',
+    '03-Case-Studies/frida.md',
+]
+
+
+def link_targets(index, links, source_path):
+    return sorted((url, index.resolve(url, source_path)) for url in links)
+
+
+# ============================================================================
+# Anchors
+# ============================================================================
+
+def test_anchors_are_derived_from_paths():
+    anchors = path_anchors(NAV_PATHS)
+    assert anchors['01-Recipes/Network/ssl_pinning.md'] == 'page-01-Recipes-Network-ssl_pinning'
+    assert len(set(anchors.values())) == len(NAV_PATHS)
+
+
+def test_anchors_do_not_depend_on_nav_order():
+    assert path_anchors(NAV_PATHS) == path_anchors(reversed(NAV_PATHS))
+
+
+def test_colliding_anchors_get_a_path_digest():
+    anchors = path_anchors(['a/b.md', 'a-b.md', '网络/抓包.md', '网络/证书.md'])
+    assert len(set(anchors.values())) == 4
+    assert anchors['a/b.md'].startswith('page-a-b-')
+    # The digest only depends on the path, not on which page came first
+    assert path_anchors(['网络/证书.md', '网络/抓包.md', 'a-b.md', 'a/b.md']) == anchors
+
+
+def test_cache_key_survives_nav_reorder():
+    links = ['../../02-Tools/frida.md', 'index.md', '../../00-Quick-Start/index.md#setup']
+    source = '01-Recipes/Network/ssl_pinning.md'
+    keys = []
+    for nav in (NAV_PATHS, [NAV_PATHS[3], NAV_PATHS[0], NAV_PATHS[4], NAV_PATHS[2], NAV_PATHS[1]]):
+        index = LinkIndex(path_anchors(nav))
+        keys.append(compute_render_key(b'# SSL', source, 'R01', link_targets(index, links, source), 'v1'))
+    assert keys[0] == keys[1]
+
+
+def test_cache_key_changes_with_link_target():
+    source = '01-Recipes/Network/ssl_pinning.md'
+    full = LinkIndex(path_anchors(NAV_PATHS))
+    partial = LinkIndex(path_anchors(NAV_PATHS), excluded={'02-Tools/frida.md'})
+    links = ['../../02-Tools/frida.md']
+    assert (compute_render_key(b'x', source, '', link_targets(full, links, source), 'v1')
+            != compute_render_key(b'x', source, '', link_targets(partial, links, source), 'v1'))
+
+
+# ============================================================================
+# Resolution
+# ============================================================================
+
+def test_resolution_order():
+    index = LinkIndex(path_anchors(NAV_PATHS))
+    source = '01-Recipes/Network/ssl_pinning.md'
+    # Relative to the linking page wins over the docs-root path of the same name
+    assert index.resolve_path('index.md', source) == ('01-Recipes/Network/index.md', RESOLVED_RELATIVE)
+    assert index.resolve_path('00-Quick-Start/index.md') == ('00-Quick-Start/index.md', RESOLVED_EXACT)
+    assert index.resolve_path('./../02-Tools/frida.md') == ('02-Tools/frida.md', RESOLVED_NORMALIZED)
+    assert index.resolve_path('old/ssl_pinning.md') == ('01-Recipes/Network/ssl_pinning.md',
+                                                         RESOLVED_BASENAME)
+    assert index.resolve_path('missing.md') == (None, UNRESOLVED)
+
+
+def test_ambiguous_basename_uses_first_in_nav_order():
+    index = LinkIndex(path_anchors(NAV_PATHS))
+    assert index.resolve_path('frida.md') == ('02-Tools/frida.md', RESOLVED_AMBIGUOUS)
+    assert set(index.ambiguous_basenames()) == {'index.md', 'frida.md'}
+
+
+def test_fragment_is_appended_to_the_page_anchor():
+    anchors = path_anchors(NAV_PATHS)
+    index = LinkIndex(anchors)
+    assert index.resolve('02-Tools/frida.md#hooks') == f"{anchors['02-Tools/frida.md']}-hooks"
+
+
+def test_excluded_pages_resolve_to_nothing():
+    index = LinkIndex(path_anchors(NAV_PATHS), excluded={'02-Tools/frida.md'})
+    assert index.resolve('02-Tools/frida.md') is None
+    # No fall through to the basename match of an included page
+    assert index.resolve('../02-Tools/frida.md', '01-Recipes/x.md') is None
+    assert index.resolve('03-Case-Studies/frida.md') is not None
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for pdf_memory.py: memory sizes, chapter batches and the layout memory model
+"""
+
+import pytest
+
+from pdf_memory import (DEFAULT_LAYOUT_BYTES_PER_HTML_BYTE, MIN_CALIBRATION_HTML_BYTES, LayoutMemoryModel,
+                        format_memory_size, parse_memory_size, plan_batches)
+
+
+MB = 1024 ** 2
+
+
+@pytest.mark.parametrize('size_arg, expected', [
+    ('4G', 4 * 1024 ** 3),
+    ('1500M', 1500 * MB),
+    ('512MiB', 512 * MB),
+    ('1.5g', int(1.5 * 1024 ** 3)),
+    ('2048', 2048 * MB),
+    ('64k', 64 * 1024),
+    (' 2 GB ', 2 * 1024 ** 3),
+    (None, None),
+    ('', None),
+])
+def test_parse_memory_size(size_arg, expected):
+    assert parse_memory_size(size_arg) == expected
+
+
+@pytest.mark.parametrize('size_arg', ['lots', '4X', '-1G', '1G2'])
+def test_parse_memory_size_rejects_invalid_sizes(size_arg):
+    with pytest.raises(ValueError):
+        parse_memory_size(size_arg)
+
+
+def test_format_memory_size():
+    assert format_memory_size(None) == '-'
+    assert format_memory_size(1536 * MB) == '1536 MB'
+
+
+def test_plan_batches_keeps_chapter_order_within_the_limit():
+    assert plan_batches([3, 3, 3, 3], 6) == [[0, 1], [2, 3]]
+    assert plan_batches([1, 2, 3, 4], 6) == [[0, 1, 2], [3]]
+    assert plan_batches([], 6) == []
+
+
+def test_plan_batches_gives_an_oversized_chapter_its_own_batch():
+    assert plan_batches([2, 10, 2, 2], 5) == [[0], [1], [2, 3]]
+
+
+def test_plan_batches_covers_every_chapter_once():
+    sizes = [5, 1, 7, 3, 3, 9, 2]
+    batches = plan_batches(sizes, 8)
+    assert [index for batch in batches for index in batch] == list(range(len(sizes)))
+    assert all(sum(sizes[index] for index in batch) <= 8 or len(batch) == 1 for batch in batches)
+
+
+def test_memory_model_defaults_until_calibrated(tmp_path):
+    model = LayoutMemoryModel(str(tmp_path))
+    assert not model.calibrated
+    assert model.project(MB, 100 * MB) == 100 * MB + DEFAULT_LAYOUT_BYTES_PER_HTML_BYTE * MB
+
+
+def test_memory_model_calibration_is_persisted(tmp_path):
+    model = LayoutMemoryModel(str(tmp_path))
+    html_bytes = MIN_CALIBRATION_HTML_BYTES * 2
+    assert model.record(html_bytes, 100 * MB, 100 * MB + 50 * html_bytes)
+    reloaded = LayoutMemoryModel(str(tmp_path))
+    assert reloaded.calibrated and reloaded.bytes_per_html_byte == 50
+    assert reloaded.max_html_bytes(100 * MB + 50 * html_bytes, 100 * MB) == html_bytes
+
+
+def test_memory_model_ignores_small_or_unsampled_layouts(tmp_path):
+    model = LayoutMemoryModel(str(tmp_path))
+    assert not model.record(MIN_CALIBRATION_HTML_BYTES - 1, 0, 10 * MB)
+    assert not model.record(MIN_CALIBRATION_HTML_BYTES, None, 10 * MB)
+    assert not model.record(MIN_CALIBRATION_HTML_BYTES, 10 * MB, 5 * MB)
+    assert not LayoutMemoryModel(str(tmp_path)).calibrated